@@ -84,6 +84,27 @@ class BotAPI:
                     'error': str(e)
                 }), 500
         
+        @self.app.route('/api/metrics', methods=['GET'])
+        def get_metrics():
+            """Return cache metrics reported by the cogs and per-host HTTP stats"""
+            try:
+                metrics = {}
+                for name, cog in list(self.bot.cogs.items()):
+                    if hasattr(cog, 'metrics'):
+                        metrics[name.lower()] = cog.metrics()
+                if self.bot.http_client:
+                    metrics['http'] = self.bot.http_client.stats()
+                
+                return jsonify({
+                    'metrics': metrics,
+                    'timestamp': datetime.now().isoformat()
+                })
+            except Exception as e:
+                return jsonify({
+                    'status': 'error',
+                    'error': str(e)
+                }), 500
+        
         @self.app.route('/api/health', methods=['GET'])
         def health_check():
             """Health check endpoint"""
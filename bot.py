@@ -8,6 +8,9 @@ from datetime import datetime
 from config import Config
 from api.bot_api import BotAPI
 from utils.database import Database
+from utils.games import GameSessionManager
+from utils.http import ResilientHTTP, create_http_session
+from utils.timers import TimerService
 
 # Setup logging
 logging.basicConfig(
@@ -34,6 +37,10 @@ class MegaBot(commands.Bot):
         self.start_time = datetime.now()
         self.config = Config
         self.db = Database()  # Initialize database
+        self.session = None  # Shared aiohttp session, created in setup_hook
+        self.http_client = None  # Circuit-breaking JSON client over self.session
+        self.games = GameSessionManager()  # Trivia/quiz games, one per channel
+        self.timers = TimerService()  # Shared deadlines (Pomodoro phases), one background task
         
     async def setup_hook(self):
         """Load all cogs when bot starts"""
@@ -41,6 +48,13 @@ class MegaBot(commands.Bot):
         logger.info("Connecting to database...")
         await self.db.connect()
         
+        # Shared HTTP session for all cogs (keep-alive pool)
+        self.session = create_http_session()
+        self.http_client = ResilientHTTP(self.session)
+        
+        # Started before the cogs so they can reschedule persisted timers in cog_load
+        self.timers.start()
+        
         logger.info("Loading cogs...")
         
         # List of all cog modules
@@ -71,6 +85,14 @@ class MegaBot(commands.Bot):
         except Exception as e:
             logger.error(f"[ERROR] Failed to sync commands: {e}")
     
+    async def close(self):
+        """Release shared resources before disconnecting"""
+        self.games.stop_all()
+        self.timers.stop()
+        if self.session and not self.session.closed:
+            await self.session.close()
+        await super().close()
+    
     async def on_ready(self):
         """Called when bot is ready"""
         logger.info(f"BOT ONLINE: {self.user.name}")
@@ -142,6 +164,10 @@ class MegaBot(commands.Bot):
         if message.author.bot:
             return
         
+        # Answers to a running game go straight to that channel's session
+        if self.games.dispatch(message):
+            return
+        
         # Process commands
         await self.process_commands(message)
 
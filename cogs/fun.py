@@ -6,72 +6,108 @@ Provides entertainment commands like trivia, jokes, memes, etc.
 import discord
 from discord import app_commands
 from discord.ext import commands
-import aiohttp
+from config import Config
+from utils.dice import DiceError, distribution, histogram, parse_dice, roll_dice, summarize, total_range
+from utils.games import DIFFICULTY_POINTS, GameSession, Round
+from utils.prefetch import FixtureSource, JokeSource, MemeSource, Prefetcher, TriviaSource
+from utils.questions import normalize_question
+import asyncio
 import random
 from typing import Optional
 
+MEME_SUBREDDITS = ['memes', 'dankmemes', 'wholesomememes', 'me_irl']
+
+# Category mapping for OpenTDB API
+TRIVIA_CATEGORIES = {
+    'general': 9,
+    'science': 17,
+    'history': 23,
+    'geography': 22,
+    'sports': 21
+}
+
 class Fun(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.trivia_sessions = {}  # Active trivia games
+        
+        # Ready-to-send content so commands never wait on third-party APIs
+        self.jokes = self._prefetcher(JokeSource(bot))
+        self.memes = self._prefetcher(MemeSource(bot))
+        self.trivia_questions = self._prefetcher(TriviaSource(bot))
+    
+    @staticmethod
+    def _prefetcher(source) -> Prefetcher:
+        if Config.CONTENT_FIXTURES:
+            source = FixtureSource.from_file(source.name, Config.CONTENT_FIXTURES)
+        return Prefetcher(source, capacity=Config.PREFETCH_SIZE, low_watermark=Config.PREFETCH_LOW_WATERMARK)
+    
+    async def cog_load(self):
+        self.jokes.warm(['general'])
+        self.memes.warm(MEME_SUBREDDITS)
+        self.trivia_questions.warm([f"{TRIVIA_CATEGORIES['general']}:medium"])
+    
+    async def cog_unload(self):
+        for prefetcher in (self.jokes, self.memes, self.trivia_questions):
+            prefetcher.close()
+    
+    def metrics(self) -> dict:
+        """Prefetch buffer metrics, served by the web API"""
+        return {
+            'prefetch': {
+                'jokes': self.jokes.stats(),
+                'memes': self.memes.stats(),
+                'trivia': self.trivia_questions.stats()
+            },
+            'games': self.bot.games.stats()
+        }
         
     @app_commands.command(name="joke", description="Get a random joke")
     async def joke(self, interaction: discord.Interaction):
-        """Fetch a random joke from API"""
+        """Serve a random joke from the prefetch buffer"""
         await interaction.response.defer()
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get("https://official-joke-api.appspot.com/random_joke") as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        
-                        embed = discord.Embed(
-                            title="😄 Random Joke",
-                            description=data['setup'],
-                            color=discord.Color.gold()
-                        )
-                        embed.add_field(name="Punchline", value=f"||{data['punchline']}||")
-                        embed.set_footer(text="Click the spoiler to reveal!")
-                        
-                        await interaction.followup.send(embed=embed)
-                    else:
-                        await interaction.followup.send("❌ Couldn't fetch a joke!")
-        except Exception as e:
-            await interaction.followup.send(f"❌ Error: {str(e)}")
+        data = await self.jokes.get('general')
+        if data is None:
+            await interaction.followup.send("❌ Couldn't fetch a joke!")
+            return
+        
+        embed = discord.Embed(
+            title="😄 Random Joke",
+            description=data['setup'],
+            color=discord.Color.gold()
+        )
+        embed.add_field(name="Punchline", value=f"||{data['punchline']}||")
+        embed.set_footer(text="Click the spoiler to reveal!")
+        
+        await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="meme", description="Get a random meme")
     async def meme(self, interaction: discord.Interaction):
-        """Fetch a random meme from Reddit"""
+        """Serve a random meme from the prefetched Reddit buffers"""
         await interaction.response.defer()
         
-        try:
-            # Popular meme subreddits
-            subreddits = ['memes', 'dankmemes', 'wholesomememes', 'me_irl']
-            subreddit = random.choice(subreddits)
-            
-            async with aiohttp.ClientSession() as session:
-                url = f"https://www.reddit.com/r/{subreddit}/random.json"
-                headers = {'User-Agent': 'Discord Bot'}
-                
-                async with session.get(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        
-                        post = data[0]['data']['children'][0]['data']
-                        
-                        embed = discord.Embed(
-                            title=post['title'],
-                            color=discord.Color.orange()
-                        )
-                        embed.set_image(url=post['url'])
-                        embed.set_footer(text=f"👍 {post['ups']} upvotes | r/{subreddit}")
-                        
-                        await interaction.followup.send(embed=embed)
-                    else:
-                        await interaction.followup.send("❌ Couldn't fetch a meme!")
-        except Exception as e:
-            await interaction.followup.send(f"❌ Error fetching meme: {str(e)}")
+        # Try a random subreddit first, then any other buffer that has memes ready
+        subreddits = random.sample(MEME_SUBREDDITS, len(MEME_SUBREDDITS))
+        post = None
+        for subreddit in subreddits:
+            post = self.memes.pop(subreddit)
+            if post:
+                break
+        if post is None:
+            post = await self.memes.get(subreddits[0])
+        
+        if post is None:
+            await interaction.followup.send("❌ Couldn't fetch a meme!")
+            return
+        
+        embed = discord.Embed(
+            title=post['title'],
+            color=discord.Color.orange()
+        )
+        embed.set_image(url=post['url'])
+        embed.set_footer(text=f"👍 {post['ups']} upvotes | r/{post['subreddit']}")
+        
+        await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="8ball", description="Ask the magic 8-ball a question")
     @app_commands.describe(question="Your yes/no question")
@@ -114,99 +150,87 @@ class Fun(commands.Cog):
     @app_commands.command(name="trivia", description="Start a trivia game")
     @app_commands.describe(
         category="Trivia category (general, science, history, geography, sports)",
-        difficulty="Difficulty (easy, medium, hard)"
+        difficulty="Difficulty (easy, medium, hard)",
+        rounds="Number of rounds; anyone in the channel can answer (default: 1)"
     )
     async def trivia(
         self, 
         interaction: discord.Interaction, 
         category: Optional[str] = "general",
-        difficulty: Optional[str] = "medium"
+        difficulty: Optional[str] = "medium",
+        rounds: Optional[int] = 1
     ):
         """Start a trivia game"""
+        if rounds < 1 or rounds > 20:
+            await interaction.response.send_message("❌ Rounds must be between 1-20!", ephemeral=True)
+            return
+        
+        if self.bot.games.is_active(interaction.channel.id):
+            await interaction.response.send_message("❌ A game is already running in this channel!", ephemeral=True)
+            return
+        
         await interaction.response.defer()
         
-        # Category mapping for OpenTDB API
-        categories = {
-            'general': 9,
-            'science': 17,
-            'history': 23,
-            'geography': 22,
-            'sports': 21
-        }
+        category, difficulty = category.lower(), difficulty.lower()
+        channel_id = interaction.channel.id
+        first = await self._draw_trivia(channel_id, category, difficulty)
+        if first is None:
+            await interaction.followup.send("❌ No trivia questions available!")
+            return
         
-        category_id = categories.get(category.lower(), 9)
+        drawn = [first]
         
-        try:
-            async with aiohttp.ClientSession() as session:
-                url = f"https://opentdb.com/api.php?amount=1&category={category_id}&difficulty={difficulty.lower()}&type=multiple"
-                
-                async with session.get(url) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        
-                        if data['response_code'] != 0:
-                            await interaction.followup.send("❌ No trivia questions available!")
-                            return
-                        
-                        question_data = data['results'][0]
-                        question = question_data['question']
-                        correct_answer = question_data['correct_answer']
-                        all_answers = question_data['incorrect_answers'] + [correct_answer]
-                        random.shuffle(all_answers)
-                        
-                        # Format with emojis
-                        emojis = ['🅰️', '🅱️', '©️', '🅳']
-                        options = "\n".join([f"{emojis[i]} {ans}" for i, ans in enumerate(all_answers)])
-                        
-                        embed = discord.Embed(
-                            title=f"🎯 Trivia - {category.title()} ({difficulty.title()})",
-                            description=f"**{question}**\n\n{options}",
-                            color=discord.Color.blue()
-                        )
-                        embed.set_footer(text="You have 30 seconds to answer! Type A, B, C, or D")
-                        
-                        await interaction.followup.send(embed=embed)
-                        
-                        # Store correct answer
-                        correct_letter = ['A', 'B', 'C', 'D'][all_answers.index(correct_answer)]
-                        
-                        def check(m):
-                            return (m.author.id == interaction.user.id and 
-                                   m.channel.id == interaction.channel.id and 
-                                   m.content.upper() in ['A', 'B', 'C', 'D'])
-                        
-                        try:
-                            msg = await self.bot.wait_for('message', timeout=30.0, check=check)
-                            
-                            if msg.content.upper() == correct_letter:
-                                embed = discord.Embed(
-                                    title="✅ Correct!",
-                                    description=f"The answer is **{correct_letter}: {correct_answer}**",
-                                    color=discord.Color.green()
-                                )
-                                embed.set_footer(text="🎉 Great job!")
-                            else:
-                                user_answer_idx = ord(msg.content.upper()) - ord('A')
-                                embed = discord.Embed(
-                                    title="❌ Incorrect!",
-                                    description=f"You answered: **{msg.content.upper()}: {all_answers[user_answer_idx]}**\n\nCorrect answer: **{correct_letter}: {correct_answer}**",
-                                    color=discord.Color.red()
-                                )
-                                embed.set_footer(text="Better luck next time!")
-                            
-                            await interaction.channel.send(embed=embed)
-                            
-                        except Exception:
-                            embed = discord.Embed(
-                                title="⏰ Time's Up!",
-                                description=f"The correct answer was **{correct_letter}: {correct_answer}**",
-                                color=discord.Color.orange()
-                            )
-                            await interaction.channel.send(embed=embed)
-                    else:
-                        await interaction.followup.send("❌ Error fetching trivia question!")
-        except Exception as e:
-            await interaction.followup.send(f"❌ Error: {str(e)}")
+        async def draw():
+            return drawn.pop() if drawn else await self._draw_trivia(channel_id, category, difficulty)
+        
+        session = GameSession(interaction.channel, interaction.user.id, draw, rounds=rounds)
+        if not self.bot.games.start(channel_id, session):
+            await interaction.followup.send("❌ A game is already running in this channel!")
+            return
+        
+        players = "first correct answer wins each round" if rounds > 1 else "anyone can answer"
+        await interaction.followup.send(f"🎯 **Trivia** starting: {rounds} round{'s' if rounds > 1 else ''}, {players}!")
+    
+    async def _draw_trivia(self, channel_id: int, category: str, difficulty: str) -> Optional[Round]:
+        """Next multiple-choice round from the local bank, else the prefetched OpenTDB buffer"""
+        question_data = await self.bot.db.next_question(channel_id, category, difficulty)
+        if question_data is None or not question_data['incorrect']:
+            category_id = TRIVIA_CATEGORIES.get(category, 9)
+            raw = await self.trivia_questions.get(f"{category_id}:{difficulty}")
+            question_data = normalize_question(raw) if raw else None
+        
+        if question_data is None:
+            return None
+        
+        options = question_data['incorrect'] + [question_data['answer']]
+        random.shuffle(options)
+        return Round(
+            f"🎯 Trivia - {category.title()} ({difficulty.title()})",
+            question_data['question'],
+            question_data['answer'],
+            options,
+            points=DIFFICULTY_POINTS.get(difficulty, 1)
+        )
+    
+    @app_commands.command(name="stopgame", description="Stop the trivia or quiz game in this channel")
+    async def stop_game(self, interaction: discord.Interaction):
+        """Stop the running game (host or message managers only)"""
+        session = self.bot.games.sessions.get(interaction.channel.id)
+        if session is None:
+            await interaction.response.send_message("❌ No game is running in this channel!", ephemeral=True)
+            return
+        
+        if session.host_id != interaction.user.id and not interaction.channel.permissions_for(interaction.user).manage_messages:
+            await interaction.response.send_message("❌ Only the player who started the game can stop it!", ephemeral=True)
+            return
+        
+        self.bot.games.stop(interaction.channel.id)
+        
+        embed = discord.Embed(title="🛑 Game Stopped", color=discord.Color.red())
+        if session.rounds > 1 and session.scores:
+            embed = session.scoreboard()
+            embed.title = "🛑 Game Stopped • Final Scores"
+        await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="flip", description="Flip a coin")
     async def flip(self, interaction: discord.Interaction):
@@ -224,45 +248,67 @@ class Fun(commands.Cog):
     
     @app_commands.command(name="roll", description="Roll dice")
     @app_commands.describe(
-        dice="Dice notation (e.g., 2d6 for 2 six-sided dice)"
+        dice="Dice notation, e.g. 2d6, 1d20+5, 4d6dl1, 2d20kh1, 6d6!, 3d8+2d6-1",
+        stats="Also show the exact odds of every total"
     )
-    async def roll(self, interaction: discord.Interaction, dice: str):
+    async def roll(self, interaction: discord.Interaction, dice: str, stats: Optional[bool] = False):
         """Roll dice in DnD notation"""
         try:
-            # Parse dice notation (e.g., "2d6", "1d20")
-            parts = dice.lower().split('d')
-            if len(parts) != 2:
-                await interaction.response.send_message("❌ Use format: XdY (e.g., 2d6)", ephemeral=True)
-                return
-            
-            num_dice = int(parts[0])
-            num_sides = int(parts[1])
-            
-            if num_dice < 1 or num_dice > 100:
-                await interaction.response.send_message("❌ Number of dice must be 1-100!", ephemeral=True)
-                return
-            
-            if num_sides < 2 or num_sides > 1000:
-                await interaction.response.send_message("❌ Number of sides must be 2-1000!", ephemeral=True)
-                return
-            
-            rolls = [random.randint(1, num_sides) for _ in range(num_dice)]
-            total = sum(rolls)
-            
-            embed = discord.Embed(
-                title=f"🎲 Rolling {dice}",
-                color=discord.Color.purple()
+            terms = parse_dice(dice)
+            total, results = roll_dice(terms)
+        except DiceError as e:
+            await interaction.response.send_message(
+                f"❌ {e}! Use e.g. 2d6, 1d20+5, 4d6dl1, 2d20kh1 or 6d6!", ephemeral=True
             )
-            
-            if num_dice <= 20:
-                embed.add_field(name="Rolls", value=", ".join(map(str, rolls)), inline=False)
-            
-            embed.add_field(name="Total", value=f"**{total}**", inline=False)
-            
+            return
+        
+        # Embed titles stop at 256 characters
+        shown = dice if len(dice) <= 200 else dice[:199] + '…'
+        embed = discord.Embed(
+            title=f"🎲 Rolling {shown}",
+            color=discord.Color.purple()
+        )
+        
+        dice_results = [result for result in results if result.term.is_dice]
+        if len(dice_results) == 1 and dice_results[0].rolls is not None:
+            embed.add_field(name="Rolls", value=dice_results[0].describe(), inline=False)
+        elif len(results) > 1:
+            breakdown = "\n".join(
+                f"`{str(result.term).lstrip('+')}` → {result.describe()} = **{result.total}**"
+                for result in results
+            )
+            embed.add_field(name="Rolls", value=breakdown[:1024], inline=False)
+        
+        embed.add_field(name="Total", value=f"**{total}**", inline=False)
+        
+        if not stats:
             await interaction.response.send_message(embed=embed)
-            
-        except ValueError:
-            await interaction.response.send_message("❌ Invalid dice format! Use: XdY (e.g., 2d6)", ephemeral=True)
+            return
+        
+        await interaction.response.defer()
+        try:
+            # Convolutions can touch 10^5 outcomes; keep them off the event loop
+            low, probs = await asyncio.to_thread(distribution, terms)
+        except DiceError as e:
+            embed.add_field(name="📊 Stats", value=f"Unavailable: {e}", inline=False)
+        else:
+            summary = summarize(low, probs, total)
+            lowest, highest = total_range(terms)
+            spread = f"Range **{lowest}-{highest}**"
+            if (summary['likely_min'], summary['likely_max']) != (lowest, highest):
+                spread += f" (99% of rolls: **{summary['likely_min']}-{summary['likely_max']}**)"
+            embed.add_field(
+                name="📊 Stats",
+                value=(
+                    f"{spread} • Mean **{summary['mean']:.2f}** "
+                    f"(±{summary['std']:.2f}) • Most likely **{summary['mode']}**\n"
+                    f"Chance of {total} or higher: **{summary['at_least']:.1%}** • "
+                    f"{total} or lower: **{summary['at_most']:.1%}**"
+                ),
+                inline=False
+            )
+            embed.add_field(name="Distribution", value=f"```{histogram(low, probs)}```", inline=False)
+        await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="choose", description="Let the bot choose for you")
     @app_commands.describe(choices="Comma-separated choices")
@@ -1,8 +1,15 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
-import aiohttp
+from discord.ext import commands, tasks
 from config import Config
+from utils.cache import TTLCache
+from utils.deals import create_deal_source, trigram_query
+from utils.presence import NowPlayingIndex, playing_games
+from utils.sessions import SessionTracker
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import asyncio
+import itertools
 import logging
 
 logger = logging.getLogger('MegaBot.Gaming')
@@ -12,6 +19,164 @@ class Gaming(commands.Cog):
     
     def __init__(self, bot):
         self.bot = bot
+        
+        # Steam API caches, one per endpoint so each gets its own TTL
+        self.steam_caches = {
+            'vanity': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_VANITY_TTL, negative_ttl=300),
+            'summary': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_SUMMARY_TTL),
+            'owned_games': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_GAMES_TTL),
+            'recent_games': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_RECENT_TTL),
+            'level': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_LEVEL_TTL),
+            'bans': TTLCache(Config.STEAM_CACHE_SIZE, Config.STEAM_BANS_TTL)
+        }
+    
+        # Live game -> members index, maintained from presence updates
+        self.now_playing = NowPlayingIndex()
+        
+        # Open play sessions keyed by (guild_id, user_id, game), flushed per day
+        self.playtime = SessionTracker()
+        self.flush_playtime.start()
+        
+        # Deal feed that keeps the local price index fresh for /gamedeal
+        self.deal_source = create_deal_source(bot)
+        self.refresh_deals.start()
+        
+        # Role name -> role id per guild, kept current from role events
+        self.role_index = {}  # {guild_id: {role_name: role_id}}
+        self.role_locks = {}  # {(guild_id, role_name): Lock} guarding role creation
+    
+    def metrics(self) -> dict:
+        """Cache hit-rate metrics, served by the web API"""
+        return {
+            'steam_cache': {name: cache.stats() for name, cache in self.steam_caches.items()},
+            'now_playing': self.now_playing.stats(),
+            'playtime_open_sessions': self.playtime.open_sessions
+        }
+    
+    async def cog_load(self):
+        # Reloading the cog on a running bot: build the index right away
+        if self.bot.is_ready():
+            for guild in self.bot.guilds:
+                self._seed_guild(guild)
+    
+    async def cog_unload(self):
+        self.refresh_deals.cancel()
+        self.flush_playtime.cancel()
+        await self._flush_playtime()
+    
+    def _seed_guild(self, guild: discord.Guild):
+        """Index current players and open play sessions for anyone already in game"""
+        self.now_playing.seed_guild(guild)
+        for member in guild.members:
+            if member.bot:
+                continue
+            for game in playing_games(member):
+                self.playtime.open((guild.id, member.id, game))
+    
+    def _apply_games(self, member: discord.Member, before: set, after: set):
+        self.now_playing.update(member.guild.id, member.id, before, after)
+        for game in before - after:
+            self.playtime.close((member.guild.id, member.id, game))
+        for game in after - before:
+            self.playtime.open((member.guild.id, member.id, game))
+    
+    async def _flush_playtime(self):
+        """Write accumulated playtime to the database in one batch"""
+        rows = self.playtime.drain()
+        try:
+            await self.bot.db.add_playtime(rows)
+        except Exception:
+            self.playtime.restore(rows)
+            raise
+    
+    @tasks.loop(seconds=Config.PLAYTIME_FLUSH_SECONDS)
+    async def flush_playtime(self):
+        try:
+            await self._flush_playtime()
+        except Exception as e:
+            logger.error(f"Failed to flush playtime: {e}")
+    
+    @tasks.loop(minutes=Config.DEAL_REFRESH_MINUTES)
+    async def refresh_deals(self):
+        """Pull the deal feed into the local price index"""
+        try:
+            deals = await self.deal_source.fetch()
+            if deals:
+                count = await self.bot.db.ingest_deals(self.deal_source.name, deals)
+                logger.info(f"Indexed {count} deals from {self.deal_source.name}")
+        except Exception as e:
+            logger.error(f"Failed to refresh deals: {e}")
+    
+    @refresh_deals.before_loop
+    async def before_refresh_deals(self):
+        await self.bot.wait_until_ready()
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self._seed_guild(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_join(self, guild):
+        self._seed_guild(guild)
+    
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild):
+        self.now_playing.drop_guild(guild.id)
+        self.role_index.pop(guild.id, None)
+        self.role_locks = {key: lock for key, lock in self.role_locks.items() if key[0] != guild.id}
+    
+    def _role_names(self, guild: discord.Guild) -> dict:
+        """Name -> role id index for a guild, built from the role cache on first use"""
+        names = self.role_index.get(guild.id)
+        if names is None:
+            names = {}
+            for role in guild.roles:
+                names.setdefault(role.name, role.id)
+            self.role_index[guild.id] = names
+        return names
+    
+    def _find_role(self, guild: discord.Guild, name: str) -> Optional[discord.Role]:
+        role_id = self._role_names(guild).get(name)
+        return guild.get_role(role_id) if role_id else None
+    
+    def _unindex_role(self, role: discord.Role, name: str):
+        names = self.role_index.get(role.guild.id)
+        if names is None or names.get(name) != role.id:
+            return
+        del names[name]
+        # Another role may share the name
+        for other in role.guild.roles:
+            if other.name == name and other.id != role.id:
+                names[name] = other.id
+                break
+    
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role):
+        names = self.role_index.get(role.guild.id)
+        if names is not None:
+            names.setdefault(role.name, role.id)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before, after):
+        if before.name != after.name:
+            self._unindex_role(before, before.name)
+            await self.on_guild_role_create(after)
+    
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        self._unindex_role(role, role.name)
+    
+    @commands.Cog.listener()
+    async def on_presence_update(self, before, after):
+        """Keep the now-playing index and play sessions in sync with activity changes"""
+        if after.bot:
+            return
+        self._apply_games(after, playing_games(before), playing_games(after))
+    
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        self._apply_games(member, playing_games(member), set())
     
     @app_commands.command(name="steam", description="View Steam profile information")
     @app_commands.describe(username="Steam username or Steam ID (64-bit Steam ID)")
@@ -43,8 +208,20 @@ class Gaming(commands.Cog):
                     await interaction.followup.send(embed=embed)
                     return
             
-            # Get player summary
-            player_data = await self._get_player_summary(steam_id)
+            # Fetch every profile endpoint at once
+            profile = await self._fetch_profile(steam_id)
+            player_data = profile['summary']
+            games_data = profile['owned_games']
+            
+            if not player_data and 'summary' in profile['timed_out']:
+                embed = discord.Embed(
+                    title=f"{Config.EMOJI_WARNING} Steam Is Slow",
+                    description="Steam didn't respond in time. Please try again in a moment.",
+                    color=Config.COLOR_WARNING
+                )
+                await interaction.followup.send(embed=embed)
+                return
+            
             if not player_data:
                 embed = discord.Embed(
                     title=f"{Config.EMOJI_ERROR} Profile Not Found",
@@ -54,9 +231,6 @@ class Gaming(commands.Cog):
                 await interaction.followup.send(embed=embed)
                 return
             
-            # Get owned games
-            games_data = await self._get_owned_games(steam_id)
-            
             # Create embed
             embed = discord.Embed(
                 title=f"🎮 {player_data.get('personaname', 'Steam User')}",
@@ -90,6 +264,10 @@ class Gaming(commands.Cog):
             if 'loccountrycode' in player_data:
                 embed.add_field(name="Country", value=f":flag_{player_data['loccountrycode'].lower()}:", inline=True)
             
+            # Steam level
+            if profile['level'] is not None:
+                embed.add_field(name="⭐ Steam Level", value=str(profile['level']), inline=True)
+            
             # Games info
             if games_data:
                 game_count = games_data.get('game_count', 0)
@@ -114,6 +292,12 @@ class Gaming(commands.Cog):
                             value="\n".join(games_list),
                             inline=False
                         )
+            elif 'owned_games' in profile['timed_out']:
+                embed.add_field(
+                    name="⏳ Game Library",
+                    value="Steam took too long to answer",
+                    inline=False
+                )
             else:
                 embed.add_field(
                     name="🔒 Game Library",
@@ -121,6 +305,35 @@ class Gaming(commands.Cog):
                     inline=False
                 )
             
+            # Recently played (last two weeks)
+            recent_data = profile['recent_games']
+            if recent_data and recent_data.get('games'):
+                recent_list = []
+                for game in recent_data['games'][:3]:
+                    name = game.get('name', 'Unknown Game')
+                    hours = game.get('playtime_2weeks', 0) / 60
+                    recent_list.append(f"**{name}** - {hours:.1f} hrs")
+                embed.add_field(
+                    name="🕒 Recently Played",
+                    value="\n".join(recent_list),
+                    inline=False
+                )
+            
+            # Bans
+            bans = profile['bans']
+            if bans:
+                if bans.get('VACBanned') or bans.get('NumberOfGameBans') or bans.get('CommunityBanned'):
+                    ban_lines = []
+                    if bans.get('VACBanned'):
+                        ban_lines.append(f"VAC bans: **{bans.get('NumberOfVACBans', 0)}**")
+                    if bans.get('NumberOfGameBans'):
+                        ban_lines.append(f"Game bans: **{bans['NumberOfGameBans']}**")
+                    if bans.get('CommunityBanned'):
+                        ban_lines.append("Community banned")
+                    embed.add_field(name="🚫 Bans", value="\n".join(ban_lines), inline=True)
+                else:
+                    embed.add_field(name="🛡️ Bans", value="Clean record", inline=True)
+            
             # Currently playing
             if 'gameextrainfo' in player_data:
                 embed.add_field(
@@ -136,9 +349,13 @@ class Gaming(commands.Cog):
             }
             if 'communityvisibilitystate' in player_data:
                 visibility = visibility_map.get(player_data['communityvisibilitystate'], "❓ Unknown")
-                embed.set_footer(text=f"Profile: {visibility} • Steam ID: {steam_id}")
+                footer = f"Profile: {visibility} • Steam ID: {steam_id}"
             else:
-                embed.set_footer(text=f"Steam ID: {steam_id}")
+                footer = f"Steam ID: {steam_id}"
+            
+            if profile['timed_out']:
+                footer += f" • Timed out: {', '.join(profile['timed_out'])}"
+            embed.set_footer(text=footer)
             
             await interaction.followup.send(embed=embed)
             
@@ -152,41 +369,104 @@ class Gaming(commands.Cog):
             await interaction.followup.send(embed=embed)
     
     async def _resolve_vanity_url(self, vanity_name: str) -> str:
+        """Convert vanity URL to Steam ID (cached)"""
+        return await self.steam_caches['vanity'].get_or_fetch(
+            vanity_name.lower(),
+            lambda: self._fetch_vanity_url(vanity_name)
+        )
+    
+    async def _get_player_summary(self, steam_id: str) -> dict:
+        """Get player summary (cached)"""
+        return await self.steam_caches['summary'].get_or_fetch(
+            steam_id,
+            lambda: self._fetch_player_summary(steam_id)
+        )
+    
+    async def _get_owned_games(self, steam_id: str) -> dict:
+        """Get owned games (cached)"""
+        return await self.steam_caches['owned_games'].get_or_fetch(
+            steam_id,
+            lambda: self._fetch_owned_games(steam_id)
+        )
+    
+    async def _get_recent_games(self, steam_id: str) -> dict:
+        """Get recently played games (cached)"""
+        return await self.steam_caches['recent_games'].get_or_fetch(
+            steam_id,
+            lambda: self._fetch_recent_games(steam_id)
+        )
+    
+    async def _get_steam_level(self, steam_id: str) -> int:
+        """Get Steam level (cached)"""
+        return await self.steam_caches['level'].get_or_fetch(
+            steam_id,
+            lambda: self._fetch_steam_level(steam_id)
+        )
+    
+    async def _get_player_bans(self, steam_id: str) -> dict:
+        """Get ban status (cached)"""
+        return await self.steam_caches['bans'].get_or_fetch(
+            steam_id,
+            lambda: self._fetch_player_bans(steam_id)
+        )
+    
+    async def _fetch_profile(self, steam_id: str) -> dict:
+        """Fetch every profile endpoint concurrently under one shared deadline"""
+        lookups = {
+            'summary': asyncio.create_task(self._get_player_summary(steam_id)),
+            'owned_games': asyncio.create_task(self._get_owned_games(steam_id)),
+            'recent_games': asyncio.create_task(self._get_recent_games(steam_id)),
+            'level': asyncio.create_task(self._get_steam_level(steam_id)),
+            'bans': asyncio.create_task(self._get_player_bans(steam_id))
+        }
+        done, pending = await asyncio.wait(lookups.values(), timeout=Config.STEAM_PROFILE_DEADLINE)
+        for task in pending:
+            # Only our wait is cancelled; the shielded fetch still fills the cache
+            task.cancel()
+        
+        profile = {'timed_out': []}
+        for name, task in lookups.items():
+            profile[name] = None
+            if task in pending:
+                profile['timed_out'].append(name)
+            elif task.exception() is not None:
+                logger.warning(f"Steam {name} lookup failed for {steam_id}: {task.exception()}")
+            else:
+                profile[name] = task.result()
+        return profile
+    
+    async def _fetch_vanity_url(self, vanity_name: str) -> str:
         """Convert vanity URL to Steam ID"""
-        url = f"https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/"
+        url = "https://api.steampowered.com/ISteamUser/ResolveVanityURL/v1/"
         params = {
             'key': Config.STEAM_API_KEY,
             'vanityurl': vanity_name
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('response', {}).get('success') == 1:
-                        return data['response']['steamid']
+        # Steam calls are never hedged: a duplicate request still counts against the key's quota
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data and data.get('response', {}).get('success') == 1:
+            return data['response']['steamid']
         return None
     
-    async def _get_player_summary(self, steam_id: str) -> dict:
+    async def _fetch_player_summary(self, steam_id: str) -> dict:
         """Get player summary from Steam API"""
-        url = f"https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/"
+        url = "https://api.steampowered.com/ISteamUser/GetPlayerSummaries/v2/"
         params = {
             'key': Config.STEAM_API_KEY,
             'steamids': steam_id
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    players = data.get('response', {}).get('players', [])
-                    if players:
-                        return players[0]
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data:
+            players = data.get('response', {}).get('players', [])
+            if players:
+                return players[0]
         return None
     
-    async def _get_owned_games(self, steam_id: str) -> dict:
+    async def _fetch_owned_games(self, steam_id: str) -> dict:
         """Get owned games from Steam API"""
-        url = f"https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/"
+        url = "https://api.steampowered.com/IPlayerService/GetOwnedGames/v1/"
         params = {
             'key': Config.STEAM_API_KEY,
             'steamid': steam_id,
@@ -194,30 +474,60 @@ class Gaming(commands.Cog):
             'include_played_free_games': 1
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return data.get('response', {})
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data:
+            return data.get('response', {})
+        return None
+    
+    async def _fetch_recent_games(self, steam_id: str) -> dict:
+        """Get games played in the last two weeks from Steam API"""
+        url = "https://api.steampowered.com/IPlayerService/GetRecentlyPlayedGames/v1/"
+        params = {
+            'key': Config.STEAM_API_KEY,
+            'steamid': steam_id,
+            'count': 3
+        }
+        
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data:
+            return data.get('response', {})
+        return None
+    
+    async def _fetch_steam_level(self, steam_id: str) -> int:
+        """Get Steam level from Steam API"""
+        url = "https://api.steampowered.com/IPlayerService/GetSteamLevel/v1/"
+        params = {
+            'key': Config.STEAM_API_KEY,
+            'steamid': steam_id
+        }
+        
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data:
+            return data.get('response', {}).get('player_level')
+        return None
+    
+    async def _fetch_player_bans(self, steam_id: str) -> dict:
+        """Get VAC/game ban status from Steam API"""
+        url = "https://api.steampowered.com/ISteamUser/GetPlayerBans/v1/"
+        params = {
+            'key': Config.STEAM_API_KEY,
+            'steamids': steam_id
+        }
+        
+        data = await self.bot.http_client.get_json(url, params=params)
+        if data:
+            players = data.get('players', [])
+            if players:
+                return players[0]
         return None
     
     @app_commands.command(name="playing", description="See what server members are currently playing")
     async def currently_playing(self, interaction: discord.Interaction):
         """Show what games server members are playing"""
-        await interaction.response.defer()
+        guild = interaction.guild
+        top_games = self.now_playing.top(guild.id, limit=10)
         
-        # Get members currently playing games
-        playing_members = []
-        for member in interaction.guild.members:
-            if member.bot:
-                continue
-            for activity in member.activities:
-                if isinstance(activity, discord.Game):
-                    playing_members.append((member, activity.name))
-                elif isinstance(activity, discord.Activity) and activity.type == discord.ActivityType.playing:
-                    playing_members.append((member, activity.name))
-        
-        if not playing_members:
+        if not top_games:
             embed = discord.Embed(
                 title=f"{Config.EMOJI_GAME} Currently Playing",
                 description="No one is playing any games right now!",
@@ -226,26 +536,154 @@ class Gaming(commands.Cog):
         else:
             embed = discord.Embed(
                 title=f"{Config.EMOJI_GAME} Currently Playing",
-                description=f"{len(playing_members)} member(s) gaming right now!",
+                description=f"{self.now_playing.player_count(guild.id)} member(s) gaming right now!",
                 color=Config.COLOR_PRIMARY
             )
             
-            # Group by game
-            games_dict = {}
-            for member, game in playing_members:
-                if game not in games_dict:
-                    games_dict[game] = []
-                games_dict[game].append(member.display_name)
-            
-            for game, players in list(games_dict.items())[:10]:  # Limit to 10 games
-                players_str = ", ".join(players[:5])
-                if len(players) > 5:
-                    players_str += f" and {len(players) - 5} more"
-                embed.add_field(name=game, value=players_str, inline=False)
+            for game, member_ids in top_games:
+                embed.add_field(
+                    name=f"{game} ({len(member_ids)})",
+                    value=self._format_players(guild, member_ids),
+                    inline=False
+                )
         
         embed.set_footer(text="MegaBot Gaming")
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="whoplays", description="See who is playing a specific game right now")
+    @app_commands.describe(game="Game name")
+    async def who_plays(self, interaction: discord.Interaction, game: str):
+        """List members currently playing a game"""
+        guild = interaction.guild
+        match = self.now_playing.players(guild.id, game)
+        if match is None:
+            # Fall back to the closest partial match
+            suggestions = self.now_playing.search(guild.id, game, limit=1)
+            if suggestions:
+                match = self.now_playing.players(guild.id, suggestions[0])
+        
+        if match is None:
+            embed = discord.Embed(
+                title=f"{Config.EMOJI_GAME} {game}",
+                description="No one is playing this right now!",
+                color=Config.COLOR_INFO
+            )
+        else:
+            name, member_ids = match
+            embed = discord.Embed(
+                title=f"{Config.EMOJI_GAME} {name}",
+                description=f"**{len(member_ids)}** member(s) playing right now",
+                color=Config.COLOR_PRIMARY
+            )
+            embed.add_field(name="Players", value=self._format_players(guild, member_ids, limit=20), inline=False)
+        
+        embed.set_footer(text="MegaBot Gaming")
+        await interaction.response.send_message(embed=embed)
+    
+    @who_plays.autocomplete('game')
+    async def who_plays_autocomplete(self, interaction: discord.Interaction, current: str):
+        games = self.now_playing.search(interaction.guild.id, current, limit=25)
+        return [app_commands.Choice(name=game[:100], value=game[:100]) for game in games]
+    
+    def _format_players(self, guild: discord.Guild, member_ids: set, limit: int = 5) -> str:
+        """Display names for up to limit members, plus a remainder count"""
+        names = []
+        for member_id in itertools.islice(member_ids, limit):
+            member = guild.get_member(member_id)
+            if member:
+                names.append(member.display_name)
+        
+        text = ", ".join(names) or "Unknown members"
+        if len(member_ids) > limit:
+            text += f" and {len(member_ids) - limit} more"
+        return text
+    
+    @app_commands.command(name="toptime", description="See who has played the most")
+    @app_commands.describe(period="Time period to rank")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="This week", value="week"),
+        app_commands.Choice(name="This month", value="month"),
+        app_commands.Choice(name="All time", value="all"),
+    ])
+    async def top_time(self, interaction: discord.Interaction, period: Optional[str] = "week"):
+        """Playtime leaderboard for the server"""
+        await interaction.response.defer()
+        
+        since = self._period_start(period)
+        leaderboard = await self.bot.db.get_top_playtime(interaction.guild.id, since, limit=10)
+        
+        if not leaderboard:
+            await interaction.followup.send(f"{Config.EMOJI_ERROR} No playtime recorded yet!")
+            return
+        
+        medals = ["🥇", "🥈", "🥉"]
+        lines = []
+        for i, (user_id, seconds) in enumerate(leaderboard):
+            member = interaction.guild.get_member(user_id)
+            name = member.display_name if member else f"User {user_id}"
+            rank = medals[i] if i < 3 else f"#{i + 1}"
+            lines.append(f"{rank} **{name}** - {self._format_duration(seconds)}")
+        
+        embed = discord.Embed(
+            title=f"{Config.EMOJI_TROPHY} Top Gamers ({self._period_label(period)})",
+            description="\n".join(lines),
+            color=Config.COLOR_PRIMARY
+        )
+        embed.set_footer(text="MegaBot Gaming • Tracked from Discord activity")
         await interaction.followup.send(embed=embed)
     
+    @app_commands.command(name="mygames", description="See your most played games")
+    @app_commands.describe(member="Member to look up (defaults to you)", period="Time period")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="This week", value="week"),
+        app_commands.Choice(name="This month", value="month"),
+        app_commands.Choice(name="All time", value="all"),
+    ])
+    async def my_games(
+        self,
+        interaction: discord.Interaction,
+        member: Optional[discord.Member] = None,
+        period: Optional[str] = "all"
+    ):
+        """Per-game playtime for a member"""
+        await interaction.response.defer()
+        
+        member = member or interaction.user
+        since = self._period_start(period)
+        games = await self.bot.db.get_user_playtime(interaction.guild.id, member.id, since, limit=10)
+        
+        if not games:
+            await interaction.followup.send(f"{Config.EMOJI_ERROR} No playtime recorded for {member.display_name} yet!")
+            return
+        
+        total = sum(seconds for _, seconds in games)
+        embed = discord.Embed(
+            title=f"{Config.EMOJI_GAME} {member.display_name}'s Games ({self._period_label(period)})",
+            description="\n".join(f"**{game}** - {self._format_duration(seconds)}" for game, seconds in games),
+            color=Config.COLOR_PRIMARY
+        )
+        embed.add_field(name="⏱️ Total (top 10)", value=self._format_duration(total), inline=False)
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.set_footer(text="MegaBot Gaming • Tracked from Discord activity")
+        await interaction.followup.send(embed=embed)
+    
+    def _period_start(self, period: str) -> Optional[str]:
+        """First day (YYYY-MM-DD) of a leaderboard period, or None for all time"""
+        today = datetime.utcnow().date()
+        if period == "week":
+            return (today - timedelta(days=today.weekday())).isoformat()
+        if period == "month":
+            return today.replace(day=1).isoformat()
+        return None
+    
+    def _period_label(self, period: str) -> str:
+        return {"week": "This Week", "month": "This Month"}.get(period, "All Time")
+    
+    def _format_duration(self, seconds: int) -> str:
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes = remainder // 60
+        return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+    
     @app_commands.command(name="lfg", description="Looking for group - find teammates")
     @app_commands.describe(game="Game you want to play", players="Number of players needed")
     async def looking_for_group(self, interaction: discord.Interaction, game: str, players: int = 1):
@@ -276,17 +714,42 @@ class Gaming(commands.Cog):
         """Search for game deals"""
         await interaction.response.defer()
         
+        # Served from the local index; typos still match through trigram search
+        deals = await self.bot.db.search_deals(trigram_query(game), game.strip(), limit=5)
+        
+        if not deals:
+            info = await self.bot.db.get_deal_index_info()
+            if not info['count']:
+                description = "The deal index is still loading. Try again in a few minutes!"
+            else:
+                description = f"No current deals found for **{game}**."
+            
+            await interaction.followup.send(
+                embed=discord.Embed(
+                    title=f"{Config.EMOJI_MONEY} Game Deals: {game}",
+                    description=description,
+                    color=Config.COLOR_WARNING
+                )
+            )
+            return
+        
         embed = discord.Embed(
             title=f"{Config.EMOJI_MONEY} Game Deals: {game}",
-            description="Checking for the best deals...",
             color=Config.COLOR_PRIMARY
         )
-        embed.add_field(
-            name="💡 Feature Coming Soon",
-            value="This will show:\n• Current prices\n• Discounts\n• Best deals\n• Multiple store comparison",
-            inline=False
-        )
-        embed.set_footer(text="MegaBot Gaming Deals")
+        for deal in deals:
+            price = "FREE" if deal['price'] == 0 else f"${deal['price']:.2f}"
+            value = f"**{price}** at {deal['store']}"
+            if deal['savings'] > 0:
+                value += f" ~~${deal['regular_price']:.2f}~~ (-{deal['savings']:.0f}%)"
+            if deal['url']:
+                value += f"\n[View Deal]({deal['url']})"
+            embed.add_field(name=deal['title'], value=value, inline=False)
+        
+        info = await self.bot.db.get_deal_index_info()
+        if info['updated_at']:
+            embed.timestamp = info['updated_at'].replace(tzinfo=timezone.utc)
+        embed.set_footer(text="MegaBot Gaming Deals • Prices updated")
         
         await interaction.followup.send(embed=embed)
     
@@ -304,38 +767,45 @@ class Gaming(commands.Cog):
     ])
     async def game_role(self, interaction: discord.Interaction, game: str):
         """Assign or remove a game role"""
+        await interaction.response.defer(ephemeral=True)
         
+        guild = interaction.guild
         role_name = f"🎮 {game.upper()}"
-        role = discord.utils.get(interaction.guild.roles, name=role_name)
+        role = self._find_role(guild, role_name)
         
         if not role:
-            # Create role if it doesn't exist
-            try:
-                role = await interaction.guild.create_role(
-                    name=role_name,
-                    color=discord.Color.blue(),
-                    mentionable=True
-                )
-            except discord.Forbidden:
-                await interaction.response.send_message(
-                    f"{Config.EMOJI_ERROR} I don't have permission to create roles!",
-                    ephemeral=True
-                )
-                return
+            # One creator per role; concurrent requests wait and reuse it
+            lock = self.role_locks.setdefault((guild.id, role_name), asyncio.Lock())
+            async with lock:
+                role = self._find_role(guild, role_name)
+                if not role:
+                    try:
+                        role = await guild.create_role(
+                            name=role_name,
+                            color=discord.Color.blue(),
+                            mentionable=True
+                        )
+                    except discord.Forbidden:
+                        await interaction.followup.send(
+                            f"{Config.EMOJI_ERROR} I don't have permission to create roles!",
+                            ephemeral=True
+                        )
+                        return
+                    # Index now rather than waiting for the role create event
+                    self._role_names(guild).setdefault(role.name, role.id)
         
         # Toggle role
-        if role in interaction.user.roles:
-            await interaction.user.remove_roles(role)
-            await interaction.response.send_message(
-                f"{Config.EMOJI_SUCCESS} Removed {role.mention} role!",
-                ephemeral=True
-            )
-        else:
-            await interaction.user.add_roles(role)
-            await interaction.response.send_message(
-                f"{Config.EMOJI_SUCCESS} Added {role.mention} role!",
-                ephemeral=True
-            )
+        try:
+            if role in interaction.user.roles:
+                await interaction.user.remove_roles(role)
+                message = f"{Config.EMOJI_SUCCESS} Removed {role.mention} role!"
+            else:
+                await interaction.user.add_roles(role)
+                message = f"{Config.EMOJI_SUCCESS} Added {role.mention} role!"
+        except discord.Forbidden:
+            message = f"{Config.EMOJI_ERROR} I don't have permission to manage that role!"
+        
+        await interaction.followup.send(message, ephemeral=True)
 
 async def setup(bot):
     await bot.add_cog(Gaming(bot))
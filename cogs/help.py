@@ -69,9 +69,12 @@ class Help(commands.Cog):
                     "commands": [
                         "/playing - Set what game you're playing",
                         "/lfg - Create a looking-for-group post",
-                        "/gamedeal - Search for game deals",
+                        "/gamedeal - Search game deals (typos OK)",
                         "/gamerole - Get a role for a specific game",
-                        "/currentgames - See who's playing what"
+                        "/currentgames - See who's playing what",
+                        "/whoplays - See who is playing a specific game",
+                        "/toptime - Playtime leaderboard",
+                        "/mygames - Your most played games"
                     ]
                 },
                 "tournament": {
@@ -82,7 +85,9 @@ class Help(commands.Cog):
                         "/tournamentbracket - View tournament bracket",
                         "/reportmatch - Report a match result",
                         "/tournamentinfo - View tournament details",
-                        "/tournaments - List all active tournaments"
+                        "/tournaments - List all active tournaments",
+                        "/rating - View a member's ratings",
+                        "/ratings - Top rated players in a game"
                     ]
                 },
                 "economy": {
@@ -106,10 +111,10 @@ class Help(commands.Cog):
                 "utility": {
                     "title": "🔧 Utility Commands",
                     "commands": [
-                        "/poll - Create a poll",
+                        "/poll - Create a button poll (single or multiple choice, optional duration)",
                         "/remind - Set a reminder",
                         "/translate - Translate text",
-                        "/calculate - Calculate math expressions",
+                        "/calculate - Calculate math (functions, variables, unit conversion)",
                         "/userinfo - Get info about a user",
                         "/serverinfo - Get server information",
                         "/avatar - View user's avatar",
@@ -120,11 +125,14 @@ class Help(commands.Cog):
                 "study": {
                     "title": "📚 Study Commands",
                     "commands": [
-                        "/studytimer - Start a study timer",
+                        "/pomodoro - Start a Pomodoro timer (repeating cycles, join with /joinpomodoro)",
                         "/note - Create a study note",
                         "/mynotes - View your notes",
-                        "/flashcard - Create a flashcard",
-                        "/quiz - Take a quiz from flashcards",
+                        "/flashcard - Add a card to a deck (/importdeck for CSV)",
+                        "/review - Review due flashcards (spaced repetition)",
+                        "/studytime - Voice study time (/studyleaderboard for the week)",
+                        "/quiz - Take a quiz from the question bank",
+                        "/importquestions - Import a question pack (Admin)",
                         "/studygroup - Create a study group",
                         "/resource - Share a study resource",
                         "/studystats - View your study statistics"
@@ -153,9 +161,10 @@ class Help(commands.Cog):
                         "/joke - Get a random joke",
                         "/meme - Get a random meme",
                         "/8ball - Ask the magic 8ball",
-                        "/trivia - Play trivia game",
+                        "/trivia - Play trivia (multi-round, anyone can answer)",
+                        "/stopgame - Stop the game in this channel",
                         "/wouldyourather - Would you rather game",
-                        "/roll - Roll dice",
+                        "/roll - Roll dice (2d20kh1+5, 4d6dl1, 6d6!, odds with stats)",
                         "/flip - Flip a coin",
                         "/rps - Rock paper scissors",
                         "/rate - Rate something out of 10",
@@ -168,7 +177,10 @@ class Help(commands.Cog):
                         "/stats - View your stats",
                         "/serverstats - View server statistics",
                         "/topusers - View most active users",
-                        "/activity - View server activity graph",
+                        "/activitychart - View server activity graph",
+                        "/economychart - View richest members graph",
+                        "/backfillstats - Import channel history into stats (admin)",
+                        "/backfillstatus - View history import progress",
                         "/usergrowth - View user growth statistics",
                         "/commandstats - View command usage stats"
                     ]
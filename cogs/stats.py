@@ -5,16 +5,64 @@ Provides server statistics and analytics
 
 import discord
 from discord import app_commands
-from discord.ext import commands
-from datetime import datetime, timedelta
+from discord.ext import commands, tasks
+from datetime import datetime, timedelta, timezone
 from collections import Counter
 from typing import Optional
+import asyncio
+import io
+import logging
+from config import Config
+from utils.charts import ChartRenderer, render_activity_chart, render_economy_chart
+
+logger = logging.getLogger('MegaBot.Stats')
 
 class Stats(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
         self.message_counts = {}  # {guild_id: {user_id: count}}
-        
+        self.pending_activity = Counter()  # {(guild_id, channel_id, user_id, hour): count}
+        self.pending_first_messages = {}  # {channel_id: (guild_id, message_id)} earliest per flush
+        self.charts = ChartRenderer(max_workers=Config.CHART_WORKERS, cache_ttl=Config.CHART_CACHE_TTL)
+        self.charts.warm_up()
+        self.backfill_tasks = {}  # {channel_id: asyncio.Task}
+        self.backfill_limiter = asyncio.Semaphore(Config.BACKFILL_CONCURRENCY)
+        self.flush_activity.start()
+        
+    async def cog_load(self):
+        asyncio.create_task(self._resume_backfills())
+    
+    async def cog_unload(self):
+        self.flush_activity.cancel()
+        for task in self.backfill_tasks.values():
+            task.cancel()
+        await self._flush_activity()
+        self.charts.shutdown()
+    
+    async def _flush_activity(self):
+        """Write buffered message counts to the database"""
+        if not self.pending_activity:
+            return
+        pending, self.pending_activity = self.pending_activity, Counter()
+        first_messages, self.pending_first_messages = self.pending_first_messages, {}
+        try:
+            await self.bot.db.add_message_activity(
+                [(*key, count) for key, count in pending.items()],
+                [(guild_id, channel_id, message_id) for channel_id, (guild_id, message_id) in first_messages.items()]
+            )
+        except Exception:
+            self.pending_activity.update(pending)  # Keep the counts for the next flush
+            self.pending_first_messages.update(first_messages)  # These are older than any since
+            raise
+    
+    @tasks.loop(seconds=60)
+    async def flush_activity(self):
+        """Periodically persist message activity in one batch"""
+        try:
+            await self._flush_activity()
+        except Exception as e:
+            logger.error(f"Failed to flush message activity: {e}")
+    
     @commands.Cog.listener()
     async def on_message(self, message):
         """Track message statistics"""
@@ -31,6 +79,66 @@ class Stats(commands.Cog):
             self.message_counts[guild_id][user_id] = 0
         
         self.message_counts[guild_id][user_id] += 1
+        
+        hour = message.created_at.strftime("%Y-%m-%d %H:00")
+        self.pending_activity[(guild_id, message.channel.id, user_id, hour)] += 1
+        self.pending_first_messages.setdefault(message.channel.id, (guild_id, message.id))
+    
+    async def _resume_backfills(self):
+        """Restart backfill jobs that were interrupted by a restart"""
+        await self.bot.wait_until_ready()
+        for job in await self.bot.db.get_backfills(status='running'):
+            channel = self.bot.get_channel(job['channel_id'])
+            if channel is None:
+                continue
+            logger.info(f"Resuming history backfill for #{channel.name} ({channel.id})")
+            self._start_backfill_task(channel, job['before_id'])
+    
+    def _start_backfill_task(self, channel: discord.TextChannel, before_id: int):
+        task = asyncio.create_task(self._run_backfill(channel, before_id))
+        self.backfill_tasks[channel.id] = task
+        task.add_done_callback(lambda _: self.backfill_tasks.pop(channel.id, None))
+    
+    async def _run_backfill(self, channel: discord.TextChannel, before_id: int):
+        """Walk a channel's history backwards in chunks, checkpointing after each one"""
+        async with self.backfill_limiter:
+            try:
+                while True:
+                    counts = Counter()
+                    scanned = 0
+                    async for message in channel.history(
+                        limit=Config.BACKFILL_CHUNK_SIZE,
+                        before=discord.Object(id=before_id)
+                    ):
+                        scanned += 1
+                        before_id = message.id
+                        if message.author.bot:
+                            continue
+                        hour = message.created_at.strftime("%Y-%m-%d %H:00")
+                        counts[(channel.guild.id, channel.id, message.author.id, hour)] += 1
+                    
+                    finished = scanned < Config.BACKFILL_CHUNK_SIZE
+                    await self.bot.db.save_backfill_chunk(
+                        channel.id,
+                        [(*key, count) for key, count in counts.items()],
+                        before_id,
+                        scanned,
+                        'completed' if finished else 'running'
+                    )
+                    
+                    if finished:
+                        logger.info(f"History backfill finished for #{channel.name} ({channel.id})")
+                        return
+                    
+                    await asyncio.sleep(Config.BACKFILL_DELAY)
+            except asyncio.CancelledError:
+                raise
+            except discord.Forbidden:
+                logger.warning(f"No permission to read history in #{channel.name} ({channel.id})")
+                await self.bot.db.set_backfill_status(channel.id, 'failed')
+            except Exception as e:
+                # Leave the job as 'running' so it resumes from the last checkpoint
+                logger.error(f"History backfill for #{channel.name} ({channel.id}) stopped: {e}")
     
     @app_commands.command(name="serverstats", description="View server statistics")
     async def serverstats(self, interaction: discord.Interaction):
@@ -162,8 +270,115 @@ class Stats(commands.Cog):
             inline=False
         )
         
+        # Tracked activity (live counts plus any imported history)
+        activity = await self.bot.db.get_channel_activity(interaction.guild.id, channel.id)
+        if activity['total']:
+            lines = [f"Total: **{activity['total']:,}** messages"]
+            for user_id, count in activity['top_users']:
+                member = interaction.guild.get_member(user_id)
+                name = member.display_name if member else f"User {user_id}"
+                lines.append(f"{name}: **{count:,}**")
+            
+            backfill = await self.bot.db.get_backfill(channel.id)
+            if backfill and backfill['status'] == 'completed':
+                lines.append("*Full history imported*")
+            elif backfill and backfill['status'] == 'running':
+                lines.append("*History import in progress*")
+            
+            embed.add_field(name="📨 Message Activity", value="\n".join(lines), inline=False)
+        
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="backfillstats", description="Import channel message history into the stats")
+    @app_commands.describe(channel="Channel to import (defaults to every readable text channel)")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def backfillstats(
+        self,
+        interaction: discord.Interaction,
+        channel: Optional[discord.TextChannel] = None
+    ):
+        """Start resumable history backfill jobs"""
+        await interaction.response.defer(ephemeral=True)
+        
+        guild = interaction.guild
+        if channel:
+            channels = [channel]
+        else:
+            channels = [c for c in guild.text_channels if c.permissions_for(guild.me).read_message_history]
+        
+        # Live counts must be on disk before picking each job's starting point
+        await self._flush_activity()
+        
+        started, skipped = [], []
+        for target in channels:
+            if target.id in self.backfill_tasks:
+                skipped.append(f"{target.mention} (already running)")
+                continue
+            
+            job = await self.bot.db.get_backfill(target.id)
+            if job and job['status'] == 'completed':
+                skipped.append(f"{target.mention} (already imported)")
+                continue
+            
+            replace_hour = None
+            if job:
+                before_id = job['before_id']
+            else:
+                # Only import what live tracking hasn't already counted
+                before_id = await self.bot.db.get_first_tracked_message(target.id)
+                if before_id is None:
+                    first_hour = await self.bot.db.get_first_activity_hour(guild.id, target.id)
+                    start = datetime.utcnow()
+                    if first_hour:
+                        # Counted before first messages were recorded: re-import that whole hour
+                        replace_hour = first_hour
+                        start = min(start, datetime.strptime(first_hour, "%Y-%m-%d %H:%M") + timedelta(hours=1))
+                    before_id = discord.utils.time_snowflake(start.replace(tzinfo=timezone.utc))
+            
+            await self.bot.db.start_backfill(guild.id, target.id, before_id, replace_hour)
+            self._start_backfill_task(target, before_id)
+            started.append(target.mention)
+        
+        embed = discord.Embed(
+            title="📥 History Backfill",
+            color=discord.Color.blue()
+        )
+        if started:
+            embed.add_field(name="▶️ Started", value=", ".join(started)[:1024], inline=False)
+        if skipped:
+            embed.add_field(name="⏭️ Skipped", value="\n".join(skipped)[:1024], inline=False)
+        embed.set_footer(text="Use /backfillstatus to check progress")
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="backfillstatus", description="View history import progress")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def backfillstatus(self, interaction: discord.Interaction):
+        """Show backfill progress for this server"""
+        jobs = await self.bot.db.get_backfills(guild_id=interaction.guild.id)
+        
+        if not jobs:
+            await interaction.response.send_message("❌ No history imports yet! Use `/backfillstats`.", ephemeral=True)
+            return
+        
+        status_emoji = {'running': '🔄', 'completed': '✅', 'failed': '❌'}
+        lines = []
+        for job in sorted(jobs, key=lambda j: j['messages'], reverse=True)[:20]:
+            channel = interaction.guild.get_channel(job['channel_id'])
+            name = channel.mention if channel else f"#{job['channel_id']}"
+            scanned_to = discord.utils.snowflake_time(job['before_id']).strftime("%Y-%m-%d")
+            lines.append(
+                f"{status_emoji.get(job['status'], '❓')} {name} - **{job['messages']:,}** messages (back to {scanned_to})"
+            )
+        
+        embed = discord.Embed(
+            title="📥 History Backfill Status",
+            description="\n".join(lines),
+            color=discord.Color.blue()
+        )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @app_commands.command(name="roleinfo", description="View role information")
     @app_commands.describe(role="Role to view info about")
     async def roleinfo(self, interaction: discord.Interaction, role: discord.Role):
@@ -336,5 +551,83 @@ class Stats(commands.Cog):
         
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="activitychart", description="Graph daily message activity")
+    @app_commands.describe(
+        days="Number of days to show (7-90, default 14)",
+        member="Only count messages from this member"
+    )
+    async def activitychart(
+        self,
+        interaction: discord.Interaction,
+        days: Optional[int] = 14,
+        member: Optional[discord.Member] = None
+    ):
+        """Render a message activity graph for the server or a member"""
+        if days < 7 or days > 90:
+            await interaction.response.send_message("❌ Days must be between 7 and 90!", ephemeral=True)
+            return
+        
+        await interaction.response.defer()
+        
+        guild = interaction.guild
+        end = datetime.utcnow().date()
+        start = end - timedelta(days=days - 1)
+        user_id = member.id if member else None
+        
+        cache_key = ('activity', guild.id, user_id, days, end.isoformat())
+        image = self.charts.cache.get(cache_key)
+        if image is None:
+            await self._flush_activity()
+            points = await self.bot.db.get_daily_activity(guild.id, f"{start.isoformat()} 00:00", user_id)
+            if not points:
+                await interaction.followup.send("❌ No message data available yet!")
+                return
+            
+            title = f"Messages per day - {member.display_name if member else guild.name}"
+            image = await self.charts.render(
+                cache_key, render_activity_chart, title, start.isoformat(), end.isoformat(), points
+            )
+        
+        embed = discord.Embed(
+            title="📈 Activity Chart",
+            description=f"Last **{days}** days",
+            color=discord.Color.blue()
+        )
+        embed.set_image(url="attachment://activity.png")
+        
+        await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(image), filename="activity.png"))
+    
+    @app_commands.command(name="economychart", description="Graph the richest members")
+    async def economychart(self, interaction: discord.Interaction):
+        """Render a net worth chart from the economy leaderboard"""
+        await interaction.response.defer()
+        
+        guild = interaction.guild
+        cache_key = ('economy', guild.id)
+        image = self.charts.cache.get(cache_key)
+        if image is None:
+            leaderboard = await self.bot.db.get_leaderboard(10, guild.id)
+            if not leaderboard:
+                await interaction.followup.send("❌ No economy data available yet!")
+                return
+            
+            names = []
+            for user_id, _ in leaderboard:
+                member = guild.get_member(user_id)
+                names.append(member.display_name if member else f"User {user_id}")
+            totals = [total for _, total in leaderboard]
+            
+            image = await self.charts.render(
+                cache_key, render_economy_chart, f"Richest members - {guild.name}", names, totals
+            )
+        
+        embed = discord.Embed(
+            title=f"{Config.EMOJI_MONEY} Economy Chart",
+            color=discord.Color.gold()
+        )
+        embed.set_image(url="attachment://economy.png")
+        
+        await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(image), filename="economy.png"))
+
 async def setup(bot):
     await bot.add_cog(Stats(bot))
@@ -5,28 +5,121 @@ Provides study tools like Pomodoro timers, homework tracking, quizzes, etc.
 
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta, timezone
 from typing import Optional, List
 import random
+import csv
+import logging
+from config import Config
+from utils.games import DIFFICULTY_POINTS, GameSession, Round
+from utils.questions import DIFFICULTIES, parse_question_pack
+from utils.sessions import SessionTracker
+from utils.srs import MAX_FIELD_LENGTH, ReviewView, format_due, next_due, parse_deck_csv, sm2
+from utils.timers import to_timestamp
+
+logger = logging.getLogger('MegaBot.Study')
+
+# Built-in questions, seeded into the question bank on startup
+BUILTIN_QUIZZES = {
+    'math': {
+        'easy': [
+            ('What is 5 + 7?', '12'),
+            ('What is 3 × 4?', '12'),
+            ('What is 20 ÷ 4?', '5'),
+        ],
+        'medium': [
+            ('What is 15% of 200?', '30'),
+            ('What is the square root of 144?', '12'),
+            ('What is 8²?', '64'),
+        ],
+        'hard': [
+            ('What is the derivative of x²?', '2x'),
+            ('What is π rounded to 2 decimals?', '3.14'),
+            ('What is the integral of 1/x?', 'ln(x)'),
+        ]
+    },
+    'science': {
+        'easy': [
+            ('What planet is closest to the sun?', 'Mercury'),
+            ('What is H2O?', 'Water'),
+            ('How many legs does a spider have?', '8'),
+        ],
+        'medium': [
+            ('What is the powerhouse of the cell?', 'Mitochondria'),
+            ('What is the chemical symbol for gold?', 'Au'),
+            ('What is the speed of light in km/s?', '300000'),
+        ],
+        'hard': [
+            ('What is the atomic number of Carbon?', '6'),
+            ('What is Newton\'s second law? (F=?)', 'ma'),
+            ('What is the study of fungi called?', 'Mycology'),
+        ]
+    }
+}
 
 class Study(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.homework = {}  # {user_id: [assignments]}
-        self.pomodoro_sessions = {}  # {user_id: session_data}
+        self.pomodoros = {}  # {session_id: session}, mirrored in the database
+        self.pomodoro_members = {}  # {user_id: session_id}
         
+        # Voice study sessions keyed by (guild_id, user_id), flushed per day
+        self.study_channels = {}  # {guild_id: {channel_id}}
+        self.study_time = SessionTracker()
+    
+    async def cog_load(self):
+        # Seed the question bank with the built-in quizzes (existing questions are skipped)
+        questions = [
+            {'category': subject, 'difficulty': difficulty, 'question': question, 'answer': answer, 'incorrect': []}
+            for subject, levels in BUILTIN_QUIZZES.items()
+            for difficulty, pairs in levels.items()
+            for question, answer in pairs
+        ]
+        await self.bot.db.import_questions('builtin', questions)
+        
+        # Resume Pomodoro sessions; phases that ended while offline fire right away
+        for session in await self.bot.db.get_active_pomodoros():
+            self._track_pomodoro(session)
+        
+        self.homework_digest.start()
+        
+        for guild_id, channel_id in await self.bot.db.get_study_channels():
+            self.study_channels.setdefault(guild_id, set()).add(channel_id)
+        if self.bot.is_ready():
+            for guild in self.bot.guilds:
+                self._seed_study_sessions(guild)
+        self.flush_study_time.start()
+    
+    async def cog_unload(self):
+        self.homework_digest.cancel()
+        self.flush_study_time.cancel()
+        await self._flush_study_time()
+        for session_id in self.pomodoros:
+            self.bot.timers.cancel(('pomodoro', session_id))
+    
+    def metrics(self) -> dict:
+        """Pomodoro timer metrics, served by the web API"""
+        return {
+            'pomodoro': {'active_sessions': len(self.pomodoros), **self.bot.timers.stats()},
+            'study_open_sessions': self.study_time.open_sessions
+        }
+    
     @app_commands.command(name="pomodoro", description="Start a Pomodoro timer")
     @app_commands.describe(
         work_minutes="Work duration (default: 25 minutes)",
-        break_minutes="Break duration (default: 5 minutes)"
+        break_minutes="Break duration (default: 5 minutes)",
+        cycles="Work/break cycles to repeat (default: 1)",
+        long_break_minutes="Long break after every 4th cycle (default: 15 minutes)"
     )
     async def pomodoro(
         self, 
         interaction: discord.Interaction, 
-        work_minutes: Optional[int] = 25,
-        break_minutes: Optional[int] = 5
+        work_minutes: Optional[int] = Config.DEFAULT_STUDY_DURATION,
+        break_minutes: Optional[int] = Config.DEFAULT_BREAK_DURATION,
+        cycles: Optional[int] = 1,
+        long_break_minutes: Optional[int] = Config.DEFAULT_LONG_BREAK_DURATION
     ):
         """Start a Pomodoro study session"""
         if work_minutes < 1 or work_minutes > 60:
@@ -37,66 +130,326 @@ class Study(commands.Cog):
             await interaction.response.send_message("❌ Break time must be between 1-30 minutes!", ephemeral=True)
             return
         
+        if long_break_minutes < 1 or long_break_minutes > 60:
+            await interaction.response.send_message("❌ Long break time must be between 1-60 minutes!", ephemeral=True)
+            return
+        
+        if cycles < 1 or cycles > Config.POMODORO_MAX_CYCLES:
+            await interaction.response.send_message(f"❌ Cycles must be between 1-{Config.POMODORO_MAX_CYCLES}!", ephemeral=True)
+            return
+        
         user_id = interaction.user.id
         
-        if user_id in self.pomodoro_sessions:
+        if user_id in self.pomodoro_members:
             await interaction.response.send_message("⚠️ You already have an active Pomodoro session!", ephemeral=True)
             return
         
-        self.pomodoro_sessions[user_id] = True
+        session = {
+            'guild_id': interaction.guild_id or 0,
+            'channel_id': interaction.channel.id,
+            'host_id': user_id,
+            'members': [user_id],
+            'work_minutes': work_minutes,
+            'break_minutes': break_minutes,
+            'long_break_minutes': long_break_minutes,
+            'cycles': cycles,
+            'cycle': 1,
+            'phase': 'work',
+            'phase_ends_at': datetime.utcnow() + timedelta(minutes=work_minutes)
+        }
+        session['session_id'] = await self.bot.db.create_pomodoro(session)
+        self._track_pomodoro(session)
+        
+        description = f"**Focus time:** {work_minutes} minutes\n**Break time:** {break_minutes} minutes"
+        if cycles > 1:
+            description += f"\n**Cycles:** {cycles}"
         
         embed = discord.Embed(
             title="🍅 Pomodoro Timer Started!",
-            description=f"**Focus time:** {work_minutes} minutes\n**Break time:** {break_minutes} minutes",
+            description=description,
             color=discord.Color.red(),
             timestamp=datetime.utcnow()
         )
         embed.add_field(name="💪 Stay Focused!", value="I'll notify you when it's break time!")
+        embed.add_field(name="👥 Study Together", value=f"Others can join with `/joinpomodoro {interaction.user.display_name}`")
         embed.set_footer(text=f"Started by {interaction.user.display_name}")
         
         await interaction.response.send_message(embed=embed)
+    
+    def _track_pomodoro(self, session: dict):
+        session_id = session['session_id']
+        self.pomodoros[session_id] = session
+        for member_id in session['members']:
+            self.pomodoro_members[member_id] = session_id
+        self.bot.timers.schedule(('pomodoro', session_id), session['phase_ends_at'], lambda: self._advance_pomodoro(session_id))
+    
+    async def _end_pomodoro(self, session_id: int):
+        session = self.pomodoros.pop(session_id, None)
+        if session is None:
+            return
+        for member_id in session['members']:
+            if self.pomodoro_members.get(member_id) == session_id:
+                del self.pomodoro_members[member_id]
+        self.bot.timers.cancel(('pomodoro', session_id))
+        await self.bot.db.end_pomodoro(session_id)
+    
+    async def _advance_pomodoro(self, session_id: int):
+        """Timer callback: move a session into its next phase and notify its members"""
+        session = self.pomodoros.get(session_id)
+        if session is None:
+            return
         
-        # Work phase
-        await asyncio.sleep(work_minutes * 60)
+        channel = self.bot.get_channel(session['channel_id'])
+        mentions = " ".join(f"<@{member_id}>" for member_id in session['members'])
         
-        if user_id not in self.pomodoro_sessions:
-            return  # User stopped the timer
+        if session['phase'] == 'work':
+            long_break = session['cycle'] % Config.POMODORO_LONG_BREAK_EVERY == 0 and session['cycle'] < session['cycles']
+            minutes = session['long_break_minutes'] if long_break else session['break_minutes']
+            session['phase'] = 'long_break' if long_break else 'break'
+            
+            embed = discord.Embed(
+                title="🌴 Long Break!" if long_break else "🎉 Break Time!",
+                description=f"Great work! Take a {minutes} minute break.",
+                color=discord.Color.green()
+            )
+            embed.add_field(name="💧 Drink water", value="Stay hydrated!")
+            embed.add_field(name="🧘 Stretch", value="Move your body!")
+        elif session['cycle'] >= session['cycles']:
+            await self._end_pomodoro(session_id)
+            if channel:
+                embed = discord.Embed(
+                    title="✅ Pomodoro Complete!",
+                    description="Ready for another session?",
+                    color=discord.Color.blue()
+                )
+                if session['cycles'] > 1:
+                    embed.description = f"You finished all {session['cycles']} cycles! Ready for another session?"
+                await channel.send(content=mentions, embed=embed)
+            return
+        else:
+            minutes = session['work_minutes']
+            session['cycle'] += 1
+            session['phase'] = 'work'
+            
+            embed = discord.Embed(
+                title="🍅 Back to Work!",
+                description=f"Cycle {session['cycle']}/{session['cycles']}: focus for {minutes} minutes.",
+                color=discord.Color.red()
+            )
         
-        # Break notification
-        embed = discord.Embed(
-            title="🎉 Break Time!",
-            description=f"Great work! Take a {break_minutes} minute break.",
-            color=discord.Color.green()
-        )
-        embed.add_field(name="💧 Drink water", value="Stay hydrated!")
-        embed.add_field(name="🧘 Stretch", value="Move your body!")
+        session['phase_ends_at'] = datetime.utcnow() + timedelta(minutes=minutes)
+        await self.bot.db.save_pomodoro(session)
+        if session_id not in self.pomodoros:
+            return  # Stopped while we were saving
+        self._track_pomodoro(session)
+        
+        if channel:
+            await channel.send(content=mentions, embed=embed)
+    
+    @app_commands.command(name="joinpomodoro", description="Join someone's Pomodoro session")
+    @app_commands.describe(user="The user whose session you want to join")
+    async def joinpomodoro(self, interaction: discord.Interaction, user: discord.Member):
+        """Join a group Pomodoro session"""
+        if interaction.user.id in self.pomodoro_members:
+            await interaction.response.send_message("⚠️ You already have an active Pomodoro session!", ephemeral=True)
+            return
         
-        await interaction.channel.send(content=interaction.user.mention, embed=embed)
+        session_id = self.pomodoro_members.get(user.id)
+        if session_id is None:
+            await interaction.response.send_message(f"❌ {user.display_name} has no active Pomodoro session!", ephemeral=True)
+            return
         
-        # Break phase
-        await asyncio.sleep(break_minutes * 60)
+        session = self.pomodoros[session_id]
+        session['members'].append(interaction.user.id)
+        self.pomodoro_members[interaction.user.id] = session_id
+        await self.bot.db.save_pomodoro(session)
         
-        if user_id in self.pomodoro_sessions:
-            # End notification
-            embed = discord.Embed(
-                title="✅ Pomodoro Complete!",
-                description="Ready for another session?",
-                color=discord.Color.blue()
-            )
-            
-            await interaction.channel.send(content=interaction.user.mention, embed=embed)
-            del self.pomodoro_sessions[user_id]
+        phase = "focusing" if session['phase'] == 'work' else "on a break"
+        await interaction.response.send_message(
+            f"👥 {interaction.user.mention} joined {user.mention}'s Pomodoro! "
+            f"Currently {phase} until <t:{int(to_timestamp(session['phase_ends_at']))}:t>."
+        )
     
     @app_commands.command(name="stoppomodoro", description="Stop your active Pomodoro timer")
     async def stoppomodoro(self, interaction: discord.Interaction):
-        """Stop the active Pomodoro session"""
+        """Stop the active Pomodoro session (or leave a group one)"""
         user_id = interaction.user.id
+        session_id = self.pomodoro_members.get(user_id)
         
-        if user_id in self.pomodoro_sessions:
-            del self.pomodoro_sessions[user_id]
-            await interaction.response.send_message("⏹️ Pomodoro timer stopped!", ephemeral=True)
+        if session_id is None:
+            await interaction.response.send_message("❌ No active Pomodoro session!", ephemeral=True)
+            return
+        
+        session = self.pomodoros[session_id]
+        if session['host_id'] == user_id or len(session['members']) == 1:
+            await self._end_pomodoro(session_id)
+            if len(session['members']) > 1:
+                await interaction.response.send_message("⏹️ Pomodoro timer stopped for everyone in your session!")
+            else:
+                await interaction.response.send_message("⏹️ Pomodoro timer stopped!", ephemeral=True)
         else:
+            session['members'].remove(user_id)
+            del self.pomodoro_members[user_id]
+            await self.bot.db.save_pomodoro(session)
+            await interaction.response.send_message("👋 You left the Pomodoro session.", ephemeral=True)
+    
+    @app_commands.command(name="pomodorostatus", description="Show your Pomodoro session")
+    async def pomodorostatus(self, interaction: discord.Interaction):
+        """Show the current phase of your Pomodoro session"""
+        session_id = self.pomodoro_members.get(interaction.user.id)
+        if session_id is None:
             await interaction.response.send_message("❌ No active Pomodoro session!", ephemeral=True)
+            return
+        
+        session = self.pomodoros[session_id]
+        phases = {'work': "🍅 Focus", 'break': "🎉 Break", 'long_break': "🌴 Long break"}
+        embed = discord.Embed(title="🍅 Pomodoro Session", color=discord.Color.red())
+        embed.add_field(name="Phase", value=phases[session['phase']])
+        embed.add_field(name="Cycle", value=f"{session['cycle']}/{session['cycles']}")
+        embed.add_field(name="Ends", value=f"<t:{int(to_timestamp(session['phase_ends_at']))}:R>")
+        embed.add_field(name="Members", value=" ".join(f"<@{member_id}>" for member_id in session['members']), inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @staticmethod
+    def _homework_status(due: date) -> str:
+        days_until = (due - datetime.now().date()).days
+        if days_until < 0:
+            return "🔴 OVERDUE"
+        if days_until == 0:
+            return "🟡 DUE TODAY"
+        if days_until <= 3:
+            return f"🟠 {days_until}d"
+        return f"🟢 {days_until}d"
+    
+    def _is_study_channel(self, channel) -> bool:
+        return channel is not None and channel.id in self.study_channels.get(channel.guild.id, ())
+    
+    def _seed_study_sessions(self, guild: discord.Guild):
+        """Open sessions for anyone already sitting in a study channel"""
+        for channel_id in self.study_channels.get(guild.id, ()):
+            channel = guild.get_channel(channel_id)
+            for member in getattr(channel, 'members', []):
+                if not member.bot:
+                    self.study_time.open((guild.id, member.id))
+    
+    async def _flush_study_time(self):
+        """Write accumulated study time to the database in one batch"""
+        rows = self.study_time.drain()
+        try:
+            await self.bot.db.add_study_time(rows)
+        except Exception:
+            self.study_time.restore(rows)
+            raise
+    
+    async def _flush_study_time_safely(self):
+        """Flush before a read; on failure the time stays pending and the stored totals are shown"""
+        try:
+            await self._flush_study_time()
+        except Exception as e:
+            logger.error(f"Failed to flush study time: {e}")
+    
+    @tasks.loop(seconds=Config.STUDY_FLUSH_SECONDS)
+    async def flush_study_time(self):
+        await self._flush_study_time_safely()
+    
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for guild in self.bot.guilds:
+            self._seed_study_sessions(guild)
+    
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        """Open/close study sessions as members join and leave study channels"""
+        if member.bot:
+            return
+        was_studying = self._is_study_channel(before.channel)
+        is_studying = self._is_study_channel(after.channel)
+        if was_studying and not is_studying:
+            self.study_time.close((member.guild.id, member.id))
+        elif is_studying and not was_studying:
+            self.study_time.open((member.guild.id, member.id))
+    
+    @app_commands.command(name="studychannel", description="Track study time in a voice channel")
+    @app_commands.describe(channel="Voice channel", enabled="Track this channel (default: yes)")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def study_channel(self, interaction: discord.Interaction, channel: discord.VoiceChannel, enabled: Optional[bool] = True):
+        """Mark a voice channel as a study channel"""
+        await self.bot.db.set_study_channel(interaction.guild.id, channel.id, enabled)
+        channels = self.study_channels.setdefault(interaction.guild.id, set())
+        
+        if enabled:
+            channels.add(channel.id)
+            for member in channel.members:
+                if not member.bot:
+                    self.study_time.open((interaction.guild.id, member.id))
+            await interaction.response.send_message(f"📚 Time spent in {channel.mention} now counts as study time!", ephemeral=True)
+        else:
+            channels.discard(channel.id)
+            for member in channel.members:
+                self.study_time.close((interaction.guild.id, member.id))
+            await interaction.response.send_message(f"📚 {channel.mention} is no longer a study channel.", ephemeral=True)
+    
+    @staticmethod
+    def _format_study_time(seconds: int) -> str:
+        hours, remainder = divmod(int(seconds), 3600)
+        minutes = remainder // 60
+        return f"{hours}h {minutes}m" if hours else f"{minutes}m"
+    
+    @app_commands.command(name="studytime", description="See how long someone has studied")
+    @app_commands.describe(member="Member to look up (defaults to you)")
+    async def studytime(self, interaction: discord.Interaction, member: Optional[discord.Member] = None):
+        """Voice study time for today, this week and all time"""
+        member = member or interaction.user
+        await self._flush_study_time_safely()  # Include sessions still in progress
+        
+        today = datetime.utcnow().date()
+        week_start = today - timedelta(days=today.weekday())
+        totals = await self.bot.db.get_study_totals(interaction.guild.id, member.id, today.isoformat(), week_start.isoformat())
+        
+        if not totals['total']:
+            await interaction.response.send_message(f"📚 No study time recorded for {member.display_name} yet!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(title=f"📚 {member.display_name}'s Study Time", color=discord.Color.blue())
+        embed.add_field(name="Today", value=self._format_study_time(totals['today']))
+        embed.add_field(name="This Week", value=self._format_study_time(totals['week']))
+        embed.add_field(name="All Time", value=self._format_study_time(totals['total']))
+        embed.add_field(name="Days Studied", value=totals['days'])
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.set_footer(text="Tracked from time in study voice channels")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="studyleaderboard", description="This week's top studiers")
+    async def studyleaderboard(self, interaction: discord.Interaction):
+        """Weekly voice study leaderboard"""
+        await self._flush_study_time_safely()
+        
+        today = datetime.utcnow().date()
+        week_start = today - timedelta(days=today.weekday())
+        leaderboard = await self.bot.db.get_study_leaderboard(interaction.guild.id, week_start.isoformat(), limit=10)
+        
+        if not leaderboard:
+            await interaction.response.send_message("📚 No study time recorded this week!", ephemeral=True)
+            return
+        
+        medals = ["🥇", "🥈", "🥉"]
+        lines = []
+        for i, (user_id, seconds) in enumerate(leaderboard):
+            member = interaction.guild.get_member(user_id)
+            name = member.display_name if member else f"User {user_id}"
+            rank = medals[i] if i < 3 else f"#{i + 1}"
+            lines.append(f"{rank} **{name}** - {self._format_study_time(seconds)}")
+        
+        embed = discord.Embed(
+            title="📚 Top Studiers (This Week)",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text="Tracked from time in study voice channels")
+        
+        await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="homework", description="Add homework assignment")
     @app_commands.describe(
@@ -118,20 +471,7 @@ class Study(commands.Cog):
             await interaction.response.send_message("❌ Invalid date format! Use YYYY-MM-DD", ephemeral=True)
             return
         
-        user_id = interaction.user.id
-        
-        if user_id not in self.homework:
-            self.homework[user_id] = []
-        
-        hw_item = {
-            'subject': subject,
-            'assignment': assignment,
-            'due_date': due,
-            'completed': False,
-            'id': len(self.homework[user_id]) + 1
-        }
-        
-        self.homework[user_id].append(hw_item)
+        homework_id = await self.bot.db.add_homework(interaction.user.id, subject, assignment, due.strftime("%Y-%m-%d"))
         
         embed = discord.Embed(
             title="✅ Homework Added!",
@@ -139,7 +479,7 @@ class Study(commands.Cog):
             color=discord.Color.green()
         )
         embed.add_field(name="📅 Due", value=due.strftime("%B %d, %Y"))
-        embed.add_field(name="🆔 ID", value=hw_item['id'])
+        embed.add_field(name="🆔 ID", value=homework_id)
         
         days_until = (due.date() - datetime.now().date()).days
         if days_until < 0:
@@ -154,60 +494,45 @@ class Study(commands.Cog):
     @app_commands.command(name="homeworklist", description="View your homework list")
     async def homework_list(self, interaction: discord.Interaction):
         """View all homework assignments"""
-        user_id = interaction.user.id
+        # Already sorted by due date
+        assignments = await self.bot.db.get_homework(interaction.user.id)
         
-        if user_id not in self.homework or not self.homework[user_id]:
+        if not assignments:
             await interaction.response.send_message("📚 No homework assignments! You're all caught up!", ephemeral=True)
             return
         
-        # Sort by due date
-        assignments = sorted(self.homework[user_id], key=lambda x: x['due_date'])
-        
         embed = discord.Embed(
             title="📚 Your Homework List",
             color=discord.Color.blue(),
             timestamp=datetime.utcnow()
         )
         
-        for hw in assignments:
-            if hw['completed']:
-                status = "✅"
-            else:
-                days_until = (hw['due_date'].date() - datetime.now().date()).days
-                if days_until < 0:
-                    status = "🔴 OVERDUE"
-                elif days_until == 0:
-                    status = "🟡 DUE TODAY"
-                elif days_until <= 3:
-                    status = f"🟠 {days_until}d"
-                else:
-                    status = f"🟢 {days_until}d"
+        for hw in assignments[:25]:
+            due = datetime.strptime(hw['due_date'], "%Y-%m-%d").date()
+            status = "✅" if hw['completed'] else self._homework_status(due)
             
             embed.add_field(
                 name=f"{status} {hw['subject']} (ID: {hw['id']})",
-                value=f"{hw['assignment']}\n📅 Due: {hw['due_date'].strftime('%Y-%m-%d')}",
+                value=f"{hw['assignment']}\n📅 Due: {hw['due_date']}",
                 inline=False
             )
         
+        if len(assignments) > 25:
+            embed.set_footer(text=f"Showing 25 of {len(assignments)} assignments")
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="homeworkdone", description="Mark homework as complete")
     @app_commands.describe(homework_id="Homework ID")
     async def homework_complete(self, interaction: discord.Interaction, homework_id: int):
         """Mark homework as completed"""
-        user_id = interaction.user.id
-        
-        if user_id not in self.homework:
-            await interaction.response.send_message("❌ No homework found!", ephemeral=True)
-            return
-        
-        hw = next((h for h in self.homework[user_id] if h['id'] == homework_id), None)
+        hw = await self.bot.db.get_homework_item(interaction.user.id, homework_id)
         
         if not hw:
             await interaction.response.send_message(f"❌ Homework with ID {homework_id} not found!", ephemeral=True)
             return
         
-        hw['completed'] = True
+        await self.bot.db.complete_homework(homework_id, interaction.user.id)
         
         embed = discord.Embed(
             title="🎉 Homework Complete!",
@@ -222,158 +547,277 @@ class Study(commands.Cog):
     @app_commands.describe(homework_id="Homework ID")
     async def homework_delete(self, interaction: discord.Interaction, homework_id: int):
         """Delete a homework assignment"""
-        user_id = interaction.user.id
-        
-        if user_id not in self.homework:
-            await interaction.response.send_message("❌ No homework found!", ephemeral=True)
-            return
-        
-        initial_count = len(self.homework[user_id])
-        self.homework[user_id] = [h for h in self.homework[user_id] if h['id'] != homework_id]
-        
-        if len(self.homework[user_id]) == initial_count:
+        if not await self.bot.db.delete_homework(homework_id, interaction.user.id):
             await interaction.response.send_message(f"❌ Homework with ID {homework_id} not found!", ephemeral=True)
             return
         
         await interaction.response.send_message(f"🗑️ Homework assignment {homework_id} deleted!", ephemeral=True)
     
+    @tasks.loop(time=time(hour=Config.HOMEWORK_DIGEST_HOUR, tzinfo=timezone.utc))
+    async def homework_digest(self):
+        """DM everyone their overdue and upcoming homework, one message per user"""
+        until = (datetime.now().date() + timedelta(days=Config.HOMEWORK_DIGEST_DAYS)).strftime("%Y-%m-%d")
+        try:
+            rows = await self.bot.db.get_homework_due(until)
+        except Exception as e:
+            logger.error(f"Failed to load homework digest: {e}")
+            return
+        
+        digests = {}
+        for row in rows:
+            digests.setdefault(row['user_id'], []).append(row)
+        
+        for user_id, items in digests.items():
+            embed = discord.Embed(
+                title="📚 Homework Digest",
+                description=f"You have **{len(items)}** assignment{'s' if len(items) != 1 else ''} overdue or due soon.",
+                color=discord.Color.orange(),
+                timestamp=datetime.utcnow()
+            )
+            for hw in items[:25]:
+                due = datetime.strptime(hw['due_date'], "%Y-%m-%d").date()
+                embed.add_field(
+                    name=f"{self._homework_status(due)} {hw['subject']} (ID: {hw['id']})",
+                    value=f"{hw['assignment']}\n📅 Due: {hw['due_date']}",
+                    inline=False
+                )
+            embed.set_footer(text="Use /homeworkdone <id> when you finish one")
+            
+            try:
+                user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+                await user.send(embed=embed)
+            except (discord.Forbidden, discord.NotFound):
+                pass  # DMs closed or account gone
+            except Exception as e:
+                logger.error(f"Failed to send homework digest to {user_id}: {e}")
+    
+    @homework_digest.before_loop
+    async def before_homework_digest(self):
+        await self.bot.wait_until_ready()
+    
     @app_commands.command(name="quiz", description="Take a quick quiz")
     @app_commands.describe(
         subject="Quiz subject (math, science, history, geography)",
-        difficulty="Difficulty level (easy, medium, hard)"
+        difficulty="Difficulty level (easy, medium, hard)",
+        rounds="Number of questions (default: 1)",
+        open_to_all="Let everyone in the channel answer and compete (default: just you)"
     )
     async def quiz(
         self, 
         interaction: discord.Interaction, 
         subject: str,
-        difficulty: Optional[str] = "medium"
+        difficulty: Optional[str] = "medium",
+        rounds: Optional[int] = 1,
+        open_to_all: Optional[bool] = False
     ):
         """Take a randomized quiz"""
-        # Sample quiz questions
-        quizzes = {
-            'math': {
-                'easy': [
-                    ('What is 5 + 7?', '12'),
-                    ('What is 3 × 4?', '12'),
-                    ('What is 20 ÷ 4?', '5'),
-                ],
-                'medium': [
-                    ('What is 15% of 200?', '30'),
-                    ('What is the square root of 144?', '12'),
-                    ('What is 8²?', '64'),
-                ],
-                'hard': [
-                    ('What is the derivative of x²?', '2x'),
-                    ('What is π rounded to 2 decimals?', '3.14'),
-                    ('What is the integral of 1/x?', 'ln(x)'),
-                ]
-            },
-            'science': {
-                'easy': [
-                    ('What planet is closest to the sun?', 'Mercury'),
-                    ('What is H2O?', 'Water'),
-                    ('How many legs does a spider have?', '8'),
-                ],
-                'medium': [
-                    ('What is the powerhouse of the cell?', 'Mitochondria'),
-                    ('What is the chemical symbol for gold?', 'Au'),
-                    ('What is the speed of light in km/s?', '300000'),
-                ],
-                'hard': [
-                    ('What is the atomic number of Carbon?', '6'),
-                    ('What is Newton\'s second law? (F=?)', 'ma'),
-                    ('What is the study of fungi called?', 'Mycology'),
-                ]
-            }
-        }
+        if difficulty.lower() not in DIFFICULTIES:
+            difficulty = 'medium'
+        
+        if rounds < 1 or rounds > 20:
+            await interaction.response.send_message("❌ Rounds must be between 1-20!", ephemeral=True)
+            return
         
-        if subject.lower() not in quizzes:
+        channel_id = interaction.channel.id
+        if self.bot.games.is_active(channel_id):
+            await interaction.response.send_message("❌ A game is already running in this channel!", ephemeral=True)
+            return
+        
+        subject, difficulty = subject.lower(), difficulty.lower()
+        first = await self._draw_quiz(channel_id, subject, difficulty)
+        if first is None:
+            subjects = await self.bot.db.get_question_categories()
             await interaction.response.send_message(
-                f"❌ Subject not found! Available: {', '.join(quizzes.keys())}", 
+                f"❌ No {difficulty} questions for that subject! Available: {', '.join(subjects)}", 
                 ephemeral=True
             )
             return
         
-        if difficulty.lower() not in ['easy', 'medium', 'hard']:
-            difficulty = 'medium'
+        drawn = [first]
         
-        question, answer = random.choice(quizzes[subject.lower()][difficulty.lower()])
+        async def draw():
+            return drawn.pop() if drawn else await self._draw_quiz(channel_id, subject, difficulty)
         
-        embed = discord.Embed(
-            title=f"📝 {subject.title()} Quiz ({difficulty.title()})",
-            description=f"**Question:**\n{question}",
-            color=discord.Color.purple()
+        players = None if open_to_all else {interaction.user.id}
+        session = GameSession(interaction.channel, interaction.user.id, draw, rounds=rounds, players=players)
+        if not self.bot.games.start(channel_id, session):
+            await interaction.response.send_message("❌ A game is already running in this channel!", ephemeral=True)
+            return
+        
+        who = "everyone can answer" if open_to_all else f"{interaction.user.mention} answers"
+        await interaction.response.send_message(
+            f"📝 **{subject.title()} Quiz** starting: {rounds} question{'s' if rounds > 1 else ''}, {who}!"
         )
-        embed.add_field(name="💡 Tip", value="Reply with your answer in the next 30 seconds!")
-        embed.set_footer(text="Type your answer in chat")
+    
+    async def _draw_quiz(self, channel_id: int, subject: str, difficulty: str) -> Optional[Round]:
+        """Next question from the local bank; each channel cycles through every question before repeats"""
+        question_data = await self.bot.db.next_question(channel_id, subject, difficulty)
+        if question_data is None:
+            return None
+        
+        options = None
+        if question_data['incorrect']:
+            options = question_data['incorrect'] + [question_data['answer']]
+            random.shuffle(options)
+        return Round(
+            f"📝 {subject.title()} Quiz ({difficulty.title()})",
+            question_data['question'],
+            question_data['answer'],
+            options,
+            points=DIFFICULTY_POINTS.get(difficulty, 1)
+        )
+    
+    @app_commands.command(name="importquestions", description="Import a question pack into the quiz/trivia bank")
+    @app_commands.describe(
+        pack="JSON or CSV file (category, difficulty, question, answer, incorrect)",
+        name="Name for the pack (default: file name)"
+    )
+    @app_commands.checks.has_permissions(administrator=True)
+    async def import_questions(
+        self,
+        interaction: discord.Interaction,
+        pack: discord.Attachment,
+        name: Optional[str] = None
+    ):
+        """Bulk-import questions for /quiz and /trivia"""
+        await interaction.response.defer(ephemeral=True)
         
-        await interaction.response.send_message(embed=embed)
+        try:
+            questions = parse_question_pack(pack.filename, await pack.read())
+        except (ValueError, UnicodeDecodeError) as e:
+            await interaction.followup.send(f"❌ Couldn't read that pack: {e}", ephemeral=True)
+            return
         
-        def check(m):
-            return m.author.id == interaction.user.id and m.channel.id == interaction.channel.id
+        added = await self.bot.db.import_questions(name or pack.filename, questions)
+        categories = sorted({q['category'] for q in questions})
         
-        try:
-            msg = await self.bot.wait_for('message', timeout=30.0, check=check)
-            
-            if msg.content.lower().strip() == answer.lower().strip():
-                embed = discord.Embed(
-                    title="✅ Correct!",
-                    description=f"The answer is **{answer}**",
-                    color=discord.Color.green()
-                )
-                embed.set_footer(text="Great job! 🎉")
-            else:
-                embed = discord.Embed(
-                    title="❌ Incorrect",
-                    description=f"The correct answer is **{answer}**\nYou answered: {msg.content}",
-                    color=discord.Color.red()
-                )
-                embed.set_footer(text="Better luck next time!")
-            
-            await interaction.channel.send(embed=embed)
-            
-        except asyncio.TimeoutError:
-            embed = discord.Embed(
-                title="⏰ Time's Up!",
-                description=f"The correct answer was **{answer}**",
-                color=discord.Color.orange()
-            )
-            await interaction.channel.send(embed=embed)
+        embed = discord.Embed(
+            title="📚 Question Pack Imported",
+            description=f"Added **{added}** new questions ({len(questions) - added} already in the bank)",
+            color=discord.Color.green()
+        )
+        if categories:
+            embed.add_field(name="Categories", value=", ".join(categories)[:1024], inline=False)
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
     
-    @app_commands.command(name="flashcard", description="Study with flashcards")
+    @app_commands.command(name="flashcard", description="Add a flashcard to one of your decks")
     @app_commands.describe(
         front="Front of the card (question/term)",
-        back="Back of the card (answer/definition)"
+        back="Back of the card (answer/definition)",
+        deck="Deck to add it to (default: default)"
     )
-    async def flashcard(self, interaction: discord.Interaction, front: str, back: str):
+    async def flashcard(self, interaction: discord.Interaction, front: str, back: str, deck: Optional[str] = "default"):
         """Create a flashcard for studying"""
+        if len(front) > MAX_FIELD_LENGTH or len(back) > MAX_FIELD_LENGTH:
+            await interaction.response.send_message(f"❌ Card sides are limited to {MAX_FIELD_LENGTH} characters!", ephemeral=True)
+            return
+        
+        deck = deck.strip().lower()[:50] or "default"
+        deck_id = await self.bot.db.get_deck(interaction.user.id, deck, create=True)
+        added = await self.bot.db.add_flashcards(deck_id, [(front.strip(), back.strip())], format_due(datetime.utcnow()))
+        
+        if not added:
+            await interaction.response.send_message(f"⚠️ **{deck}** already has a card with that front!", ephemeral=True)
+            return
+        
         embed = discord.Embed(
-            title="📇 Flashcard",
-            description="React with 🔄 to flip the card!",
+            title="📇 Flashcard Added",
+            description=f"Saved to your **{deck}** deck. Study it with `/review {deck}`!",
             color=discord.Color.blue()
         )
         embed.add_field(name="Question", value=front, inline=False)
+        embed.add_field(name="Answer", value=f"||{back}||", inline=False)
         
-        await interaction.response.send_message(embed=embed)
-        message = await interaction.original_response()
-        await message.add_reaction("🔄")
-        
-        def check(reaction, user):
-            return user == interaction.user and str(reaction.emoji) == "🔄"
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="importdeck", description="Import flashcards from a CSV file")
+    @app_commands.describe(
+        file="CSV with front,back columns",
+        deck="Deck to import into (default: file name)"
+    )
+    async def import_deck(self, interaction: discord.Interaction, file: discord.Attachment, deck: Optional[str] = None):
+        """Bulk-import a flashcard deck"""
+        await interaction.response.defer(ephemeral=True)
         
         try:
-            await self.bot.wait_for('reaction_add', timeout=60.0, check=check)
-            
-            embed = discord.Embed(
-                title="📇 Flashcard (Flipped)",
-                color=discord.Color.green()
-            )
-            embed.add_field(name="Question", value=front, inline=False)
-            embed.add_field(name="Answer", value=back, inline=False)
-            
-            await message.edit(embed=embed)
-        except asyncio.TimeoutError:
-            pass
+            cards = await asyncio.to_thread(parse_deck_csv, await file.read())
+        except (ValueError, UnicodeDecodeError, csv.Error) as e:
+            await interaction.followup.send(f"❌ Couldn't read that deck: {e}", ephemeral=True)
+            return
+        
+        deck = (deck or file.filename.rsplit('.', 1)[0]).strip().lower()[:50] or "default"
+        deck_id = await self.bot.db.get_deck(interaction.user.id, deck, create=True)
+        added = await self.bot.db.add_flashcards(deck_id, cards, format_due(datetime.utcnow()))
+        
+        embed = discord.Embed(
+            title="📇 Deck Imported",
+            description=f"Added **{added:,}** cards to **{deck}** ({len(cards) - added:,} already in the deck)",
+            color=discord.Color.green()
+        )
+        embed.set_footer(text=f"Start studying with /review {deck}")
+        
+        await interaction.followup.send(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="decks", description="View your flashcard decks")
+    async def decks(self, interaction: discord.Interaction):
+        """List flashcard decks with how many cards are due"""
+        decks = await self.bot.db.get_decks(interaction.user.id, format_due(datetime.utcnow()))
+        
+        if not decks:
+            await interaction.response.send_message("📇 You don't have any decks yet! Add a card with `/flashcard`.", ephemeral=True)
+            return
+        
+        embed = discord.Embed(title="📇 Your Decks", color=discord.Color.blue())
+        for deck in decks[:25]:
+            embed.add_field(name=deck['name'], value=f"{deck['cards']:,} cards • **{deck['due']:,}** due", inline=False)
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
+    @app_commands.command(name="deletedeck", description="Delete one of your flashcard decks")
+    @app_commands.describe(deck="Deck name")
+    async def delete_deck(self, interaction: discord.Interaction, deck: str):
+        """Delete a flashcard deck and all its cards"""
+        deck = deck.strip().lower()
+        deck_id = await self.bot.db.get_deck(interaction.user.id, deck)
+        if deck_id is None:
+            await interaction.response.send_message(f"❌ You don't have a deck called **{deck}**!", ephemeral=True)
+            return
+        
+        await self.bot.db.delete_deck(deck_id)
+        await interaction.response.send_message(f"🗑️ Deck **{deck}** deleted!", ephemeral=True)
+    
+    @app_commands.command(name="review", description="Review the flashcards that are due")
+    @app_commands.describe(deck="Deck to review (default: default)")
+    async def review(self, interaction: discord.Interaction, deck: Optional[str] = "default"):
+        """Spaced-repetition review of a deck's due cards"""
+        deck = deck.strip().lower()
+        deck_id = await self.bot.db.get_deck(interaction.user.id, deck)
+        if deck_id is None:
+            await interaction.response.send_message(f"❌ You don't have a deck called **{deck}**!", ephemeral=True)
+            return
+        
+        async def refill():
+            return await self.bot.db.get_due_flashcards(deck_id, format_due(datetime.utcnow()))
+        
+        cards = await refill()
+        if not cards:
+            next_due_at = await self.bot.db.get_next_flashcard_due(deck_id)
+            message = f"🎉 Nothing due in **{deck}**!"
+            if next_due_at:
+                next_timestamp = int(to_timestamp(datetime.fromisoformat(next_due_at)))
+                message += f" Next card is due <t:{next_timestamp}:R>."
+            await interaction.response.send_message(message, ephemeral=True)
+            return
+        
+        async def on_grade(card: dict, quality: int):
+            ease, interval, repetitions = sm2(card['ease'], card['interval'], card['repetitions'], quality)
+            due_at = format_due(next_due(datetime.utcnow(), interval))
+            await self.bot.db.schedule_flashcard(card['card_id'], ease, interval, repetitions, due_at)
+        
+        view = ReviewView(interaction.user.id, deck, cards, on_grade, refill)
+        await interaction.response.send_message(embed=view.embed(), view=view, ephemeral=True)
+        view.message = await interaction.original_response()
 
 async def setup(bot):
     await bot.add_cog(Study(bot))
@@ -7,21 +7,142 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from datetime import datetime
-from typing import Optional, List
-import random
+from typing import Optional, List, Dict
+import asyncio
+import io
+
+from config import Config
+from utils.bracket_images import BracketRenderer
+from utils.brackets import FORMATS, MAX_ROUND_ROBIN, Bracket, BracketError, Match
+from utils.ratings import elo_update, normalize_game, seed_players
+
+TOURNAMENTS_PER_PAGE = 10
+STATUS_EMOJI = {
+    'registration': '📋',
+    'active': '🎮',
+    'completed': '✅'
+}
+MATCHES_SHOWN = 8
+
+
+class TournamentPages(discord.ui.View):
+    """Previous/Next through a guild's tournaments; each page starts below the last id shown"""
+    
+    def __init__(self, db, guild_id: int, user_id: int, total: int):
+        super().__init__(timeout=180)
+        self.db = db
+        self.guild_id = guild_id
+        self.user_id = user_id
+        self.total = total
+        self.cursors = [None]  # before_id for every page visited so far
+        self.page = 0
+        self.has_next = False
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        return interaction.user.id == self.user_id
+    
+    async def render(self) -> discord.Embed:
+        rows = await self.db.get_tournaments(self.guild_id, self.cursors[self.page], TOURNAMENTS_PER_PAGE + 1)
+        self.has_next = len(rows) > TOURNAMENTS_PER_PAGE
+        rows = rows[:TOURNAMENTS_PER_PAGE]
+        if self.has_next and len(self.cursors) == self.page + 1:
+            self.cursors.append(rows[-1]['id'])
+        
+        embed = discord.Embed(
+            title="🏆 Server Tournaments",
+            color=discord.Color.gold()
+        )
+        for tournament in rows:
+            embed.add_field(
+                name=f"{STATUS_EMOJI.get(tournament['status'], '🏆')} {tournament['name']} (ID: {tournament['id']})",
+                value=f"**Game:** {tournament['game']}\n**Format:** {FORMATS.get(tournament['format'], 'Single Elimination')}\n**Players:** {tournament['player_count']}/{tournament['max_players']}\n**Status:** {tournament['status'].title()}",
+                inline=False
+            )
+        pages = -(-self.total // TOURNAMENTS_PER_PAGE)
+        embed.set_footer(text=f"Page {self.page + 1}/{max(pages, 1)} • {self.total} tournaments")
+        
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+        return embed
+    
+    @discord.ui.button(label="Previous", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(self.page - 1, 0)
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+    
+    @discord.ui.button(label="Next", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if self.has_next:
+            self.page += 1
+        await interaction.response.edit_message(embed=await self.render(), view=self)
+
 
 class Tournament(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.tournaments = {}  # {guild_id: {tournament_id: tournament_data}}
+        self.tournaments = {}  # {guild_id: {tournament_id: tournament_data}}, unfinished ones only
+        self.report_locks = {}  # {tournament_id: Lock} so results are saved in the order they were applied
+        self.rating_lock = asyncio.Lock()  # A player can be in several tournaments of the same game
+        self.bracket_images = BracketRenderer()
+    
+    async def cog_load(self):
+        """Load tournaments still in registration or play; finished ones stay in the database"""
+        for tournament in await self.bot.db.get_active_tournaments():
+            self._remember(tournament)
+    
+    async def cog_unload(self):
+        self.bracket_images.shutdown()
+    
+    def metrics(self) -> dict:
+        """Bracket image cache metrics, served by the web API"""
+        return {
+            'active_tournaments': sum(len(tournaments) for tournaments in self.tournaments.values()),
+            'bracket_images': self.bracket_images.stats()
+        }
+    
+    def _remember(self, tournament: dict):
+        self._load_bracket(tournament)
+        self.tournaments.setdefault(tournament['guild_id'], {})[tournament['id']] = tournament
+    
+    async def _get_tournament(self, guild_id: int, tournament_id: int) -> Optional[dict]:
+        """An active tournament from memory, or a finished one from the database"""
+        tournament = self.tournaments.get(guild_id, {}).get(tournament_id)
+        if tournament is not None:
+            return tournament
+        tournament = await self.bot.db.get_tournament(tournament_id)
+        if tournament is None or tournament['guild_id'] != guild_id:
+            return None
+        self._load_bracket(tournament)
+        return tournament
+    
+    async def _reload_bracket(self, tournament: dict):
+        """Undo an unsaved result by rebuilding the live bracket from the database"""
+        try:
+            stored = await self.bot.db.get_tournament(tournament['id'])
+        except Exception:
+            # Can't tell what was saved; forget it so no result lands on a diverged bracket
+            self.tournaments.get(tournament['guild_id'], {}).pop(tournament['id'], None)
+            raise
+        self._load_bracket(stored)
+        tournament['bracket'] = stored['bracket']
+    
+    def _load_bracket(self, tournament: dict):
+        matches = tournament.pop('matches', [])
+        tournament['bracket'] = Bracket.from_rows(
+            tournament['format'], tournament['players'], matches, tournament['rounds']
+        ) if matches else None
         
     @app_commands.command(name="createtournament", description="Create a new tournament")
     @app_commands.describe(
         name="Tournament name",
         game="Game being played",
-        max_players="Maximum players (must be power of 2: 4, 8, 16, 32, 64)",
-        description="Tournament description"
+        max_players=f"Maximum players (2-{Config.TOURNAMENT_MAX_PLAYERS}, round robin up to {MAX_ROUND_ROBIN})",
+        description="Tournament description",
+        format="Bracket format (default: single elimination)"
     )
+    @app_commands.choices(format=[
+        app_commands.Choice(name=label, value=key) for key, label in FORMATS.items()
+    ])
     @app_commands.checks.has_permissions(manage_guild=True)
     async def create_tournament(
         self,
@@ -29,40 +150,45 @@ class Tournament(commands.Cog):
         name: str,
         game: str,
         max_players: int,
-        description: Optional[str] = "No description provided"
+        description: Optional[str] = "No description provided",
+        format: Optional[str] = "single"
     ):
         """Create a new tournament"""
-        # Validate max_players is power of 2
-        if max_players not in [4, 8, 16, 32, 64]:
+        # Brackets pad themselves with byes, so any size works up to the limit
+        limit = MAX_ROUND_ROBIN if format == 'round_robin' else Config.TOURNAMENT_MAX_PLAYERS
+        if not 2 <= max_players <= limit:
             await interaction.response.send_message(
-                "❌ Max players must be 4, 8, 16, 32, or 64!",
+                f"❌ Max players must be between 2 and {limit} for {FORMATS[format]}!",
                 ephemeral=True
             )
             return
         
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments:
-            self.tournaments[guild_id] = {}
-        
-        # Generate tournament ID
-        tournament_id = len(self.tournaments[guild_id]) + 1
+        # Ids come from the database and are never reused
+        tournament_id = await self.bot.db.create_tournament(
+            guild_id, name, game, max_players, description, interaction.user.id, format
+        )
         
         # Create tournament data
         tournament = {
             'id': tournament_id,
+            'guild_id': guild_id,
             'name': name,
             'game': game,
             'max_players': max_players,
             'description': description,
             'host': interaction.user.id,
+            'format': format,
+            'rounds': None,
+            'winner': None,
             'players': [],
             'status': 'registration',  # registration, active, completed
             'bracket': None,
             'created_at': datetime.utcnow()
         }
         
-        self.tournaments[guild_id][tournament_id] = tournament
+        self.tournaments.setdefault(guild_id, {})[tournament_id] = tournament
         
         embed = discord.Embed(
             title="🏆 Tournament Created!",
@@ -74,6 +200,7 @@ class Tournament(commands.Cog):
         embed.add_field(name="🎮 Game", value=game, inline=True)
         embed.add_field(name="👥 Max Players", value=max_players, inline=True)
         embed.add_field(name="🆔 Tournament ID", value=tournament_id, inline=True)
+        embed.add_field(name="🗂️ Format", value=FORMATS[format], inline=True)
         embed.add_field(name="📋 Status", value="Registration Open", inline=False)
         embed.add_field(name="🎯 How to Join", value=f"Use `/jointournament {tournament_id}`", inline=False)
         
@@ -87,11 +214,11 @@ class Tournament(commands.Cog):
         """Join an active tournament"""
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments or tournament_id not in self.tournaments[guild_id]:
+        tournament = self.tournaments.get(guild_id, {}).get(tournament_id)
+        if tournament is None:
             await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
             return
         
-        tournament = self.tournaments[guild_id][tournament_id]
         
         if tournament['status'] != 'registration':
             await interaction.response.send_message("❌ Tournament registration is closed!", ephemeral=True)
@@ -107,6 +234,7 @@ class Tournament(commands.Cog):
             await interaction.response.send_message("❌ Tournament is full!", ephemeral=True)
             return
         
+        await self.bot.db.add_tournament_player(tournament_id, user_id)
         tournament['players'].append(user_id)
         
         embed = discord.Embed(
@@ -134,11 +262,11 @@ class Tournament(commands.Cog):
         """Leave a tournament"""
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments or tournament_id not in self.tournaments[guild_id]:
+        tournament = self.tournaments.get(guild_id, {}).get(tournament_id)
+        if tournament is None:
             await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
             return
         
-        tournament = self.tournaments[guild_id][tournament_id]
         user_id = interaction.user.id
         
         if user_id not in tournament['players']:
@@ -149,6 +277,7 @@ class Tournament(commands.Cog):
             await interaction.response.send_message("❌ Can't leave after tournament has started!", ephemeral=True)
             return
         
+        await self.bot.db.remove_tournament_player(tournament_id, user_id)
         tournament['players'].remove(user_id)
         
         await interaction.response.send_message("✅ Left tournament!", ephemeral=True)
@@ -159,11 +288,11 @@ class Tournament(commands.Cog):
         """Display tournament information"""
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments or tournament_id not in self.tournaments[guild_id]:
+        tournament = await self._get_tournament(guild_id, tournament_id)
+        if tournament is None:
             await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
             return
         
-        tournament = self.tournaments[guild_id][tournament_id]
         host = interaction.guild.get_member(tournament['host'])
         
         status_text = {
@@ -181,6 +310,7 @@ class Tournament(commands.Cog):
         embed.add_field(name="🎮 Game", value=tournament['game'], inline=True)
         embed.add_field(name="📊 Status", value=status_text[tournament['status']], inline=True)
         embed.add_field(name="🆔 ID", value=tournament['id'], inline=True)
+        embed.add_field(name="🗂️ Format", value=FORMATS.get(tournament['format'], 'Single Elimination'), inline=True)
         
         embed.add_field(
             name="👥 Players",
@@ -214,6 +344,18 @@ class Tournament(commands.Cog):
                 inline=False
             )
         
+        bracket = tournament['bracket']
+        if tournament['winner']:
+            embed.add_field(name="🏆 Champion", value=f"<@{tournament['winner']}>", inline=False)
+        elif bracket is not None:
+            embed.add_field(
+                name="⚔️ Open Matches",
+                value=self._format_matches(bracket.open_matches(), interaction.guild) or "Waiting on earlier results",
+                inline=False
+            )
+        if bracket is not None and bracket.format in ('round_robin', 'swiss'):
+            embed.add_field(name="📊 Standings", value=self._format_standings(bracket, interaction.guild), inline=False)
+        
         await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="starttournament", description="Start a tournament")
@@ -223,11 +365,11 @@ class Tournament(commands.Cog):
         """Start a tournament and generate bracket"""
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments or tournament_id not in self.tournaments[guild_id]:
+        tournament = self.tournaments.get(guild_id, {}).get(tournament_id)
+        if tournament is None:
             await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
             return
         
-        tournament = self.tournaments[guild_id][tournament_id]
         
         if tournament['status'] != 'registration':
             await interaction.response.send_message("❌ Tournament already started!", ephemeral=True)
@@ -237,97 +379,298 @@ class Tournament(commands.Cog):
             await interaction.response.send_message("❌ Need at least 2 players!", ephemeral=True)
             return
         
-        # Generate bracket
-        players = tournament['players'].copy()
-        random.shuffle(players)
+        # Standard seeding by rating: 1 meets N, 2 meets N-1, and byes go to the top seeds
+        ratings = await self.bot.db.get_ratings(guild_id, normalize_game(tournament['game']), tournament['players'])
+        players = seed_players(tournament['players'], {user_id: row['rating'] for user_id, row in ratings.items()})
         
-        # Pad with byes if needed
-        next_power = 2
-        while next_power < len(players):
-            next_power *= 2
-        
-        while len(players) < next_power:
-            players.append(None)  # Bye
+        try:
+            bracket = Bracket.create(tournament['format'], players)
+        except BracketError as e:
+            await interaction.response.send_message(f"❌ {e}!", ephemeral=True)
+            return
         
-        # Create bracket
-        bracket = self._generate_bracket(players)
+        await self.bot.db.start_tournament(tournament_id, players, bracket.rounds, bracket.rows())
+        tournament['players'] = players
+        tournament['rounds'] = bracket.rounds
         tournament['bracket'] = bracket
         tournament['status'] = 'active'
         
         embed = discord.Embed(
             title=f"🏆 {tournament['name']} - STARTED!",
-            description="Tournament has begun! Good luck to all players!",
+            description=f"Tournament has begun! Good luck to all players!\nReport results with `/reportmatch {tournament_id}`.",
             color=discord.Color.green()
         )
+        embed.add_field(name="🗂️ Format", value=FORMATS[bracket.format], inline=True)
+        embed.add_field(name="👥 Players", value=len(players), inline=True)
+        if bracket.rounds:
+            embed.add_field(name="🔁 Rounds", value=bracket.rounds, inline=True)
         
-        # Show first round matchups
+        # Show the first playable matchups
         embed.add_field(
-            name="⚔️ Round 1 Matchups",
-            value=self._format_round(bracket[0], interaction.guild),
+            name="⚔️ Matchups",
+            value=self._format_matches(bracket.open_matches(), interaction.guild),
             inline=False
         )
         
         await interaction.response.send_message(embed=embed)
     
-    def _generate_bracket(self, players: List[int]) -> List[List[tuple]]:
-        """Generate tournament bracket"""
-        bracket = []
-        current_round = [(players[i], players[i+1]) for i in range(0, len(players), 2)]
-        bracket.append(current_round)
-        
-        # Generate subsequent rounds
-        while len(current_round) > 1:
-            current_round = [(None, None) for _ in range(len(current_round) // 2)]
-            bracket.append(current_round)
-        
-        return bracket
-    
-    def _format_round(self, round_matchups: List[tuple], guild: discord.Guild) -> str:
-        """Format round matchups for display"""
-        lines = []
-        for i, (p1, p2) in enumerate(round_matchups[:8], 1):  # Show max 8 matches
-            member1 = guild.get_member(p1) if p1 else None
-            member2 = guild.get_member(p2) if p2 else None
+    @app_commands.command(name="reportmatch", description="Report the winner of a tournament match")
+    @app_commands.describe(
+        tournament_id="Tournament ID",
+        match_id="Match number shown in the matchups",
+        winner="Player who won the match"
+    )
+    async def report_match(self, interaction: discord.Interaction, tournament_id: int, match_id: int, winner: discord.Member):
+        """Record a result; winners (and losers in double elimination) move on immediately"""
+        guild_id = interaction.guild.id
+        
+        tournament = self.tournaments.get(guild_id, {}).get(tournament_id)
+        if tournament is None or tournament['status'] != 'active':
+            await interaction.response.send_message("❌ No tournament in progress with that ID!", ephemeral=True)
+            return
+        
+        bracket = tournament['bracket']
+        match = bracket.matches.get(match_id)
+        user = interaction.user
+        staff = user.id == tournament['host'] or user.guild_permissions.manage_guild
+        if not staff and (match is None or user.id not in match.players):
+            await interaction.response.send_message("❌ Only the players in this match or the host can report it!", ephemeral=True)
+            return
+        
+        lock = self.report_locks.setdefault(tournament_id, asyncio.Lock())
+        async with lock:
+            # Re-read under the lock: a failed write by another report may have reloaded it
+            bracket = tournament['bracket']
+            try:
+                changed = bracket.report(match_id, winner.id)
+            except BracketError as e:
+                await interaction.response.send_message(f"❌ {e}!", ephemeral=True)
+                return
             
-            name1 = member1.display_name if member1 else "BYE"
-            name2 = member2.display_name if member2 else "BYE"
+            champion = bracket.champion
+            status = 'completed' if champion else 'active'
+            try:
+                await self.bot.db.save_tournament_matches(tournament_id, status, bracket.rows(changed), champion)
+            except Exception:
+                await self._reload_bracket(tournament)
+                raise
+        
+        rating_changes = await self._rate_match(guild_id, tournament['game'], winner.id, bracket.matches[match_id].loser)
+        
+        if champion:
+            tournament['status'] = status
+            tournament['winner'] = champion
+            self.tournaments.get(guild_id, {}).pop(tournament_id, None)
+            self.report_locks.pop(tournament_id, None)
             
-            lines.append(f"**Match {i}:** {name1} vs {name2}")
+            embed = discord.Embed(
+                title=f"🏆 {tournament['name']} - Champion!",
+                description=f"<@{champion}> wins the tournament! 🎉",
+                color=discord.Color.gold()
+            )
+            if bracket.format in ('round_robin', 'swiss'):
+                embed.add_field(name="📊 Final Standings", value=self._format_standings(bracket, interaction.guild), inline=False)
+            embed.add_field(name="📈 Ratings", value=rating_changes, inline=False)
+            await interaction.response.send_message(embed=embed)
+            return
         
-        if len(round_matchups) > 8:
-            lines.append(f"... and {len(round_matchups) - 8} more matches")
+        embed = discord.Embed(
+            title="✅ Result Recorded",
+            description=f"{winner.mention} wins match **#{match_id}** ({self._match_label(bracket.matches[match_id])})",
+            color=discord.Color.green()
+        )
+        embed.add_field(name="📈 Ratings", value=rating_changes, inline=False)
+        # Only matches this result unlocked, not the whole bracket
+        ready = [changed_match for changed_match in changed if changed_match.is_ready]
+        if ready:
+            embed.add_field(name="⚔️ Up Next", value=self._format_matches(ready, interaction.guild), inline=False)
+        await interaction.response.send_message(embed=embed)
+    
+    async def _rate_match(self, guild_id: int, game: str, winner_id: int, loser_id: int) -> str:
+        """Apply one result to both players' ratings and describe the change"""
+        game = normalize_game(game)
+        async with self.rating_lock:
+            ratings = await self.bot.db.get_ratings(guild_id, game, [winner_id, loser_id])
+            new = {'rating': Config.RATING_DEFAULT, 'games': 0}
+            winner, loser = ratings.get(winner_id, new), ratings.get(loser_id, new)
+            winner_rating, loser_rating = elo_update(winner['rating'], loser['rating'], winner['games'], loser['games'])
+            await self.bot.db.record_rated_match(guild_id, game, winner_id, winner_rating, loser_id, loser_rating)
+        
+        return "\n".join(
+            f"<@{user_id}> {before:.0f} → {after:.0f} ({after - before:+.0f})"
+            for user_id, before, after in (
+                (winner_id, winner['rating'], winner_rating),
+                (loser_id, loser['rating'], loser_rating)
+            )
+        )
+    
+    def _match_label(self, match: Match) -> str:
+        if match.section == 'winners':
+            # Only double elimination has a losers bracket to tell apart
+            return f"Winners Round {match.round}" if match.loser_match is not None else f"Round {match.round}"
+        if match.section == 'losers':
+            return f"Losers Round {match.round}"
+        if match.section == 'final':
+            return "Grand Final"
+        if match.section == 'reset':
+            return "Grand Final Reset"
+        return f"Round {match.round}"
+    
+    def _player_name(self, guild: discord.Guild, user_id: int) -> str:
+        member = guild.get_member(user_id)
+        return member.display_name if member else f"<@{user_id}>"
+    
+    def _format_matches(self, matches: List[Match], guild: discord.Guild) -> str:
+        """Format playable matches for display"""
+        lines = []
+        for match in matches[:MATCHES_SHOWN]:
+            name1, name2 = (self._player_name(guild, player) for player in match.players)
+            lines.append(f"**#{match.id}** {name1} vs {name2} • {self._match_label(match)}")
+        
+        if len(matches) > MATCHES_SHOWN:
+            lines.append(f"... and {len(matches) - MATCHES_SHOWN} more matches (see `/tournamentbracket`)")
         
         return "\n".join(lines)
     
-    @app_commands.command(name="listtournaments", description="List all tournaments")
-    async def list_tournaments(self, interaction: discord.Interaction):
-        """List all tournaments in the server"""
-        guild_id = interaction.guild.id
+    def _format_standings(self, bracket: Bracket, guild: discord.Guild) -> str:
+        lines = []
+        for rank, (player, wins, tiebreak) in enumerate(bracket.standings()[:10], 1):
+            line = f"{rank}. {self._player_name(guild, player)} - {wins} win{'s' if wins != 1 else ''}"
+            if bracket.format == 'swiss':
+                line += f" ({tiebreak} Buchholz)"
+            lines.append(line)
+        return "\n".join(lines)
+    
+    @app_commands.command(name="tournamentbracket", description="View a tournament's bracket")
+    @app_commands.describe(tournament_id="Tournament ID")
+    async def tournament_bracket(self, interaction: discord.Interaction, tournament_id: int):
+        """Draw the whole bracket as an image"""
+        guild = interaction.guild
         
-        if guild_id not in self.tournaments or not self.tournaments[guild_id]:
-            await interaction.response.send_message("❌ No tournaments found!", ephemeral=True)
+        tournament = await self._get_tournament(guild.id, tournament_id)
+        if tournament is None:
+            await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
+            return
+        
+        bracket = tournament['bracket']
+        if bracket is None:
+            await interaction.response.send_message("❌ The bracket is drawn when the tournament starts!", ephemeral=True)
             return
         
+        if len(bracket.players) > Config.BRACKET_IMAGE_MAX_PLAYERS:
+            await interaction.response.send_message(
+                f"❌ Brackets over {Config.BRACKET_IMAGE_MAX_PLAYERS} players are too large to draw. Use `/tournamentinfo` for open matches!",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer()
+        
+        names, avatar_keys, missing = {}, {}, {}
+        with_avatars = len(bracket.players) <= Config.BRACKET_AVATAR_MAX_PLAYERS
+        for player in bracket.players:
+            member = guild.get_member(player)
+            names[player] = member.display_name if member else f"User {player}"
+            if member and with_avatars:
+                avatar = member.display_avatar
+                avatar_keys[player] = avatar.key
+                if not self.bracket_images.has_avatar(avatar.key):
+                    missing[avatar.key] = avatar
+        
+        image = await self.bracket_images.render(
+            tournament_id, tournament['name'], bracket, names, avatar_keys, await self._fetch_avatars(missing)
+        )
+        
         embed = discord.Embed(
-            title="🏆 Server Tournaments",
+            title=f"🏆 {tournament['name']}",
+            description=f"**Game:** {tournament['game']}",
             color=discord.Color.gold()
         )
+        embed.set_image(url="attachment://bracket.png")
         
-        for tournament in self.tournaments[guild_id].values():
-            status_emoji = {
-                'registration': '📋',
-                'active': '🎮',
-                'completed': '✅'
-            }
-            
+        await interaction.followup.send(embed=embed, file=discord.File(io.BytesIO(image), filename="bracket.png"))
+    
+    async def _fetch_avatars(self, assets: Dict[str, discord.Asset]) -> Dict[str, bytes]:
+        """Download small avatars the renderer hasn't cached yet, a few at a time"""
+        limiter = asyncio.Semaphore(8)
+        
+        async def fetch(key: str, asset: discord.Asset):
+            async with limiter:
+                try:
+                    return key, await asset.with_size(64).read()
+                except discord.DiscordException:
+                    return key, None
+        
+        results = await asyncio.gather(*(fetch(key, asset) for key, asset in assets.items()))
+        return {key: data for key, data in results if data}
+    
+    @app_commands.command(name="rating", description="View a member's tournament ratings")
+    @app_commands.describe(member="Member to look up (default: you)")
+    async def rating(self, interaction: discord.Interaction, member: Optional[discord.Member] = None):
+        """Show a member's Elo, rank and record in every game they've played"""
+        member = member or interaction.user
+        ratings = await self.bot.db.get_user_ratings(interaction.guild.id, member.id)
+        
+        if not ratings:
+            await interaction.response.send_message(f"❌ {member.display_name} hasn't played a rated match yet!", ephemeral=True)
+            return
+        
+        embed = discord.Embed(
+            title=f"📈 {member.display_name}'s Ratings",
+            color=discord.Color.blue()
+        )
+        for row in ratings[:25]:
             embed.add_field(
-                name=f"{status_emoji[tournament['status']]} {tournament['name']} (ID: {tournament['id']})",
-                value=f"**Game:** {tournament['game']}\n**Players:** {len(tournament['players'])}/{tournament['max_players']}\n**Status:** {tournament['status'].title()}",
-                inline=False
+                name=row['game'].title(),
+                value=f"**{row['rating']:.0f}** (#{row['rank']})\n{row['wins']}W - {row['losses']}L",
+                inline=True
             )
+        embed.set_thumbnail(url=member.display_avatar.url)
+        embed.set_footer(text="Elo, updated after every reported tournament match")
         
         await interaction.response.send_message(embed=embed)
     
+    @app_commands.command(name="ratings", description="Top rated players in a game")
+    @app_commands.describe(game="Game to rank")
+    async def ratings(self, interaction: discord.Interaction, game: str):
+        """Rating leaderboard for one game"""
+        leaderboard = await self.bot.db.get_rating_leaderboard(interaction.guild.id, normalize_game(game), limit=10)
+        
+        if not leaderboard:
+            await interaction.response.send_message(f"❌ No rated matches for **{game}** yet!", ephemeral=True)
+            return
+        
+        medals = ["🥇", "🥈", "🥉"]
+        lines = []
+        for i, (user_id, rating, wins, losses) in enumerate(leaderboard):
+            rank = medals[i] if i < 3 else f"#{i + 1}"
+            lines.append(f"{rank} **{self._player_name(interaction.guild, user_id)}** - {rating:.0f} ({wins}W - {losses}L)")
+        
+        embed = discord.Embed(
+            title=f"📈 Top Rated: {game}",
+            description="\n".join(lines),
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text="Higher rated players get better seeds in new tournaments")
+        
+        await interaction.response.send_message(embed=embed)
+    
+    @app_commands.command(name="tournaments", description="List the server's tournaments")
+    async def list_tournaments(self, interaction: discord.Interaction):
+        """List all tournaments in the server, newest first"""
+        guild_id = interaction.guild.id
+        total = await self.bot.db.count_tournaments(guild_id)
+        
+        if not total:
+            await interaction.response.send_message("❌ No tournaments found!", ephemeral=True)
+            return
+        
+        view = TournamentPages(self.bot.db, guild_id, interaction.user.id, total)
+        embed = await view.render()
+        if not view.has_next:
+            view = discord.utils.MISSING
+        await interaction.response.send_message(embed=embed, view=view)
+    
     @app_commands.command(name="deletetournament", description="Delete a tournament")
     @app_commands.describe(tournament_id="Tournament ID")
     @app_commands.checks.has_permissions(manage_guild=True)
@@ -335,12 +678,15 @@ class Tournament(commands.Cog):
         """Delete a tournament"""
         guild_id = interaction.guild.id
         
-        if guild_id not in self.tournaments or tournament_id not in self.tournaments[guild_id]:
+        tournament = await self._get_tournament(guild_id, tournament_id)
+        if tournament is None:
             await interaction.response.send_message("❌ Tournament not found!", ephemeral=True)
             return
         
-        tournament_name = self.tournaments[guild_id][tournament_id]['name']
-        del self.tournaments[guild_id][tournament_id]
+        tournament_name = tournament['name']
+        await self.bot.db.delete_tournament(tournament_id)
+        self.tournaments.get(guild_id, {}).pop(tournament_id, None)
+        self.bracket_images.forget(tournament_id)
         
         embed = discord.Embed(
             title="🗑️ Tournament Deleted",
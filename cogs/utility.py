@@ -6,51 +6,151 @@ Provides useful utility commands like polls, reminders, weather, etc.
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
-import aiohttp
 from datetime import datetime, timedelta
 import asyncio
 from typing import Optional
 import json
+import logging
+from config import Config
+from utils.cache import TTLCache
+from utils.calculator import CalculatorError, calculate, format_number
+from utils.polls import PollManager, PollState, PollView
+from utils.translation import TranslationError, TranslationService, create_translation_backend
+
+logger = logging.getLogger('MegaBot.Utility')
+
 
 class Utility(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.calculator_variables = TTLCache(maxsize=1000, ttl=3600)  # {user_id: {name: value}}
+        self.translator = TranslationService(
+            create_translation_backend(bot),
+            bot.db,
+            cache_size=Config.TRANSLATE_CACHE_SIZE,
+            batch_window=Config.TRANSLATE_BATCH_WINDOW,
+            batch_size=Config.TRANSLATE_BATCH_SIZE
+        )
+        self.polls = PollManager(bot.db, self._render_poll, refresh_interval=Config.POLL_REFRESH_SECONDS)
+        self.poll_views = {}  # {poll_id: PollView}
         self.check_reminders.start()
+        self.flush_polls.start()
+    
+    async def cog_load(self):
+        """Re-attach vote buttons to polls that were open when the bot stopped"""
+        for row in await self.bot.db.get_open_polls():
+            self._watch_poll(PollState(**row))
         
-    def cog_unload(self):
+    async def cog_unload(self):
         self.check_reminders.cancel()
+        self.flush_polls.cancel()
+        for view in self.poll_views.values():
+            view.stop()
+        await self.polls.flush()
+    
+    def metrics(self) -> dict:
+        """Translation cache and poll metrics, served by the web API"""
+        return {'translation': self.translator.stats(), 'polls': self.polls.stats()}
     
     @app_commands.command(name="poll", description="Create a poll")
     @app_commands.describe(
         question="The poll question",
-        options="Comma-separated options (up to 10)"
+        options="Comma-separated options (up to 10)",
+        duration="Minutes until the poll closes (default: stays open until closed)",
+        multiple="Allow voting for more than one option"
     )
-    async def poll(self, interaction: discord.Interaction, question: str, options: str):
-        """Create a poll with multiple options"""
-        option_list = [opt.strip() for opt in options.split(',')][:10]
+    async def poll(self, interaction: discord.Interaction, question: str, options: str, duration: Optional[int] = None, multiple: bool = False):
+        """Create a button poll with multiple options"""
+        option_list = [opt.strip() for opt in options.split(',') if opt.strip()][:10]
         
         if len(option_list) < 2:
             await interaction.response.send_message("❌ You need at least 2 options!", ephemeral=True)
             return
         
-        # Emoji numbers
-        emojis = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
-        
-        description = "\n\n".join([f"{emojis[i]} {opt}" for i, opt in enumerate(option_list)])
+        if duration is not None and (duration <= 0 or duration > Config.POLL_MAX_DURATION):
+            await interaction.response.send_message(f"❌ Duration must be between 1 and {Config.POLL_MAX_DURATION} minutes!", ephemeral=True)
+            return
         
-        embed = discord.Embed(
-            title=f"📊 {question}",
-            description=description,
-            color=discord.Color.blue(),
-            timestamp=datetime.utcnow()
+        closes_at = datetime.utcnow() + timedelta(minutes=duration) if duration else None
+        poll_id = await self.bot.db.create_poll(
+            interaction.guild_id or 0,
+            interaction.channel.id,
+            interaction.user.id,
+            question,
+            option_list,
+            multiple,
+            closes_at
         )
-        embed.set_footer(text=f"Poll by {interaction.user.display_name}", icon_url=interaction.user.display_avatar.url)
+        poll = PollState(poll_id, interaction.channel.id, interaction.user.id, question, option_list, multiple, closes_at)
+        view = PollView(poll, self._vote, self._close_poll)
         
-        await interaction.response.send_message(embed=embed)
+        await interaction.response.send_message(embed=poll.embed(), view=view)
         
         message = await interaction.original_response()
-        for i in range(len(option_list)):
-            await message.add_reaction(emojis[i])
+        poll.message_id = message.id
+        await self.bot.db.set_poll_message(poll_id, message.id)
+        self.polls.add(poll)
+        self.poll_views[poll_id] = view
+    
+    def _watch_poll(self, poll: PollState):
+        view = PollView(poll, self._vote, self._close_poll)
+        self.polls.add(poll)
+        self.poll_views[poll.poll_id] = view
+        self.bot.add_view(view, message_id=poll.message_id)
+    
+    async def _vote(self, interaction: discord.Interaction, poll: PollState, option: int):
+        """Handle a vote button; the results embed is refreshed separately"""
+        ballot = await self.polls.vote(poll, interaction.user.id, option) if not poll.closed else None
+        if ballot is None:
+            await interaction.response.send_message("❌ This poll has closed!", ephemeral=True)
+            return
+        
+        if ballot:
+            chosen = ", ".join(f"**{poll.options[i]}**" for i in sorted(ballot))
+            await interaction.response.send_message(f"✅ Your vote: {chosen}", ephemeral=True)
+        else:
+            await interaction.response.send_message("🗑️ Your vote was removed.", ephemeral=True)
+    
+    async def _close_poll(self, interaction: discord.Interaction, poll: PollState):
+        """Close button, for the poll's author or moderators"""
+        member_permissions = getattr(interaction.user, 'guild_permissions', None)
+        if interaction.user.id != poll.author_id and not (member_permissions and member_permissions.manage_messages):
+            await interaction.response.send_message("❌ Only the poll's creator or a moderator can close it!", ephemeral=True)
+            return
+        
+        await interaction.response.defer()
+        await self._finish_poll(poll)
+    
+    async def _finish_poll(self, poll: PollState):
+        view = self.poll_views.pop(poll.poll_id, None)
+        if view is not None:
+            view.stop()
+        await self.polls.close(poll)
+    
+    async def _render_poll(self, poll: PollState):
+        """Edit the poll message with the current tallies; closed polls lose their buttons"""
+        channel = self.bot.get_channel(poll.channel_id)
+        if channel is None or poll.message_id is None:
+            return
+        message = channel.get_partial_message(poll.message_id)
+        if poll.closed:
+            await message.edit(embed=poll.embed(), view=None)
+        else:
+            await message.edit(embed=poll.embed())
+    
+    @tasks.loop(seconds=Config.POLL_FLUSH_SECONDS)
+    async def flush_polls(self):
+        """Persist buffered votes and close polls whose time is up"""
+        try:
+            await self.polls.flush()
+            for poll in self.polls.due(datetime.utcnow()):
+                await self._finish_poll(poll)
+        except Exception as e:
+            logger.error(f"Failed to update polls: {e}")
+    
+    @flush_polls.before_loop
+    async def before_flush_polls(self):
+        await self.bot.wait_until_ready()
     
     @app_commands.command(name="remind", description="Set a reminder")
     @app_commands.describe(
@@ -118,59 +218,49 @@ class Utility(commands.Cog):
         target_language="Target language code (e.g., es, fr, de)"
     )
     async def translate(self, interaction: discord.Interaction, text: str, target_language: str):
-        """Translate text using a free API"""
+        """Translate text through the cached translation service"""
         await interaction.response.defer()
         
         try:
-            # Using LibreTranslate (free, open source)
-            async with aiohttp.ClientSession() as session:
-                url = "https://libretranslate.com/translate"
-                data = {
-                    'q': text,
-                    'source': 'auto',
-                    'target': target_language.lower(),
-                    'format': 'text'
-                }
-                
-                async with session.post(url, json=data) as resp:
-                    if resp.status == 200:
-                        result = await resp.json()
-                        translated = result['translatedText']
-                        
-                        embed = discord.Embed(
-                            title="🌍 Translation",
-                            color=discord.Color.blue()
-                        )
-                        embed.add_field(name="Original", value=text, inline=False)
-                        embed.add_field(name=f"Translated ({target_language.upper()})", value=translated, inline=False)
-                        
-                        await interaction.followup.send(embed=embed)
-                    else:
-                        await interaction.followup.send("❌ Translation failed. Check language code!")
-        except Exception as e:
-            await interaction.followup.send(f"❌ Error: {str(e)}")
+            translated = await self.translator.translate(text, 'auto', target_language.lower())
+        except TranslationError as e:
+            await interaction.followup.send(f"❌ {e}")
+            return
+        
+        embed = discord.Embed(
+            title="🌍 Translation",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Original", value=text, inline=False)
+        embed.add_field(name=f"Translated ({target_language.upper()})", value=translated, inline=False)
+        
+        await interaction.followup.send(embed=embed)
     
     @app_commands.command(name="calculate", description="Perform calculations")
-    @app_commands.describe(expression="Mathematical expression (e.g., 2+2, 5*10)")
+    @app_commands.describe(expression="e.g. 2^10, sqrt(2)*pi, r = 3; pi * r^2, ans / 2, 5 km to mi")
     async def calculate(self, interaction: discord.Interaction, expression: str):
         """Safe calculator"""
-        # Remove dangerous characters
-        safe_expr = ''.join(c for c in expression if c in '0123456789+-*/().^ ')
-        safe_expr = safe_expr.replace('^', '**')
-        
+        # Parsed and evaluated under size, complexity and time limits; never eval()'d
+        variables = self.calculator_variables.get(interaction.user.id) or {}
         try:
-            result = eval(safe_expr, {"__builtins__": {}}, {})
-            
-            embed = discord.Embed(
-                title="🧮 Calculator",
-                color=discord.Color.blue()
-            )
-            embed.add_field(name="Expression", value=f"`{expression}`", inline=False)
-            embed.add_field(name="Result", value=f"```{result}```", inline=False)
-            
-            await interaction.response.send_message(embed=embed)
-        except Exception as e:
-            await interaction.response.send_message(f"❌ Invalid expression: {str(e)}", ephemeral=True)
+            result, unit = calculate(expression, variables)
+        except CalculatorError as e:
+            await interaction.response.send_message(f"❌ Invalid expression: {e}", ephemeral=True)
+            return
+        self.calculator_variables.set(interaction.user.id, variables)
+        
+        embed = discord.Embed(
+            title="🧮 Calculator",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Expression", value=f"`{expression}`", inline=False)
+        embed.add_field(name="Result", value=f"```{format_number(result)}{f' {unit}' if unit else ''}```", inline=False)
+        
+        saved = sorted(name for name in variables if name != 'ans')
+        if saved:
+            embed.set_footer(text=f"Variables: {', '.join(saved)} • use 'ans' for the last result")
+        
+        await interaction.response.send_message(embed=embed)
     
     @app_commands.command(name="userinfo", description="Get information about a user")
     @app_commands.describe(user="User to get info about (leave empty for yourself)")
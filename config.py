@@ -16,6 +16,25 @@ class Config:
     STEAM_API_KEY = os.getenv('STEAM_API_KEY', '')
     FORMULA1_API_KEY = os.getenv('FORMULA1_API_KEY', '')
     
+    # Steam Cache Settings (seconds per endpoint)
+    STEAM_CACHE_SIZE = int(os.getenv('STEAM_CACHE_SIZE', 1000))  # entries per endpoint
+    STEAM_VANITY_TTL = int(os.getenv('STEAM_VANITY_TTL', 86400))
+    STEAM_SUMMARY_TTL = int(os.getenv('STEAM_SUMMARY_TTL', 60))
+    STEAM_GAMES_TTL = int(os.getenv('STEAM_GAMES_TTL', 3600))
+    STEAM_RECENT_TTL = int(os.getenv('STEAM_RECENT_TTL', 300))
+    STEAM_LEVEL_TTL = int(os.getenv('STEAM_LEVEL_TTL', 3600))
+    STEAM_BANS_TTL = int(os.getenv('STEAM_BANS_TTL', 3600))
+    STEAM_PROFILE_DEADLINE = float(os.getenv('STEAM_PROFILE_DEADLINE', 4.0))  # seconds for all profile calls
+    
+    # Playtime Tracking
+    PLAYTIME_FLUSH_SECONDS = int(os.getenv('PLAYTIME_FLUSH_SECONDS', 300))
+    
+    # Game Deals
+    DEAL_SOURCE = os.getenv('DEAL_SOURCE', 'cheapshark')
+    DEAL_FEED_PATH = os.getenv('DEAL_FEED_PATH', '')  # local JSON feed, overrides DEAL_SOURCE
+    DEAL_PAGES = int(os.getenv('DEAL_PAGES', 5))
+    DEAL_REFRESH_MINUTES = int(os.getenv('DEAL_REFRESH_MINUTES', 60))
+    
     # Bot Settings
     DEBUG_MODE = os.getenv('DEBUG_MODE', 'False') == 'True'
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
@@ -32,6 +51,60 @@ class Config:
     # Study Settings
     DEFAULT_STUDY_DURATION = int(os.getenv('DEFAULT_STUDY_DURATION', 25))
     DEFAULT_BREAK_DURATION = int(os.getenv('DEFAULT_BREAK_DURATION', 5))
+    DEFAULT_LONG_BREAK_DURATION = int(os.getenv('DEFAULT_LONG_BREAK_DURATION', 15))
+    POMODORO_LONG_BREAK_EVERY = int(os.getenv('POMODORO_LONG_BREAK_EVERY', 4))  # work phases per long break
+    POMODORO_MAX_CYCLES = int(os.getenv('POMODORO_MAX_CYCLES', 8))
+    HOMEWORK_DIGEST_HOUR = int(os.getenv('HOMEWORK_DIGEST_HOUR', 8))  # UTC hour for the daily homework DM
+    HOMEWORK_DIGEST_DAYS = int(os.getenv('HOMEWORK_DIGEST_DAYS', 3))  # include work due within this many days
+    STUDY_FLUSH_SECONDS = int(os.getenv('STUDY_FLUSH_SECONDS', 300))  # how often voice study time is saved
+    
+    # HTTP Client Settings
+    HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 100))  # total open connections
+    HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', 10))
+    HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))  # seconds
+    HTTP_TIMEOUT = float(os.getenv('HTTP_TIMEOUT', 10))  # seconds per request
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+    HTTP_HOST_CONCURRENCY = int(os.getenv('HTTP_HOST_CONCURRENCY', 8))  # in-flight requests per host
+    HTTP_QUEUE_TIMEOUT = float(os.getenv('HTTP_QUEUE_TIMEOUT', 1.0))  # max wait for a free slot
+    HTTP_BREAKER_THRESHOLD = int(os.getenv('HTTP_BREAKER_THRESHOLD', 5))  # consecutive failures to open
+    HTTP_BREAKER_RESET = float(os.getenv('HTTP_BREAKER_RESET', 30))  # seconds before a probe request
+    HTTP_HEDGE_DELAY = float(os.getenv('HTTP_HEDGE_DELAY', 1.0))  # seconds until a hedged retry
+    HTTP_STALE_TTL = int(os.getenv('HTTP_STALE_TTL', 3600))  # seconds to keep last good responses
+    
+    # Chart Settings
+    CHART_CACHE_TTL = int(os.getenv('CHART_CACHE_TTL', 300))  # seconds
+    CHART_WORKERS = int(os.getenv('CHART_WORKERS', 1))
+    
+    # History Backfill Settings
+    BACKFILL_CHUNK_SIZE = int(os.getenv('BACKFILL_CHUNK_SIZE', 500))
+    BACKFILL_DELAY = float(os.getenv('BACKFILL_DELAY', 2.0))  # seconds between chunks
+    BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', 2))  # channels walked at once
+    
+    # Content Prefetch Settings (/joke, /meme, /trivia)
+    PREFETCH_SIZE = int(os.getenv('PREFETCH_SIZE', 10))  # items buffered per category
+    PREFETCH_LOW_WATERMARK = int(os.getenv('PREFETCH_LOW_WATERMARK', 3))  # refill below this
+    CONTENT_FIXTURES = os.getenv('CONTENT_FIXTURES', '')  # local JSON served instead of the APIs
+    
+    # Translation Settings
+    TRANSLATE_BACKEND = os.getenv('TRANSLATE_BACKEND', 'libretranslate')  # libretranslate or stub
+    TRANSLATE_URL = os.getenv('TRANSLATE_URL', 'https://libretranslate.com/translate')  # or a self-hosted instance
+    TRANSLATE_API_KEY = os.getenv('TRANSLATE_API_KEY', '')
+    TRANSLATE_CACHE_SIZE = int(os.getenv('TRANSLATE_CACHE_SIZE', 2000))  # in-memory entries
+    TRANSLATE_BATCH_WINDOW = float(os.getenv('TRANSLATE_BATCH_WINDOW', 0.05))  # seconds to gather a batch
+    TRANSLATE_BATCH_SIZE = int(os.getenv('TRANSLATE_BATCH_SIZE', 20))  # texts per backend call
+    
+    # Poll Settings
+    POLL_REFRESH_SECONDS = float(os.getenv('POLL_REFRESH_SECONDS', 5))  # minimum gap between results edits
+    POLL_FLUSH_SECONDS = int(os.getenv('POLL_FLUSH_SECONDS', 10))  # how often ballots are written to the database
+    POLL_MAX_DURATION = int(os.getenv('POLL_MAX_DURATION', 10080))  # minutes (1 week)
+    
+    # Tournament Settings
+    TOURNAMENT_MAX_PLAYERS = int(os.getenv('TOURNAMENT_MAX_PLAYERS', 4096))  # per bracket (round robin caps at 64)
+    RATING_DEFAULT = float(os.getenv('RATING_DEFAULT', 1500))  # Elo for a player's first game
+    RATING_K_FACTOR = float(os.getenv('RATING_K_FACTOR', 24))  # max points moved per game
+    RATING_PROVISIONAL_GAMES = int(os.getenv('RATING_PROVISIONAL_GAMES', 10))  # games at double K
+    BRACKET_IMAGE_MAX_PLAYERS = int(os.getenv('BRACKET_IMAGE_MAX_PLAYERS', 256))  # larger brackets stay text-only
+    BRACKET_AVATAR_MAX_PLAYERS = int(os.getenv('BRACKET_AVATAR_MAX_PLAYERS', 128))  # avatars drawn up to this size
     
     # Server Settings
     DEFAULT_WELCOME_CHANNEL = os.getenv('DEFAULT_WELCOME_CHANNEL', 'general')
@@ -0,0 +1,33 @@
+import asyncio
+
+from utils.database import Database
+
+
+def test_backfill_starts_at_the_first_live_message(tmp_path):
+    async def scenario():
+        db = Database(str(tmp_path / 'test.db'))
+        await db.init_db()
+
+        await db.add_message_activity([(1, 10, 100, '2026-05-01 12:00', 3)], [(1, 10, 5000)])
+        # Later flushes never move the starting point
+        await db.add_message_activity([(1, 10, 100, '2026-05-01 13:00', 1)], [(1, 10, 6000)])
+        assert await db.get_first_tracked_message(10) == 5000
+
+    asyncio.run(scenario())
+
+
+def test_channels_tracked_before_recording_have_no_first_message(tmp_path):
+    async def scenario():
+        db = Database(str(tmp_path / 'test.db'))
+        await db.init_db()
+
+        await db.add_message_activity([(1, 20, 100, '2026-05-01 12:00', 4)])
+        await db.add_message_activity([(1, 20, 100, '2026-05-01 13:00', 2)], [(1, 20, 7000)])
+        assert await db.get_first_tracked_message(20) is None
+
+        # Their first hour is re-imported whole, replacing the partial live count
+        await db.start_backfill(1, 20, 123, replace_hour='2026-05-01 12:00')
+        await db.save_backfill_chunk(20, [(1, 20, 100, '2026-05-01 12:00', 9)], 100, 9, 'completed')
+        assert (await db.get_channel_activity(1, 20))['total'] == 11
+
+    asyncio.run(scenario())
@@ -0,0 +1,122 @@
+import random
+
+import pytest
+
+from utils.brackets import BYE, Bracket, BracketError, seed_order
+
+
+def play_out(bracket, pick=min):
+    """Report every open match until the bracket finishes; pick chooses the winner"""
+    while not bracket.is_complete:
+        open_matches = bracket.open_matches()
+        assert open_matches, "bracket stalled with results missing"
+        match = open_matches[0]
+        bracket.report(match.id, pick(match.players))
+    return bracket.champion
+
+
+def test_seed_order_pairs_top_seeds_last():
+    assert seed_order(8) == [1, 8, 4, 5, 2, 7, 3, 6]
+
+
+@pytest.mark.parametrize("count", [2, 3, 5, 8, 13])
+def test_single_elimination_byes_and_champion(count):
+    players = list(range(1, count + 1))
+    bracket = Bracket.create('single', players)
+
+    # Byes resolve themselves, so only real pairings wait for a result
+    first_round = [match for match in bracket.matches.values() if match.round == 1]
+    assert sum(match.is_bye for match in first_round) == (1 << (count - 1).bit_length()) - count
+    assert all(match.winner not in (None, BYE) for match in first_round if match.is_bye)
+
+    # Lower ids are better seeds and win every match
+    assert play_out(bracket) == 1
+
+
+def test_report_advances_the_winner():
+    bracket = Bracket.create('single', [10, 20, 30, 40])
+    match = bracket.open_matches()[0]
+    changed = bracket.report(match.id, match.players[1])
+    following = bracket.matches[match.next_match]
+    assert following in changed
+    assert following.players[match.next_slot] == match.players[1]
+
+
+def test_report_rejects_bad_results():
+    bracket = Bracket.create('single', [1, 2, 3, 4])
+    match = bracket.open_matches()[0]
+    with pytest.raises(BracketError):
+        bracket.report(match.id, 99)
+    bracket.report(match.id, match.players[0])
+    with pytest.raises(BracketError):
+        bracket.report(match.id, match.players[0])
+    with pytest.raises(BracketError):
+        bracket.report(len(bracket.matches), 1)  # Final still waiting for players
+    with pytest.raises(BracketError):
+        bracket.report(999, 1)
+
+
+@pytest.mark.parametrize("count", [2, 3, 6, 8, 11])
+def test_double_elimination_needs_two_losses(count):
+    players = list(range(1, count + 1))
+    rng = random.Random(count)
+    bracket = Bracket.create('double', players)
+    champion = play_out(bracket, pick=lambda pair: rng.choice(pair))
+
+    losses = {player: 0 for player in players}
+    for match in bracket.matches.values():
+        if match.loser not in (None, BYE):
+            losses[match.loser] += 1
+    assert champion in players
+    assert losses[champion] <= 1
+    assert all(losses[player] == 2 for player in players if player != champion)
+
+
+def test_double_elimination_reset_when_losers_side_wins():
+    bracket = Bracket.create('double', [1, 2, 3, 4])
+    # The second slot always wins, so the losers-bracket finalist takes the grand final
+    champion = play_out(bracket, pick=lambda players: players[1])
+    final = next(match for match in bracket.matches.values() if match.section == 'final')
+    reset = bracket.matches[final.next_match]
+    assert final.winner == final.players[1]
+    assert reset.players == final.players
+    assert champion == reset.winner == final.players[1]
+
+
+def test_round_robin_everyone_meets_once():
+    players = [1, 2, 3, 4, 5]
+    bracket = Bracket.create('round_robin', players)
+    pairs = [frozenset(match.players) for match in bracket.matches.values()]
+    assert len(pairs) == len(set(pairs)) == 10
+    assert play_out(bracket) == 1
+    assert bracket.standings()[0][:2] == (1, 4)
+
+
+def test_swiss_pairs_each_round_after_the_last_result():
+    bracket = Bracket.create('swiss', list(range(1, 8)))
+    assert bracket.rounds == 3
+    assert play_out(bracket) == 1
+    assert max(match.round for match in bracket.matches.values()) == 3
+    # Everyone gets at most one bye
+    byes = [match.winner for match in bracket.matches.values() if match.is_bye]
+    assert len(byes) == len(set(byes)) == 3
+
+
+@pytest.mark.parametrize("count", [5, 9, 12, 16, 17, 33, 64])
+@pytest.mark.parametrize("seed", range(25))
+def test_swiss_never_repeats_a_pairing(count, seed):
+    rng = random.Random(seed)
+    bracket = Bracket.create('swiss', list(range(1, count + 1)))
+    play_out(bracket, pick=lambda players: rng.choice(players))
+    pairings = [frozenset(match.players) for match in bracket.matches.values() if not match.is_bye]
+    assert len(pairings) == len(set(pairings))
+
+
+def test_rows_round_trip():
+    bracket = Bracket.create('double', [1, 2, 3, 4, 5])
+    match = bracket.open_matches()[0]
+    bracket.report(match.id, match.players[0])
+    restored = Bracket.from_rows('double', bracket.players, bracket.rows())
+    assert restored.rows() == bracket.rows()
+    assert restored.unfinished == bracket.unfinished
+    assert play_out(restored) == play_out(bracket)
@@ -0,0 +1,54 @@
+import time
+
+import pytest
+
+from utils.calculator import MAX_ROUND_DIGITS, CalculatorError, calculate, format_number
+
+
+def test_arithmetic_and_variables():
+    variables = {}
+    assert calculate("r = 3; 2 ^ 10", variables) == (1024, None)
+    assert variables == {'r': 3, 'ans': 1024}
+    assert calculate("ans / r", variables)[0] == pytest.approx(1024 / 3)
+
+
+def test_unit_conversion():
+    value, unit = calculate("5 km to mi")
+    assert unit == 'mi'
+    assert value == pytest.approx(3.10686, rel=1e-5)
+    assert calculate("100 c to f")[0] == pytest.approx(212)
+
+
+@pytest.mark.parametrize("expression", [
+    "9 ^ 9 ^ 9",
+    "2 ^ 5000",
+    "factorial(501)",
+    "2 ^ 4000 * 2 ^ 4000",
+    "1 +" * 100 + "1",
+    "__import__('os')",
+    "'text'",
+    "5 kg to km",
+])
+def test_limits_reject_expensive_or_unsafe_input(expression):
+    with pytest.raises(CalculatorError):
+        calculate(expression)
+
+
+@pytest.mark.parametrize("expression", ["round(1, -10**8)", "round(1, 10**8)", "round(1, -2*10**6)"])
+def test_round_digits_are_bounded(expression):
+    started = time.monotonic()
+    with pytest.raises(CalculatorError):
+        calculate(expression)
+    assert time.monotonic() - started < 0.1
+
+
+def test_round_within_limits():
+    assert calculate("round(2.567, 2)")[0] == 2.57
+    assert calculate("round(12345, -2)")[0] == 12300
+    assert calculate(f"round(1, -{MAX_ROUND_DIGITS})")[0] == 0
+
+
+def test_format_number():
+    assert format_number(1234567) == "1,234,567"
+    assert format_number(2.0) == "2"
+    assert format_number(10 ** 40) == "1.00000000000e+40"
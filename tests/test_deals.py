@@ -0,0 +1,66 @@
+import asyncio
+import json
+
+from utils.database import Database
+from utils.deals import DealSource, JSONFileDealSource, normalize_deal, trigram_query
+
+
+class FixtureDealSource(DealSource):
+    name = 'fixture'
+
+    def __init__(self, deals):
+        self.deals = deals
+
+    async def fetch(self):
+        return [normalize_deal(deal, store='Fixture Store') for deal in self.deals]
+
+
+def test_normalize_deal_fills_defaults():
+    deal = normalize_deal({'title': 'Hades', 'price': '5', 'regular_price': '20'}, store='Steam')
+    assert deal == {
+        'deal_id': 'Steam:Hades',
+        'title': 'Hades',
+        'store': 'Steam',
+        'price': 5.0,
+        'regular_price': 20.0,
+        'savings': 75.0,
+        'url': ''
+    }
+
+
+def test_json_file_source(tmp_path):
+    path = tmp_path / 'deals.json'
+    path.write_text(json.dumps([{'title': 'Celeste', 'price': 4.99, 'store': 'GOG'}]), encoding='utf-8')
+    deals = asyncio.run(JSONFileDealSource(str(path)).fetch())
+    assert [(deal['title'], deal['store'], deal['savings']) for deal in deals] == [('Celeste', 'GOG', 0.0)]
+
+
+def test_trigram_query():
+    assert trigram_query('Hades!') == '"ade" OR "des" OR "had"'
+    assert trigram_query('ab') == ''
+
+
+def test_index_search_and_expiry(tmp_path):
+    async def scenario():
+        db = Database(str(tmp_path / 'test.db'))
+        await db.init_db()
+        source = FixtureDealSource([
+            {'title': 'The Witcher 3: Wild Hunt', 'price': 9.99, 'regular_price': 39.99},
+            {'title': 'Stardew Valley', 'price': 11.99}
+        ])
+        assert await db.ingest_deals(source.name, await source.fetch()) == 2
+
+        # A misspelled title still finds the deal through the trigram index (or LIKE without FTS5)
+        query = 'witcher' if not db.deal_fts else 'witchr 3'
+        found = await db.search_deals(trigram_query(query), query)
+        assert found[0]['title'] == 'The Witcher 3: Wild Hunt'
+        assert found[0]['store'] == 'Fixture Store'
+
+        # The next snapshot no longer lists Stardew Valley, so it expires
+        await asyncio.sleep(0.01)
+        source.deals = source.deals[:1]
+        await db.ingest_deals(source.name, await source.fetch())
+        assert await db.search_deals(trigram_query('stardew'), 'stardew') == []
+        assert (await db.get_deal_index_info())['count'] == 1
+
+    asyncio.run(scenario())
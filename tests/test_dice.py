@@ -0,0 +1,83 @@
+from itertools import product
+
+import numpy as np
+import pytest
+
+from utils.dice import MAX_EXPLOSIONS, DiceError, distribution, parse_dice, roll_dice, summarize, total_range
+
+
+@pytest.mark.parametrize("expression", [
+    "", "2d1", "0d6", "3d6k4", "4d6dl4", "2x6", "d10001",
+    "1d6+" + "9" * 5000, "9" * 5000 + "d6", "1d6+1234567890"
+])
+def test_parse_rejects_bad_notation(expression):
+    with pytest.raises(DiceError):
+        parse_dice(expression)
+
+
+def test_parse_keep_and_drop():
+    assert parse_dice("4d6dl1")[0].keep == ('high', 3)
+    assert parse_dice("2d20kh1")[0].keep == ('high', 1)
+    assert parse_dice("2d20kl")[0].keep == ('low', 1)
+    assert [str(term) for term in parse_dice("d%-2")] == ["+1d100", "-2"]
+
+
+def test_two_d_six_distribution():
+    low, probs = distribution(parse_dice("2d6"))
+    assert low == 2
+    assert np.allclose(probs * 36, [1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1])
+
+
+@pytest.mark.parametrize("expression", ["4d6dl1", "3d8kl2", "2d20kh1", "3d4dh1"])
+def test_keep_distribution_matches_enumeration(expression):
+    term = parse_dice(expression)[0]
+    how, amount = term.keep
+    totals = []
+    for outcome in product(range(1, term.sides + 1), repeat=term.count):
+        ordered = sorted(outcome)
+        totals.append(sum(ordered[-amount:] if how == 'high' else ordered[:amount]))
+    expected = np.bincount(totals)[min(totals):] / len(totals)
+
+    low, probs = distribution([term])
+    assert low == min(totals)
+    assert np.allclose(probs, expected)
+
+
+def test_large_pools_use_the_fft_path():
+    low, probs = distribution(parse_dice("500d6+10"))
+    assert low == 510
+    assert probs.sum() == pytest.approx(1)
+    assert np.dot(np.arange(low, low + len(probs)), probs) == pytest.approx(500 * 3.5 + 10)
+
+
+def test_subtracted_terms_mirror_the_distribution():
+    low, probs = distribution(parse_dice("1d4-1d6"))
+    assert low == -5
+    assert len(probs) == 9
+    assert np.allclose(probs, probs[::-1])
+
+
+def test_total_range_is_exact():
+    assert total_range(parse_dice("5d10000")) == (5, 50000)
+    assert total_range(parse_dice("6d6!")) == (6, 6 * 6 * (MAX_EXPLOSIONS + 1))
+    assert total_range(parse_dice("4d6dl1+2")) == (5, 20)
+    assert total_range(parse_dice("3d8-1d4-1")) == (-2, 22)
+
+
+def test_summary_likely_range_sits_inside_the_true_range():
+    terms = parse_dice("5d10000")
+    low, probs = distribution(terms)
+    summary = summarize(low, probs, 25000)
+    lowest, highest = total_range(terms)
+    assert lowest < summary['likely_min'] < summary['mean'] < summary['likely_max'] < highest
+    assert summary['at_least'] + summary['at_most'] == pytest.approx(1 + probs[25000 - low])
+
+
+def test_rolls_stay_in_range():
+    for expression in ["2d20kh1+5", "10d6!", "3d8+2d6-1", "20000d6"]:
+        terms = parse_dice(expression)
+        lowest, highest = total_range(terms)
+        for _ in range(20):
+            total, results = roll_dice(terms)
+            assert lowest <= total <= highest
+            assert len(results) == len(terms)
@@ -0,0 +1,44 @@
+import asyncio
+from types import SimpleNamespace
+
+from utils.games import GameSession, Round
+
+
+def message(author_id, content):
+    return SimpleNamespace(author=SimpleNamespace(id=author_id), content=content)
+
+
+async def open_session(round):
+    session = GameSession(channel=None, host_id=1, draw=None)
+    session.round = round
+    session._winner = asyncio.get_running_loop().create_future()
+    return session
+
+
+def test_free_answer_ignores_other_messages():
+    async def scenario():
+        session = await open_session(Round("Quiz", "What is 5 + 7?", "12"))
+        session.streaks[7] = 3
+        assert not session.handle(message(7, "!help"))
+        assert not session.handle(message(7, "is it 13?"))
+        assert session.streaks[7] == 3
+        assert not session._winner.done()
+
+        assert session.handle(message(8, " 12 "))
+        assert session._winner.result().id == 8
+
+    asyncio.run(scenario())
+
+
+def test_multiple_choice_allows_one_guess():
+    async def scenario():
+        session = await open_session(Round("Trivia", "Largest planet?", "Jupiter", ["Mars", "Jupiter", "Venus", "Earth"]))
+        session.streaks[7] = 2
+        assert not session.handle(message(7, "hello"))
+        assert session.handle(message(7, "a"))
+        assert session.streaks[7] == 0
+        assert not session.handle(message(7, "b"))  # Already guessed this round
+        assert session.handle(message(8, "B"))
+        assert session._winner.result().id == 8
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+
+from utils.prefetch import ContentSource, FixtureSource, Prefetcher
+
+JOKES = [{'id': n, 'setup': f"Joke {n}", 'punchline': '...'} for n in range(1, 9)]
+
+
+class FailingSource(ContentSource):
+    name = 'failing'
+
+    async def fetch(self, category):
+        raise RuntimeError("API down")
+
+
+def test_fixture_source_falls_back_to_default():
+    source = FixtureSource('jokes', {'default': JOKES[:2]})
+    items = asyncio.run(source.fetch('programming'))
+    assert sorted(item['id'] for item in items) == [1, 2]
+
+
+def test_fixture_source_from_file(tmp_path):
+    path = tmp_path / 'fixtures.json'
+    path.write_text('{"jokes": {"general": [{"id": 1}]}, "memes": {}}', encoding='utf-8')
+    assert FixtureSource.from_file('jokes', str(path)).items == {'general': [{'id': 1}]}
+    assert FixtureSource.from_file('trivia', str(path)).items == {}
+
+
+def test_warm_buffer_serves_without_waiting():
+    async def scenario():
+        prefetcher = Prefetcher(FixtureSource('jokes', {'general': JOKES}), capacity=5, low_watermark=2)
+        prefetcher.warm(['general'])
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert prefetcher.stats()['buffered'] == {'general': 5}
+
+        served = [prefetcher.pop('general')['id'] for _ in range(3)]
+        assert len(set(served)) == 3
+        assert prefetcher.stats()['hit_rate'] == 1.0
+        prefetcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_items_are_not_repeated_within_history():
+    async def scenario():
+        prefetcher = Prefetcher(FixtureSource('jokes', {'general': JOKES}), capacity=10, low_watermark=10, retry_after=0)
+        seen = []
+        for _ in range(len(JOKES)):
+            item = await prefetcher.get('general', timeout=1)
+            seen.append(item['id'])
+        assert sorted(seen) == sorted(joke['id'] for joke in JOKES)
+        prefetcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_cold_get_waits_for_refill():
+    async def scenario():
+        prefetcher = Prefetcher(FixtureSource('jokes', {'general': JOKES[:1]}))
+        item = await prefetcher.get('general', timeout=1)
+        assert item['id'] == 1
+        assert prefetcher.stats()['served'] == 1 and prefetcher.stats()['empty'] == 0
+        prefetcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_failed_refill_backs_off():
+    async def scenario():
+        prefetcher = Prefetcher(FailingSource(), retry_after=60)
+        assert await prefetcher.get('general', timeout=1) is None
+        assert prefetcher.pop('general') is None
+        await asyncio.sleep(0)
+        # The cooldown stops a second fetch from being scheduled
+        assert prefetcher.stats()['refill_errors'] == 1
+        assert prefetcher.stats()['empty'] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from utils.sessions import SessionTracker
+
+KEY = (1, 42)
+
+
+def test_sessions_split_at_midnight():
+    tracker = SessionTracker()
+    tracker.open(KEY, datetime(2026, 5, 1, 23, 30))
+    tracker.close(KEY, datetime(2026, 5, 2, 0, 45))
+    assert sorted(tracker.drain(datetime(2026, 5, 2, 1, 0))) == [
+        (1, 42, '2026-05-01', 1800),
+        (1, 42, '2026-05-02', 2700)
+    ]
+
+
+def test_multi_day_session():
+    tracker = SessionTracker()
+    tracker.open(KEY, datetime(2026, 5, 1, 12, 0))
+    tracker.close(KEY, datetime(2026, 5, 3, 6, 0))
+    rows = dict(((day, seconds) for *_, day, seconds in tracker.drain(datetime(2026, 5, 3, 6, 0))))
+    assert rows == {'2026-05-01': 43200, '2026-05-02': 86400, '2026-05-03': 21600}
+
+
+def test_drain_checkpoints_open_sessions():
+    tracker = SessionTracker()
+    tracker.open(KEY, datetime(2026, 5, 1, 10, 0))
+    tracker.open(KEY, datetime(2026, 5, 1, 10, 30))  # Already open: ignored
+    assert tracker.drain(datetime(2026, 5, 1, 11, 0)) == [(1, 42, '2026-05-01', 3600)]
+    assert tracker.is_open(KEY) and tracker.open_sessions == 1
+
+    tracker.close(KEY, datetime(2026, 5, 1, 11, 10))
+    assert tracker.drain(datetime(2026, 5, 1, 11, 10)) == [(1, 42, '2026-05-01', 600)]
+    assert tracker.open_sessions == 0
+
+
+def test_sub_second_time_is_kept_for_the_next_drain():
+    tracker = SessionTracker()
+    tracker.open(KEY, datetime(2026, 5, 1, 10, 0, 0))
+    assert tracker.drain(datetime(2026, 5, 1, 10, 0, 0, 600000)) == []
+    assert tracker.drain(datetime(2026, 5, 1, 10, 0, 1, 200000)) == [(1, 42, '2026-05-01', 1)]
+    assert tracker.drain(datetime(2026, 5, 1, 10, 0, 2, 0)) == [(1, 42, '2026-05-01', 1)]
+
+
+def test_restore_after_failed_write():
+    tracker = SessionTracker()
+    tracker.open(KEY, datetime(2026, 5, 1, 10, 0))
+    rows = tracker.drain(datetime(2026, 5, 1, 10, 5))
+    tracker.restore(rows)
+    assert tracker.drain(datetime(2026, 5, 1, 10, 10)) == [(1, 42, '2026-05-01', 600)]
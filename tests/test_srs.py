@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.srs import GRADES, MAX_FIELD_LENGTH, RELEARN_DELAY, format_due, next_due, parse_deck_csv, sm2
+
+
+def test_sm2_first_reviews():
+    ease, interval, repetitions = sm2(2.5, 0, 0, GRADES['Good'])
+    assert (interval, repetitions) == (1, 1)
+    assert ease == pytest.approx(2.5)
+
+    ease, interval, repetitions = sm2(ease, interval, repetitions, GRADES['Good'])
+    assert (interval, repetitions) == (6, 2)
+
+    ease, interval, repetitions = sm2(ease, interval, repetitions, GRADES['Easy'])
+    assert ease == pytest.approx(2.6)
+    assert (interval, repetitions) == (16, 3)
+
+
+def test_sm2_lapse_resets_progress():
+    ease, interval, repetitions = sm2(2.5, 30, 5, GRADES['Again'])
+    assert (interval, repetitions) == (0, 0)
+    assert ease == pytest.approx(1.96)
+
+
+def test_sm2_ease_has_a_floor_and_intervals_grow():
+    ease, interval, repetitions = 1.3, 10, 4
+    for _ in range(5):
+        ease, next_interval, repetitions = sm2(ease, interval, repetitions, GRADES['Hard'])
+        assert ease == 1.3
+        assert next_interval > interval
+        interval = next_interval
+
+
+def test_due_dates():
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    assert next_due(now, 0) == now + RELEARN_DELAY
+    assert next_due(now, 6) == now + timedelta(days=6)
+    assert format_due(now) == "2026-03-01T12:00:00"
+
+
+def test_parse_deck_csv():
+    data = "\ufefffront,back\nhola,hello\n\n  gato , cat \n".encode('utf-8')
+    assert parse_deck_csv(data) == [('hola', 'hello'), ('gato', 'cat')]
+
+
+@pytest.mark.parametrize("data", [b"hola\n", b"hola,\n", ("x" * (MAX_FIELD_LENGTH + 1) + ",y").encode()])
+def test_parse_deck_csv_rejects_bad_rows(data):
+    with pytest.raises(ValueError):
+        parse_deck_csv(data)
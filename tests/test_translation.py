@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from utils.translation import StubBackend, TranslationError, TranslationService, normalize_text, text_hash
+
+
+class MemoryStore:
+    """Stands in for the database's translation cache"""
+
+    def __init__(self):
+        self.rows = {}
+
+    async def get_translation(self, key_hash, source, target):
+        return self.rows.get((key_hash, source, target))
+
+    async def save_translations(self, rows):
+        for key_hash, source, target, translated in rows:
+            self.rows[(key_hash, source, target)] = translated
+
+
+class CountingBackend(StubBackend):
+    def __init__(self):
+        self.calls = []
+
+    async def translate_batch(self, texts, source, target):
+        self.calls.append(list(texts))
+        return await super().translate_batch(texts, source, target)
+
+
+class BrokenBackend(StubBackend):
+    async def translate_batch(self, texts, source, target):
+        raise RuntimeError("backend offline")
+
+
+def test_normalized_text_shares_a_cache_key():
+    assert normalize_text("  hello\n  world ") == "hello world"
+    assert text_hash("hello  world") == text_hash("hello world")
+
+
+def test_concurrent_requests_share_one_batch():
+    async def scenario():
+        backend = CountingBackend()
+        service = TranslationService(backend, MemoryStore(), batch_window=0.01)
+        results = await asyncio.gather(
+            service.translate("hello", 'en', 'es'),
+            service.translate("hello ", 'en', 'es'),
+            service.translate("goodbye", 'en', 'es')
+        )
+        assert results == ["[es] hello", "[es] hello", "[es] goodbye"]
+        assert backend.calls == [["hello", "goodbye"]]
+        assert service.stats()['coalesced'] == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_batch_is_sent_without_waiting():
+    async def scenario():
+        backend = CountingBackend()
+        service = TranslationService(backend, MemoryStore(), batch_window=10, batch_size=2)
+        results = await asyncio.wait_for(
+            asyncio.gather(service.translate("one", 'en', 'fr'), service.translate("two", 'en', 'fr')),
+            timeout=1
+        )
+        assert results == ["[fr] one", "[fr] two"]
+
+    asyncio.run(scenario())
+
+
+def test_memory_and_database_caches():
+    async def scenario():
+        store = MemoryStore()
+        backend = CountingBackend()
+        service = TranslationService(backend, store, batch_window=0)
+        await service.translate("hello", 'en', 'de')
+        await service.translate("hello", 'en', 'de')
+        assert service.stats()['memory_hits'] == 1
+
+        # A fresh service (e.g. after a restart) reads the stored translation
+        restarted = TranslationService(backend, store, batch_window=0)
+        assert await restarted.translate("hello", 'en', 'de') == "[de] hello"
+        assert restarted.stats()['db_hits'] == 1
+        assert len(backend.calls) == 1
+
+    asyncio.run(scenario())
+
+
+def test_backend_errors_reach_every_waiter():
+    async def scenario():
+        service = TranslationService(BrokenBackend(), MemoryStore(), batch_window=0)
+        results = await asyncio.gather(
+            service.translate("a", 'en', 'es'),
+            service.translate("b", 'en', 'es'),
+            return_exceptions=True
+        )
+        assert all(isinstance(result, TranslationError) for result in results)
+
+        # Failures are not cached
+        with pytest.raises(TranslationError):
+            await service.translate("a", 'en', 'es')
+
+    asyncio.run(scenario())
@@ -0,0 +1,515 @@
+"""
+Bracket images for MegaBot
+Draws tournament brackets with Pillow on a worker thread, keeping each tournament's canvas
+so a new result only repaints the matches it changed
+"""
+
+import asyncio
+import io
+import logging
+import math
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from utils.brackets import BYE, FORMATS, Bracket
+
+logger = logging.getLogger('MegaBot.BracketImages')
+
+# Same palette as the charts
+BACKGROUND = (43, 45, 49)
+BOX = (56, 58, 64)
+BOX_WINNER = (30, 75, 60)
+FOREGROUND = (219, 222, 225)
+MUTED = (128, 132, 142)
+LINE = (78, 80, 88)
+ACCENT = (0, 217, 255)
+WIN = (35, 134, 80)
+LOSS = (150, 50, 55)
+
+BOX_WIDTH = 210
+ROW_HEIGHT = 22
+BOX_HEIGHT = ROW_HEIGHT * 2
+ID_WIDTH = 32  # Match number column inside each box
+AVATAR = 18
+V_GAP = 10
+H_GAP = 44
+COLUMN = BOX_WIDTH + H_GAP
+SLOT = BOX_HEIGHT + V_GAP
+MARGIN = 24
+HEADER = 64
+LABEL = 22  # Column and section headings
+CELL = 24  # Round robin grid
+NAME_WIDTH = 170
+RECORD_WIDTH = 64
+MIN_WIDTH = 520
+
+
+def _palette() -> Image.Image:
+    """Fixed 256-colour palette: the theme, a colour cube for avatars and a grey ramp for text edges.
+
+    Canvases are kept in this palette because an 8-bit PNG encodes several times faster than RGB,
+    and every canvas shares it, so painted tiles paste straight in.
+    """
+    colors = [BACKGROUND, BOX, BOX_WINNER, FOREGROUND, MUTED, LINE, ACCENT, WIN, LOSS]
+    colors += [(r * 51, g * 51, b * 51) for r in range(6) for g in range(6) for b in range(6)]
+    greys = 256 - len(colors)
+    colors += [(value, value, value) for value in (round(index * 255 / (greys - 1)) for index in range(greys))]
+    image = Image.new('P', (1, 1))
+    image.putpalette([channel for color in colors for channel in color])
+    return image
+
+
+class MatchRow(NamedTuple):
+    """Immutable copy of a match for the worker thread"""
+    id: int
+    section: str
+    round: int
+    position: int
+    player1: Optional[int]
+    player2: Optional[int]
+    winner: Optional[int]
+    next_match: Optional[int]
+    next_slot: Optional[int]
+
+
+class _Layout:
+    """Where every match goes, plus the static background those positions sit on"""
+
+    def __init__(self, width: int, height: int):
+        self.width = max(width, MIN_WIDTH)
+        self.height = height
+        self.boxes = {}  # {match_id: (x, y)} or, for round robin, {match_id: (row, column)}
+        self.lines = []  # Connector polylines
+        self.labels = []  # (x, y, text)
+        self.grid = None  # Round robin: (players, top)
+        self.slots = None  # Swiss: every (round, position)
+
+    def box(self, row: 'MatchRow') -> Tuple[int, int]:
+        if self.slots is not None:
+            return MARGIN + (row.round - 1) * COLUMN, HEADER + LABEL + row.position * SLOT
+        return self.boxes[row.id]
+
+
+class _Canvas:
+    __slots__ = ('layout_key', 'layout', 'image', 'drawn', 'header', 'png')
+
+    def __init__(self, layout_key: Hashable, layout: _Layout, image: Image.Image):
+        self.layout_key = layout_key
+        self.layout = layout
+        self.image = image
+        self.drawn = {}  # {match_id: state painted last time}
+        self.header = None
+        self.png = None
+
+
+class BracketRenderer:
+    """Renders bracket PNGs on a single worker thread.
+
+    Fonts, avatar thumbnails and background layers are built once and reused; each tournament
+    keeps its last canvas, so a render after one result repaints only the boxes that changed.
+    All image state is touched only by the worker, which is why there is exactly one.
+    """
+
+    def __init__(self, cache_size: int = 16, avatar_cache_size: int = 2048):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='bracket-render')
+        self.cache_size = cache_size
+        self.avatar_cache_size = avatar_cache_size
+        self._palette = _palette()
+        self._fonts = {}  # {(size, bold): FreeTypeFont}
+        self._avatars = OrderedDict()  # {avatar key: circular RGBA thumbnail}
+        self._backgrounds = OrderedDict()  # {layout key: (layout, background image)}
+        self._canvases = OrderedDict()  # {tournament key: _Canvas}
+        self.full_renders = 0
+        self.partial_renders = 0
+        self.reused_images = 0
+        self.matches_painted = 0
+
+    # Public API (event loop side)
+
+    def has_avatar(self, avatar_key: str) -> bool:
+        return avatar_key in self._avatars
+
+    async def render(
+        self,
+        key: Hashable,
+        title: str,
+        bracket: Bracket,
+        names: Dict[int, str],
+        avatar_keys: Dict[int, str],
+        new_avatars: Optional[Dict[str, bytes]] = None
+    ) -> bytes:
+        """PNG of the whole bracket; avatar_keys maps players to thumbnails, new_avatars adds image bytes"""
+        # Snapshot here: the bracket keeps changing on the event loop while the worker draws
+        snapshot = [
+            MatchRow(m.id, m.section, m.round, m.position, m.players[0], m.players[1], m.winner, m.next_match, m.next_slot)
+            for m in bracket.matches.values()
+        ]
+        subtitle = f"{FORMATS[bracket.format]} • {len(bracket.players)} players"
+        champion = bracket.champion
+        if champion is not None:
+            subtitle += f" • Champion: {names.get(champion, 'Unknown')}"
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._render, key, title, subtitle, bracket.format, list(bracket.players),
+            bracket.rounds, snapshot, dict(names), dict(avatar_keys), dict(new_avatars or {})
+        )
+
+    def forget(self, key: Hashable):
+        """Drop a tournament's canvas (it was deleted); safe to call from the event loop"""
+        self.executor.submit(self._canvases.pop, key, None)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'cached_canvases': len(self._canvases),
+            'cached_avatars': len(self._avatars),
+            'full_renders': self.full_renders,
+            'partial_renders': self.partial_renders,
+            'reused_images': self.reused_images,
+            'matches_painted': self.matches_painted
+        }
+
+    # Cached resources (worker side)
+
+    def _font(self, size: int, bold: bool = False) -> ImageFont.ImageFont:
+        font = self._fonts.get((size, bold))
+        if font is None:
+            try:
+                font = ImageFont.truetype('DejaVuSans-Bold.ttf' if bold else 'DejaVuSans.ttf', size)
+            except OSError:
+                try:
+                    font = ImageFont.load_default(size)  # Scalable since Pillow 10.1
+                except TypeError:
+                    font = ImageFont.load_default()
+            self._fonts[(size, bold)] = font
+        return font
+
+    def _load_avatar(self, avatar_key: str, data: bytes):
+        try:
+            with Image.open(io.BytesIO(data)) as source:
+                thumbnail = source.convert('RGBA').resize((AVATAR, AVATAR), Image.LANCZOS)
+        except Exception as e:
+            logger.warning(f"Unreadable avatar {avatar_key}: {e}")
+            return
+        mask = Image.new('L', (AVATAR, AVATAR), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, AVATAR - 1, AVATAR - 1), fill=255)
+        thumbnail.putalpha(Image.composite(thumbnail.getchannel('A'), mask, mask))
+        self._avatars[avatar_key] = thumbnail
+        while len(self._avatars) > self.avatar_cache_size:
+            self._avatars.popitem(last=False)
+
+    def _fit(self, text: str, font: ImageFont.ImageFont, width: int) -> str:
+        """Truncate text with an ellipsis so it fits in width pixels"""
+        if font.getlength(text) <= width:
+            return text
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if font.getlength(text[:middle] + '…') <= width:
+                low = middle
+            else:
+                high = middle - 1
+        return text[:low] + '…'
+
+    # Layouts
+
+    def _elimination_layout(self, snapshot: List[MatchRow]) -> _Layout:
+        by_section = {}
+        for row in snapshot:
+            by_section.setdefault(row.section, []).append(row)
+        double = 'losers' in by_section or 'final' in by_section
+
+        boxes = {}
+        labels = []
+        columns = 0
+        top = HEADER
+        for section, heading in (('winners', 'Winners Bracket'), ('losers', 'Losers Bracket')):
+            rows = by_section.get(section)
+            if not rows:
+                continue
+            counts = Counter(row.round for row in rows)
+            rounds = max(counts)
+            columns = max(columns, rounds)
+            if double:
+                labels.append((MARGIN, top, heading))
+                top += LABEL
+            for round in range(1, rounds + 1):
+                name = "Final" if round == rounds and not double else f"Round {round}"
+                labels.append((MARGIN + (round - 1) * COLUMN, top, name))
+            top += LABEL
+
+            # Every round shares the section's height, so each match sits between its two feeders
+            height = max(counts.values()) * SLOT
+            for row in rows:
+                y = top + (row.position + 0.5) * height / counts[row.round] - BOX_HEIGHT / 2
+                boxes[row.id] = (MARGIN + (row.round - 1) * COLUMN, int(y))
+            top += height + V_GAP * 2
+
+        # Grand final (and its reset) right of both brackets, between their finals
+        finals = [row for section in ('final', 'reset') for row in by_section.get(section, [])]
+        if finals:
+            feeders = [boxes[row.id][1] for row in snapshot if row.next_match == finals[0].id and row.id in boxes]
+            y = sum(feeders) // len(feeders) if feeders else HEADER + LABEL
+            for offset, row in enumerate(finals):
+                x = MARGIN + (columns + offset) * COLUMN
+                boxes[row.id] = (x, y)
+                labels.append((x, y - LABEL, "Grand Final" if row.section == 'final' else "Reset"))
+            columns += len(finals)
+
+        layout = _Layout(MARGIN * 2 + columns * COLUMN - H_GAP, top + MARGIN)
+        layout.boxes = boxes
+        layout.labels = labels
+        for row in snapshot:
+            target = boxes.get(row.next_match)
+            if target is None or row.section == 'final':
+                continue
+            x, y = boxes[row.id]
+            start = (x + BOX_WIDTH, y + BOX_HEIGHT // 2)
+            end_y = target[1] + (ROW_HEIGHT * row.next_slot + ROW_HEIGHT // 2 if row.next_slot is not None else BOX_HEIGHT // 2)
+            middle = target[0] - H_GAP // 2
+            layout.lines.append([start, (middle, start[1]), (middle, end_y), (target[0], end_y)])
+        # The reset only happens if the grand final goes the distance; join them with a straight line
+        if len(finals) == 2:
+            (x, y), (target_x, _) = boxes[finals[0].id], boxes[finals[1].id]
+            layout.lines.append([(x + BOX_WIDTH, y + BOX_HEIGHT // 2), (target_x, y + BOX_HEIGHT // 2)])
+        return layout
+
+    def _swiss_layout(self, players: List[int], rounds: int) -> _Layout:
+        """A fixed grid of rounds; later rounds are paired as results come in, so boxes go by round and position"""
+        per_round = math.ceil(len(players) / 2)
+        layout = _Layout(MARGIN * 2 + rounds * COLUMN - H_GAP, HEADER + LABEL + per_round * SLOT + MARGIN)
+        layout.labels = [(MARGIN + index * COLUMN, HEADER, f"Round {index + 1}") for index in range(rounds)]
+        layout.slots = [(round, position) for round in range(1, rounds + 1) for position in range(per_round)]
+        return layout
+
+    def _round_robin_layout(self, players: List[int], snapshot: List[MatchRow]) -> _Layout:
+        top = HEADER + LABEL
+        size = len(players)
+        layout = _Layout(MARGIN * 2 + NAME_WIDTH + size * CELL + 8 + RECORD_WIDTH, top + size * CELL + MARGIN)
+        index = {player: position for position, player in enumerate(players)}
+        layout.boxes = {row.id: (index[row.player1], index[row.player2]) for row in snapshot}
+        layout.grid = (players, top)
+        return layout
+
+    def _background(self, layout: _Layout, names: Dict[int, str]) -> Image.Image:
+        """Static layer: connectors, headings, empty boxes and the round robin grid"""
+        image = Image.new('RGB', (layout.width, layout.height), BACKGROUND)
+        draw = ImageDraw.Draw(image)
+        for points in layout.lines:
+            draw.line(points, fill=LINE, width=2)
+        heading = self._font(12, bold=True)
+        for x, y, text in layout.labels:
+            draw.text((x, y + 4), text, font=heading, fill=MUTED)
+
+        if layout.grid is None:
+            positions = layout.boxes.values()
+            if layout.slots is not None:
+                positions = [
+                    (MARGIN + (round - 1) * COLUMN, HEADER + LABEL + position * SLOT) for round, position in layout.slots
+                ]
+            for x, y in positions:
+                draw.rectangle((x, y, x + BOX_WIDTH - 1, y + BOX_HEIGHT - 1), fill=BOX)
+            return image
+
+        players, top = layout.grid
+        left = MARGIN + NAME_WIDTH
+        small = self._font(11)
+        draw.text((left + len(players) * CELL + 8, HEADER + 4), "W-L", font=heading, fill=MUTED)
+        for position, player in enumerate(players):
+            y = top + position * CELL
+            name = self._fit(f"{position + 1}. {names.get(player, 'Unknown')}", small, NAME_WIDTH - 8)
+            draw.text((MARGIN, y + CELL // 2), name, font=small, fill=FOREGROUND, anchor='lm')
+            draw.text((left + position * CELL + CELL // 2, HEADER + LABEL // 2), str(position + 1), font=small, fill=MUTED, anchor='mm')
+            for column in range(len(players)):
+                x = left + column * CELL
+                draw.rectangle((x, y, x + CELL - 2, y + CELL - 2), fill=BACKGROUND if column == position else BOX)
+        return image
+
+    # Painting
+
+    def _to_palette(self, image: Image.Image) -> Image.Image:
+        return image.quantize(palette=self._palette, dither=Image.Dither.NONE)
+
+    def _patch(self, canvas: _Canvas, x: int, y: int, width: int, height: int, paint):
+        """Paint one region in RGB (antialiased text), then map it onto the canvas palette"""
+        tile = Image.new('RGB', (width, height), BACKGROUND)
+        paint(tile, ImageDraw.Draw(tile))
+        canvas.image.paste(self._to_palette(tile), (x, y))
+
+    def _paint_header(self, canvas: _Canvas, title: str, subtitle: str):
+        width = canvas.layout.width - MARGIN * 2
+        title_font, subtitle_font = self._font(20, bold=True), self._font(12)
+
+        def paint(tile, draw):
+            draw.text((MARGIN, 14), self._fit(title, title_font, width), font=title_font, fill=FOREGROUND)
+            draw.text((MARGIN, 40), self._fit(subtitle, subtitle_font, width), font=subtitle_font, fill=ACCENT)
+        self._patch(canvas, 0, 0, canvas.layout.width, HEADER - 8, paint)
+
+    def _paint_box(self, image: Image.Image, draw: ImageDraw.ImageDraw, x: int, y: int, row: MatchRow,
+                   names: Dict[int, str], avatar_keys: Dict[int, str]):
+        draw.rectangle((x, y, x + BOX_WIDTH - 1, y + BOX_HEIGHT - 1), fill=BOX)
+        small = self._font(10)
+        draw.text((x + ID_WIDTH // 2, y + BOX_HEIGHT // 2), f"#{row.id}", font=small, fill=MUTED, anchor='mm')
+        draw.line((x + ID_WIDTH, y, x + ID_WIDTH, y + BOX_HEIGHT - 1), fill=BACKGROUND)
+
+        if row.player1 == BYE and row.player2 == BYE:
+            draw.text((x + ID_WIDTH + 8, y + BOX_HEIGHT // 2), "Not played", font=self._font(12), fill=MUTED, anchor='lm')
+            return
+
+        name_left = x + ID_WIDTH + AVATAR + 10
+        name_width = x + BOX_WIDTH - 6 - name_left
+        for slot, player in enumerate((row.player1, row.player2)):
+            top = y + slot * ROW_HEIGHT
+            middle = top + ROW_HEIGHT // 2
+            won = row.winner is not None and row.winner != BYE and player == row.winner
+            if won:
+                draw.rectangle((x + ID_WIDTH + 1, top, x + BOX_WIDTH - 1, top + ROW_HEIGHT - 1), fill=BOX_WINNER)
+                draw.rectangle((x + BOX_WIDTH - 4, top, x + BOX_WIDTH - 1, top + ROW_HEIGHT - 1), fill=ACCENT)
+            if player is None or player == BYE:
+                draw.text((name_left, middle), "TBD" if player is None else "BYE", font=self._font(12), fill=MUTED, anchor='lm')
+                continue
+
+            avatar = self._avatars.get(avatar_keys.get(player))
+            avatar_box = (x + ID_WIDTH + 5, middle - AVATAR // 2)
+            if avatar is not None:
+                image.paste(avatar, avatar_box, avatar)
+            else:
+                name = names.get(player, '?')
+                draw.ellipse((*avatar_box, avatar_box[0] + AVATAR - 1, avatar_box[1] + AVATAR - 1), fill=LINE)
+                draw.text((avatar_box[0] + AVATAR // 2, middle), name[:1].upper(), font=self._font(10, bold=True), fill=FOREGROUND, anchor='mm')
+
+            font = self._font(12, bold=won)
+            lost = row.winner is not None and not won
+            draw.text((name_left, middle), self._fit(names.get(player, 'Unknown'), font, name_width), font=font,
+                      fill=MUTED if lost else FOREGROUND, anchor='lm')
+        draw.line((x + ID_WIDTH + 1, y + ROW_HEIGHT, x + BOX_WIDTH - 1, y + ROW_HEIGHT), fill=BACKGROUND)
+
+    def _paint_cells(self, canvas: _Canvas, row: MatchRow, records: Dict[int, Tuple[int, int]]):
+        """Round robin: the match's two grid cells and both players' records"""
+        players, top = canvas.layout.grid
+        left = MARGIN + NAME_WIDTH
+        font = self._font(11, bold=True)
+        first, second = canvas.layout.boxes[row.id]
+        for (y_index, x_index), player in (((first, second), row.player1), ((second, first), row.player2)):
+            won = row.winner == player
+
+            def paint(tile, draw, won=won):
+                if row.winner is None:
+                    draw.rectangle((0, 0, CELL - 2, CELL - 2), fill=BOX)
+                    return
+                draw.rectangle((0, 0, CELL - 2, CELL - 2), fill=WIN if won else LOSS)
+                draw.text((CELL // 2 - 1, CELL // 2 - 1), "W" if won else "L", font=font, fill=FOREGROUND, anchor='mm')
+            self._patch(canvas, left + x_index * CELL, top + y_index * CELL, CELL - 1, CELL - 1, paint)
+
+        for index in (first, second):
+            wins, losses = records.get(players[index], (0, 0))
+
+            def paint(tile, draw, record=f"{wins}-{losses}"):
+                draw.text((0, CELL // 2), record, font=self._font(11), fill=FOREGROUND, anchor='lm')
+            self._patch(canvas, left + len(players) * CELL + 8, top + index * CELL, RECORD_WIDTH, CELL - 1, paint)
+
+    # Rendering (worker side)
+
+    def _render(
+        self,
+        key: Hashable,
+        title: str,
+        subtitle: str,
+        format: str,
+        players: List[int],
+        rounds: Optional[int],
+        snapshot: List[MatchRow],
+        names: Dict[int, str],
+        avatar_keys: Dict[int, str],
+        new_avatars: Dict[str, bytes]
+    ) -> bytes:
+        for avatar_key, data in new_avatars.items():
+            self._load_avatar(avatar_key, data)
+
+        if format == 'round_robin':
+            # Names are part of the grid's static layer
+            layout_key = (format, tuple(players), tuple(names.get(player) for player in players))
+        elif format == 'swiss':
+            layout_key = (format, len(players), rounds)
+        else:
+            layout_key = (format, len(players))
+
+        canvas = self._canvases.get(key)
+        if canvas is None or canvas.layout_key != layout_key:
+            canvas = self._new_canvas(layout_key, format, players, rounds, snapshot, names)
+            self._canvases[key] = canvas
+            while len(self._canvases) > self.cache_size:
+                self._canvases.popitem(last=False)
+            self.full_renders += 1
+        else:
+            self.partial_renders += 1
+        self._canvases.move_to_end(key)
+
+        # A match is repainted when its players, result, names or avatars differ from what's on the canvas
+        changed = []
+        for row in snapshot:
+            shown = [player for player in (row.player1, row.player2) if player not in (None, BYE)]
+            state = (row.player1, row.player2, row.winner) + tuple(
+                (names.get(player), avatar_keys.get(player) in self._avatars) for player in shown
+            )
+            if canvas.drawn.get(row.id) != state:
+                canvas.drawn[row.id] = state
+                changed.append(row)
+
+        if not changed and canvas.header == (title, subtitle) and canvas.png is not None:
+            self.reused_images += 1
+            return canvas.png
+
+        if format == 'round_robin':
+            records = {}
+            for row in snapshot:
+                if row.winner is not None:
+                    loser = row.player2 if row.winner == row.player1 else row.player1
+                    wins, losses = records.get(row.winner, (0, 0))
+                    records[row.winner] = (wins + 1, losses)
+                    wins, losses = records.get(loser, (0, 0))
+                    records[loser] = (wins, losses + 1)
+            for row in changed:
+                self._paint_cells(canvas, row, records)
+        else:
+            for row in changed:
+                x, y = canvas.layout.box(row)
+                self._patch(
+                    canvas, x, y, BOX_WIDTH, BOX_HEIGHT,
+                    lambda tile, draw, row=row: self._paint_box(tile, draw, 0, 0, row, names, avatar_keys)
+                )
+        self.matches_painted += len(changed)
+
+        if canvas.header != (title, subtitle):
+            self._paint_header(canvas, title, subtitle)
+            canvas.header = (title, subtitle)
+
+        buffer = io.BytesIO()
+        canvas.image.save(buffer, format='PNG', compress_level=1)  # Flat colours compress fine; speed matters more
+        canvas.png = buffer.getvalue()
+        return canvas.png
+
+    def _new_canvas(self, layout_key: Hashable, format: str, players: List[int], rounds: Optional[int],
+                    snapshot: List[MatchRow], names: Dict[int, str]) -> _Canvas:
+        cached = self._backgrounds.get(layout_key)
+        if cached is None:
+            if format == 'round_robin':
+                layout = self._round_robin_layout(players, snapshot)
+            elif format == 'swiss':
+                layout = self._swiss_layout(players, rounds)
+            else:
+                layout = self._elimination_layout(snapshot)
+            cached = (layout, self._to_palette(self._background(layout, names)))
+            self._backgrounds[layout_key] = cached
+            while len(self._backgrounds) > self.cache_size:
+                self._backgrounds.popitem(last=False)
+        self._backgrounds.move_to_end(layout_key)
+
+        layout, background = cached
+        return _Canvas(layout_key, layout, background.copy())
@@ -0,0 +1,428 @@
+"""
+Bracket utilities for MegaBot
+Single/double elimination, round robin and Swiss brackets where every match points at
+the matches its winner and loser move on to, so a result is applied in O(1)
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+BYE = 0  # Stands in for an empty slot (Discord ids are never 0); None means "not decided yet"
+
+FORMATS = {
+    'single': 'Single Elimination',
+    'double': 'Double Elimination',
+    'round_robin': 'Round Robin',
+    'swiss': 'Swiss'
+}
+MAX_ROUND_ROBIN = 64  # n * (n - 1) / 2 matches
+SWISS_PAIRING_STEPS = 20_000  # Backtracking steps per round before settling for a rematch
+
+
+class BracketError(ValueError):
+    """A bracket that can't be built or a result that can't be applied"""
+
+
+class Match:
+    """One game; players hold user ids, BYE, or None while a feeding match is undecided"""
+
+    __slots__ = (
+        'id', 'round', 'position', 'section', 'players', 'winner',
+        'next_match', 'next_slot', 'loser_match', 'loser_slot'
+    )
+
+    def __init__(
+        self,
+        match_id: int,
+        round: int,
+        position: int,
+        section: str,
+        players: Optional[List[Optional[int]]] = None,
+        winner: Optional[int] = None,
+        next_match: Optional[int] = None,
+        next_slot: Optional[int] = None,
+        loser_match: Optional[int] = None,
+        loser_slot: Optional[int] = None
+    ):
+        self.id = match_id
+        self.round = round
+        self.position = position
+        self.section = section  # winners, losers, final, reset or pool
+        self.players = list(players) if players else [None, None]
+        self.winner = winner
+        self.next_match = next_match
+        self.next_slot = next_slot
+        self.loser_match = loser_match
+        self.loser_slot = loser_slot
+
+    @property
+    def is_ready(self) -> bool:
+        """Both players known and no result yet"""
+        return self.winner is None and all(player not in (None, BYE) for player in self.players)
+
+    @property
+    def is_bye(self) -> bool:
+        return BYE in self.players
+
+    @property
+    def loser(self) -> Optional[int]:
+        if self.winner is None:
+            return None
+        first, second = self.players
+        return second if self.winner == first else first
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            'match_id': self.id,
+            'round': self.round,
+            'position': self.position,
+            'section': self.section,
+            'player1': self.players[0],
+            'player2': self.players[1],
+            'winner': self.winner,
+            'next_match': self.next_match,
+            'next_slot': self.next_slot,
+            'loser_match': self.loser_match,
+            'loser_slot': self.loser_slot
+        }
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> 'Match':
+        return cls(
+            row['match_id'], row['round'], row['position'], row.get('section') or 'winners',
+            [row['player1'], row['player2']], row['winner'],
+            row.get('next_match'), row.get('next_slot'), row.get('loser_match'), row.get('loser_slot')
+        )
+
+
+def seed_order(size: int) -> List[int]:
+    """Seeds in bracket slot order so 1 meets N, 2 meets N-1, and top seeds meet as late as possible"""
+    order = [1]
+    while len(order) < size:
+        total = len(order) * 2 + 1
+        order = [seed for top in order for seed in (top, total - top)]
+    return order
+
+
+class Bracket:
+    """Matches of one tournament plus the rules for creating and advancing them"""
+
+    def __init__(self, format: str, players: List[int], matches: List[Match], rounds: Optional[int] = None):
+        self.format = format
+        self.players = players  # Seed order
+        self.matches = {match.id: match for match in matches}
+        self.rounds = rounds  # Swiss only: how many rounds to play
+        # Results still missing, overall and per round, so completion checks stay O(1)
+        self.unfinished = sum(match.winner is None for match in matches)
+        self._round_unfinished = Counter(match.round for match in matches if match.winner is None)
+
+    # Construction
+
+    @classmethod
+    def create(cls, format: str, players: List[int], rounds: Optional[int] = None) -> 'Bracket':
+        """Build a bracket for players given in seed order (best first)"""
+        if format not in FORMATS:
+            raise BracketError(f"Unknown format '{format}'")
+        if len(players) < 2:
+            raise BracketError("Need at least 2 players")
+
+        if format == 'round_robin':
+            if len(players) > MAX_ROUND_ROBIN:
+                raise BracketError(f"Round robin is limited to {MAX_ROUND_ROBIN} players")
+            return cls(format, players, cls._round_robin(players))
+
+        if format == 'swiss':
+            bracket = cls(format, players, [], rounds or math.ceil(math.log2(len(players))))
+            bracket._pair_swiss_round(1, {})
+            return bracket
+
+        bracket = cls(format, players, [])
+        bracket._build_elimination(double=format == 'double')
+        return bracket
+
+    def _add(self, round: int, position: int, section: str) -> Match:
+        match = Match(len(self.matches) + 1, round, position, section)
+        self.matches[match.id] = match
+        self.unfinished += 1
+        self._round_unfinished[round] += 1
+        return match
+
+    def _build_elimination(self, double: bool):
+        size = 1 << max(1, (len(self.players) - 1).bit_length())
+        total_rounds = size.bit_length() - 1
+
+        winners = [
+            [self._add(round, position, 'winners') for position in range(size >> round)]
+            for round in range(1, total_rounds + 1)
+        ]
+        for round_matches, next_round in zip(winners, winners[1:]):
+            for position, match in enumerate(round_matches):
+                match.next_match, match.next_slot = next_round[position // 2].id, position % 2
+
+        if double:
+            self._build_losers(winners, size, total_rounds)
+
+        # Seat the players last so byes cascade through the finished structure
+        order = seed_order(size)
+        changed = {}
+        for position, match in enumerate(winners[0]):
+            for slot in (0, 1):
+                seed = order[position * 2 + slot]
+                player = self.players[seed - 1] if seed <= len(self.players) else BYE
+                self._place(match.id, slot, player, changed)
+
+    def _build_losers(self, winners: List[List[Match]], size: int, total_rounds: int):
+        losers = []
+        for round in range(1, 2 * (total_rounds - 1) + 1):
+            count = size >> ((round + 1) // 2 + 1)
+            losers.append([self._add(round, position, 'losers') for position in range(count)])
+
+        if losers:
+            # Round 1: losers of winners round 1, two by two
+            for position, match in enumerate(winners[0]):
+                match.loser_match, match.loser_slot = losers[0][position // 2].id, position % 2
+
+            for index, round_matches in enumerate(losers):
+                round = index + 1
+                if round % 2 == 0:
+                    # Survivors meet the losers dropping from winners round k + 1,
+                    # in reverse order every other time to avoid quick rematches
+                    k = round // 2
+                    dropping = winners[k]
+                    for position, match in enumerate(round_matches):
+                        source = dropping[len(dropping) - 1 - position if k % 2 else position]
+                        source.loser_match, source.loser_slot = match.id, 1
+                        losers[index - 1][position].next_match, losers[index - 1][position].next_slot = match.id, 0
+                elif round > 1:
+                    for position, match in enumerate(losers[index - 1]):
+                        match.next_match, match.next_slot = round_matches[position // 2].id, position % 2
+
+        final = self._add(1, 0, 'final')
+        reset = self._add(1, 0, 'reset')
+        final.next_match = reset.id
+        winners[-1][0].next_match, winners[-1][0].next_slot = final.id, 0
+        if losers:
+            losers[-1][0].next_match, losers[-1][0].next_slot = final.id, 1
+        else:
+            winners[-1][0].loser_match, winners[-1][0].loser_slot = final.id, 1
+
+    @classmethod
+    def _round_robin(cls, players: List[int]) -> List[Match]:
+        """Circle method: everyone plays everyone once, round by round"""
+        circle = list(players) + ([BYE] if len(players) % 2 else [])
+        half = len(circle) // 2
+        matches = []
+        for round in range(1, len(circle)):
+            position = 0
+            for i in range(half):
+                first, second = circle[i], circle[-1 - i]
+                if BYE not in (first, second):
+                    matches.append(Match(len(matches) + 1, round, position, 'pool', [first, second]))
+                    position += 1
+            circle = [circle[0], circle[-1]] + circle[1:-1]
+        return matches
+
+    # Results
+
+    def _place(self, match_id: int, slot: int, player: int, changed: Dict[int, Match]):
+        match = self.matches[match_id]
+        match.players[slot] = player
+        changed[match.id] = match
+        first, second = match.players
+        if match.winner is None and first is not None and second is not None and BYE in match.players:
+            # A bye (or two) resolves itself and moves on right away
+            self._finish(match, second if first == BYE else first, changed)
+
+    def _finish(self, match: Match, winner: int, changed: Dict[int, Match]):
+        match.winner = winner
+        changed[match.id] = match
+        self.unfinished -= 1
+        self._round_unfinished[match.round] -= 1
+
+        if match.section == 'final':
+            reset = self.matches[match.next_match]
+            if winner == match.players[0] or match.is_bye:
+                # Winners-bracket champion won (or there was no opponent): no reset needed
+                reset.players = [BYE, BYE]
+                self._finish(reset, BYE, changed)
+            else:
+                reset.players = list(match.players)
+            changed[reset.id] = reset
+            return
+
+        loser = match.loser
+        if match.next_match is not None:
+            self._place(match.next_match, match.next_slot, winner, changed)
+        if match.loser_match is not None:
+            self._place(match.loser_match, match.loser_slot, loser if loser is not None else BYE, changed)
+
+    def report(self, match_id: int, winner: int) -> List[Match]:
+        """Record a result and return every match that changed (including new Swiss pairings)"""
+        match = self.matches.get(match_id)
+        if match is None:
+            raise BracketError(f"Match #{match_id} doesn't exist")
+        if match.winner is not None:
+            raise BracketError(f"Match #{match_id} already has a result")
+        if not match.is_ready:
+            raise BracketError(f"Match #{match_id} is still waiting for its players")
+        if winner not in match.players:
+            raise BracketError(f"That player isn't in match #{match_id}")
+
+        changed = {}
+        self._finish(match, winner, changed)
+
+        if self.format == 'swiss' and match.round < self.rounds and not self._round_unfinished[match.round]:
+            self._pair_swiss_round(match.round + 1, changed)
+        return list(changed.values())
+
+    # Swiss
+
+    def _pair_swiss_round(self, round: int, changed: Dict[int, Match]):
+        points = self.points()
+        buchholz = self._buchholz(points)
+        seed = {player: index for index, player in enumerate(self.players)}
+        played = {
+            frozenset(match.players) for match in self.matches.values() if not match.is_bye
+        }
+        had_bye = {
+            match.winner for match in self.matches.values() if match.is_bye
+        }
+
+        ranked = sorted(self.players, key=lambda p: (-points.get(p, 0), -buchholz.get(p, 0), seed[p]))
+        if round == 1:
+            # Top half meets bottom half by seed: 1 vs N/2 + 1, 2 vs N/2 + 2, ...
+            bye_player = ranked.pop() if len(ranked) % 2 else None
+            half = len(ranked) // 2
+            pairs = list(zip(ranked[:half], ranked[half:]))
+        else:
+            bye_player, pairs = self._swiss_pairs(ranked, played, had_bye)
+
+        for position, (first, second) in enumerate(pairs):
+            match = self._add(round, position, 'pool')
+            match.players = [first, second]
+            changed[match.id] = match
+        if bye_player is not None:
+            match = self._add(round, len(pairs), 'pool')
+            match.players = [bye_player, BYE]
+            self._finish(match, bye_player, changed)
+
+    @staticmethod
+    def _swiss_pairs(ranked: List[int], played: set, had_bye: set) -> Tuple[Optional[int], List[tuple]]:
+        """(bye player, pairs) without rematches if the search finds one, else the greedy pairing"""
+        budget = SWISS_PAIRING_STEPS
+        if len(ranked) % 2:
+            # Lowest-ranked player who hasn't had a bye yet sits out with a free win
+            candidates = [p for p in reversed(ranked) if p not in had_bye] or [ranked[-1]]
+        else:
+            candidates = [None]
+
+        for bye_player in candidates:
+            rest = [p for p in ranked if p != bye_player]
+            pairs, budget = Bracket._pair_without_rematches(rest, played, budget)
+            if pairs is not None:
+                return bye_player, pairs
+            if budget <= 0:
+                break
+
+        # No rematch-free pairing found: nearest unplayed opponent, else the next player
+        bye_player = candidates[0]
+        pairs = []
+        unpaired = [p for p in ranked if p != bye_player]
+        while unpaired:
+            first = unpaired[0]
+            partner = next(
+                (index for index in range(1, len(unpaired)) if frozenset((first, unpaired[index])) not in played),
+                1
+            )
+            pairs.append((first, unpaired[partner]))
+            unpaired = unpaired[1:partner] + unpaired[partner + 1:]
+        return bye_player, pairs
+
+    @staticmethod
+    def _pair_without_rematches(ranked: List[int], played: set, budget: int) -> Tuple[Optional[List[tuple]], int]:
+        """Pair top-down with the nearest unplayed opponent, backing up to the previous
+        pair's next choice on a dead end; returns (pairs or None, budget left)"""
+        pairs = []
+        choices = []  # (players left before the pair, partner index) for backtracking
+        unpaired, start = ranked, 1
+        while unpaired:
+            budget -= 1
+            if budget < 0:
+                return None, 0
+            first = unpaired[0]
+            partner = next(
+                (index for index in range(start, len(unpaired)) if frozenset((first, unpaired[index])) not in played),
+                None
+            )
+            if partner is None:
+                if not choices:
+                    return None, budget
+                pairs.pop()
+                unpaired, partner = choices.pop()
+                start = partner + 1
+                continue
+            choices.append((unpaired, partner))
+            pairs.append((first, unpaired[partner]))
+            unpaired, start = unpaired[1:partner] + unpaired[partner + 1:], 1
+        return pairs, budget
+
+    def _buchholz(self, points: Dict[int, int]) -> Dict[int, int]:
+        """Tiebreak: the sum of each player's opponents' points"""
+        totals = {}
+        for match in self.matches.values():
+            if match.is_bye or match.winner is None:
+                continue
+            first, second = match.players
+            totals[first] = totals.get(first, 0) + points.get(second, 0)
+            totals[second] = totals.get(second, 0) + points.get(first, 0)
+        return totals
+
+    # Queries
+
+    def points(self) -> Dict[int, int]:
+        """Wins per player"""
+        wins = {}
+        for match in self.matches.values():
+            if match.winner not in (None, BYE):
+                wins[match.winner] = wins.get(match.winner, 0) + 1
+        return wins
+
+    def standings(self) -> List[tuple]:
+        """(player, wins, tiebreak) best first, for round robin and Swiss"""
+        points = self.points()
+        buchholz = self._buchholz(points)
+        seed = {player: index for index, player in enumerate(self.players)}
+        ranked = sorted(self.players, key=lambda p: (-points.get(p, 0), -buchholz.get(p, 0), seed[p]))
+        return [(player, points.get(player, 0), buchholz.get(player, 0)) for player in ranked]
+
+    @property
+    def is_complete(self) -> bool:
+        if self.unfinished:
+            return False
+        if self.format == 'swiss':
+            return len(self.matches) > 0 and self.matches[len(self.matches)].round >= self.rounds
+        return True
+
+    @property
+    def champion(self) -> Optional[int]:
+        if not self.is_complete:
+            return None
+        if self.format in ('round_robin', 'swiss'):
+            return self.standings()[0][0]
+        if self.format == 'double':
+            final = next(match for match in self.matches.values() if match.section == 'final')
+            reset = self.matches[final.next_match]
+            return reset.winner if reset.winner not in (None, BYE) else final.winner
+        return self.matches[len(self.matches)].winner  # The final is built last
+
+    def open_matches(self) -> List[Match]:
+        """Matches waiting for a result, earliest first"""
+        return [match for match in self.matches.values() if match.is_ready]
+
+    def rows(self, matches: Optional[List[Match]] = None) -> List[Dict[str, Any]]:
+        return [match.to_row() for match in (matches if matches is not None else self.matches.values())]
+
+    @classmethod
+    def from_rows(cls, format: str, players: List[int], rows: List[Dict[str, Any]], rounds: Optional[int] = None) -> 'Bracket':
+        return cls(format or 'single', players, [Match.from_row(row) for row in rows], rounds)
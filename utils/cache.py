@@ -0,0 +1,112 @@
+"""
+Caching utilities for MegaBot
+Small in-process caches shared by the cogs
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize: int = 128, ttl: float = 300, negative_ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl  # How long to remember None results (0 = never)
+        self._data = OrderedDict()  # {key: (expires_at, value)}
+        self._inflight = {}  # {key: Future} for fetches already running
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return a cached value, or default if missing or expired"""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store a value, evicting the least recently used entry when full"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """Return a cached value or fetch it, coalescing concurrent fetches for the same key"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        future = self._inflight.get(key)
+        if future is None:
+            self.misses += 1
+            future = asyncio.ensure_future(fetch())
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._store_fetched(key, done, ttl))
+        else:
+            self.coalesced += 1
+
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(future)
+
+    def _store_fetched(self, key: Hashable, future: asyncio.Future, ttl: Optional[float]):
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        value = future.result()
+        if value is None:
+            if self.negative_ttl:
+                self.set(key, None, self.negative_ttl)
+        else:
+            self.set(key, value, ttl)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a key and return its value"""
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else default
+
+    def clear(self):
+        """Drop every cached entry"""
+        self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit-rate metrics for monitoring"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_MISSING = object()
@@ -0,0 +1,276 @@
+"""
+Calculator utilities for MegaBot
+A bounded arithmetic evaluator over Python's AST, with math functions, variables and unit conversion
+"""
+
+import ast
+import math
+import operator
+import re
+import time
+from typing import Dict, Optional, Tuple, Union
+
+Number = Union[int, float]
+
+MAX_LENGTH = 300  # Characters of input
+MAX_NODES = 120  # AST nodes across all statements
+MAX_INT_BITS = 4096  # Largest integer any step may produce
+MAX_EXPONENT = 10_000
+MAX_FACTORIAL = 500
+MAX_ROUND_DIGITS = 1000  # round() builds 10 ** ndigits inline, outside the time budget
+MAX_VARIABLES = 20
+TIME_BUDGET = 0.05  # Seconds for one calculation
+
+
+class CalculatorError(ValueError):
+    """Invalid expression or one that exceeds the calculator's limits"""
+
+
+CONSTANTS = {
+    'pi': math.pi,
+    'e': math.e,
+    'tau': math.tau,
+    'phi': (1 + 5 ** 0.5) / 2,
+    'inf': math.inf
+}
+
+
+def _factorial(n: Number) -> int:
+    if n != int(n) or n < 0:
+        raise CalculatorError("factorial() needs a non-negative whole number")
+    if n > MAX_FACTORIAL:
+        raise CalculatorError(f"factorial() is limited to {MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+
+def _log(x: Number, base: Number = math.e) -> float:
+    return math.log(x, base)
+
+
+def _round(x: Number, ndigits: Optional[int] = None) -> Number:
+    if ndigits is None:
+        return round(x)
+    if ndigits != int(ndigits):
+        raise CalculatorError("round() needs a whole number of digits")
+    if abs(ndigits) > MAX_ROUND_DIGITS:
+        raise CalculatorError(f"round() is limited to {MAX_ROUND_DIGITS:,} digits")
+    return round(x, int(ndigits))
+
+
+FUNCTIONS = {
+    'sqrt': math.sqrt, 'cbrt': lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan,
+    'asin': math.asin, 'acos': math.acos, 'atan': math.atan, 'atan2': math.atan2,
+    'sinh': math.sinh, 'cosh': math.cosh, 'tanh': math.tanh,
+    'log': _log, 'ln': math.log, 'log10': math.log10, 'log2': math.log2, 'exp': math.exp,
+    'abs': abs, 'round': _round, 'floor': math.floor, 'ceil': math.ceil,
+    'factorial': _factorial, 'gcd': math.gcd, 'lcm': math.lcm, 'hypot': math.hypot,
+    'degrees': math.degrees, 'radians': math.radians, 'min': min, 'max': max
+}
+
+# Linear units as (dimension, size in the dimension's base unit)
+UNITS = {
+    'mm': ('length', 0.001), 'cm': ('length', 0.01), 'm': ('length', 1), 'km': ('length', 1000),
+    'in': ('length', 0.0254), 'ft': ('length', 0.3048), 'yd': ('length', 0.9144), 'mi': ('length', 1609.344),
+    'mg': ('mass', 0.001), 'g': ('mass', 1), 'kg': ('mass', 1000), 't': ('mass', 1_000_000),
+    'oz': ('mass', 28.349523125), 'lb': ('mass', 453.59237), 'st': ('mass', 6350.29318),
+    'ms': ('time', 0.001), 's': ('time', 1), 'min': ('time', 60), 'h': ('time', 3600),
+    'day': ('time', 86400), 'week': ('time', 604800), 'year': ('time', 31_557_600),
+    'ml': ('volume', 0.001), 'l': ('volume', 1), 'tsp': ('volume', 0.00492892), 'tbsp': ('volume', 0.0147868),
+    'cup': ('volume', 0.236588), 'pt': ('volume', 0.473176), 'qt': ('volume', 0.946353), 'gal': ('volume', 3.785411784),
+    'b': ('data', 1), 'kb': ('data', 1e3), 'mb': ('data', 1e6), 'gb': ('data', 1e9), 'tb': ('data', 1e12),
+    'kib': ('data', 1024), 'mib': ('data', 1024 ** 2), 'gib': ('data', 1024 ** 3), 'tib': ('data', 1024 ** 4),
+    'mps': ('speed', 1), 'kph': ('speed', 1 / 3.6), 'mph': ('speed', 0.44704), 'knot': ('speed', 0.514444)
+}
+
+UNIT_ALIASES = {
+    'meter': 'm', 'meters': 'm', 'kilometer': 'km', 'kilometers': 'km', 'inch': 'in', 'inches': 'in',
+    'foot': 'ft', 'feet': 'ft', 'yard': 'yd', 'yards': 'yd', 'mile': 'mi', 'miles': 'mi',
+    'gram': 'g', 'grams': 'g', 'kilogram': 'kg', 'kilograms': 'kg', 'kgs': 'kg', 'lbs': 'lb', 'pound': 'lb',
+    'pounds': 'lb', 'ounce': 'oz', 'ounces': 'oz', 'sec': 's', 'secs': 's', 'seconds': 's', 'mins': 'min',
+    'minutes': 'min', 'hr': 'h', 'hrs': 'h', 'hour': 'h', 'hours': 'h', 'days': 'day', 'weeks': 'week',
+    'years': 'year', 'liter': 'l', 'liters': 'l', 'litre': 'l', 'litres': 'l', 'cups': 'cup',
+    'gallon': 'gal', 'gallons': 'gal', 'km/h': 'kph', 'm/s': 'mps', 'knots': 'knot',
+    '°c': 'c', 'celsius': 'c', '°f': 'f', 'fahrenheit': 'f', 'kelvin': 'k'
+}
+
+# Temperatures are affine, so they convert through kelvin
+TEMPERATURES = {
+    'c': (lambda v: v + 273.15, lambda k: k - 273.15),
+    'f': (lambda v: (v - 32) * 5 / 9 + 273.15, lambda k: (k - 273.15) * 9 / 5 + 32),
+    'k': (lambda v: v, lambda k: k)
+}
+
+_CONVERSION = re.compile(r'^(?P<expr>.*[\d.)\s])\s*(?P<source>[a-z°][a-z°/]*)\s+to\s+(?P<target>[a-z°][a-z°/]*)$', re.IGNORECASE)
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow
+}
+_UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+
+def _unit(name: str) -> str:
+    name = name.lower()
+    name = UNIT_ALIASES.get(name, name)
+    if name not in UNITS and name not in TEMPERATURES:
+        raise CalculatorError(f"Unknown unit '{name}'")
+    return name
+
+
+def convert(value: Number, source: str, target: str) -> float:
+    """Convert between two units of the same dimension"""
+    source, target = _unit(source), _unit(target)
+    if source in TEMPERATURES or target in TEMPERATURES:
+        if source not in TEMPERATURES or target not in TEMPERATURES:
+            raise CalculatorError(f"Can't convert {source} to {target}")
+        return TEMPERATURES[target][1](TEMPERATURES[source][0](value))
+
+    (source_dimension, source_size), (target_dimension, target_size) = UNITS[source], UNITS[target]
+    if source_dimension != target_dimension:
+        raise CalculatorError(f"Can't convert {source_dimension} to {target_dimension}")
+    return value * source_size / target_size
+
+
+class _Evaluator:
+    """Walks a parsed expression, checking every intermediate result against the limits"""
+
+    def __init__(self, variables: Dict[str, Number], deadline: float):
+        self.variables = variables
+        self.deadline = deadline
+
+    def visit(self, node: ast.AST) -> Number:
+        if time.monotonic() > self.deadline:
+            raise CalculatorError("Calculation took too long")
+
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise CalculatorError("Only numbers are allowed")
+            return self._check(node.value)
+
+        if isinstance(node, ast.Name):
+            if node.id in self.variables:
+                return self.variables[node.id]
+            if node.id in CONSTANTS:
+                return CONSTANTS[node.id]
+            raise CalculatorError(f"Unknown name '{node.id}'")
+
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            return _UNARY_OPERATORS[type(node.op)](self.visit(node.operand))
+
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            left, right = self.visit(node.left), self.visit(node.right)
+            self._check_operation(node.op, left, right)
+            return self._check(_BINARY_OPERATORS[type(node.op)](left, right))
+
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+            function = FUNCTIONS.get(node.func.id)
+            if function is None:
+                raise CalculatorError(f"Unknown function '{node.func.id}'")
+            args = [self.visit(arg) for arg in node.args]
+            try:
+                return self._check(function(*args))
+            except TypeError:
+                raise CalculatorError(f"Wrong arguments for {node.func.id}()")
+
+        raise CalculatorError("Unsupported syntax")
+
+    @staticmethod
+    def _check_operation(op: ast.operator, left: Number, right: Number):
+        # Refuse integer work whose result would blow past the size limit before doing it
+        if not (isinstance(left, int) and isinstance(right, int)):
+            return
+        if isinstance(op, ast.Pow):
+            if abs(right) > MAX_EXPONENT:
+                raise CalculatorError(f"Exponents are limited to {MAX_EXPONENT:,}")
+            if right > 0 and max(left.bit_length() - 1, 0) * right > MAX_INT_BITS:
+                raise CalculatorError("Result is too large")
+        elif isinstance(op, ast.Mult) and left.bit_length() + right.bit_length() > MAX_INT_BITS + 1:
+            raise CalculatorError("Result is too large")
+
+    @staticmethod
+    def _check(value: Number) -> Number:
+        if isinstance(value, complex):
+            raise CalculatorError("Result is not a real number")
+        if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+            raise CalculatorError("Result is too large")
+        return value
+
+
+def count_nodes(tree: ast.AST) -> int:
+    return sum(1 for _ in ast.walk(tree))
+
+
+def calculate(text: str, variables: Optional[Dict[str, Number]] = None) -> Tuple[Number, Optional[str]]:
+    """Evaluate 'x = 2; x ^ 10', '3 * sqrt(2)' or '5 km to mi'; returns (value, unit).
+
+    Assignments are stored in variables, and the result is also kept as 'ans'.
+    """
+    variables = {} if variables is None else variables
+    if len(text) > MAX_LENGTH:
+        raise CalculatorError(f"Expressions are limited to {MAX_LENGTH} characters")
+
+    statements = [statement.strip() for statement in text.split(';') if statement.strip()]
+    if not statements:
+        raise CalculatorError("Nothing to calculate")
+
+    deadline = time.monotonic() + TIME_BUDGET
+    evaluator = _Evaluator(variables, deadline)
+    nodes = 0
+    value, unit = None, None
+
+    for statement in statements:
+        target, unit = None, None
+        name, sep, rest = statement.partition('=')
+        if sep and name.strip().isidentifier():
+            target, statement = name.strip(), rest.strip()
+            if target in CONSTANTS or target in FUNCTIONS:
+                raise CalculatorError(f"'{target}' is a built-in name")
+
+        conversion = _CONVERSION.match(statement)
+        if conversion:
+            statement = conversion.group('expr')
+
+        try:
+            tree = ast.parse(statement.replace('^', '**'), mode='eval')
+        except SyntaxError:
+            raise CalculatorError(f"Can't parse `{statement}`")
+
+        nodes += count_nodes(tree)
+        if nodes > MAX_NODES:
+            raise CalculatorError("Expression is too complex")
+
+        try:
+            value = evaluator.visit(tree.body)
+            if conversion:
+                unit = _unit(conversion.group('target'))
+                value = convert(value, conversion.group('source'), unit)
+        except ZeroDivisionError:
+            raise CalculatorError("Division by zero")
+        except OverflowError:
+            raise CalculatorError("Result is too large")
+        except ValueError as e:
+            if isinstance(e, CalculatorError):
+                raise
+            raise CalculatorError(f"Math error: {e}")
+
+        if target:
+            if target not in variables and len(variables) >= MAX_VARIABLES:
+                raise CalculatorError(f"You can keep at most {MAX_VARIABLES} variables")
+            variables[target] = value
+
+    variables['ans'] = value
+    return value, unit
+
+
+def format_number(value: Number) -> str:
+    """Readable result: full integers up to 30 digits, otherwise 12 significant digits"""
+    if isinstance(value, int):
+        if abs(value) < 10 ** 30:
+            return f"{value:,}"
+        digits = str(abs(value))
+        sign = '-' if value < 0 else ''
+        return f"{sign}{digits[0]}.{digits[1:12]}e+{len(digits) - 1}"
+    if value.is_integer() and abs(value) < 1e15:
+        return f"{int(value):,}"
+    return f"{value:.12g}"
@@ -0,0 +1,115 @@
+"""
+Chart rendering for MegaBot
+Draws PNG graphs in a worker process so matplotlib never blocks the event loop
+"""
+
+import asyncio
+import io
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Hashable, List, Tuple
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger('MegaBot.Charts')
+
+# Shared look for every chart
+BACKGROUND = '#2B2D31'
+FOREGROUND = '#DBDEE1'
+ACCENT = '#00D9FF'
+
+
+def _warm_imports():
+    """Process initializer: pay the matplotlib import cost once per worker"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot  # noqa: F401
+    import pandas  # noqa: F401
+
+
+def _style_axes(fig, ax, title: str):
+    fig.patch.set_facecolor(BACKGROUND)
+    ax.set_facecolor(BACKGROUND)
+    ax.set_title(title, color=FOREGROUND, fontsize=14, pad=12)
+    ax.tick_params(colors=FOREGROUND)
+    for spine in ax.spines.values():
+        spine.set_color('#4E5058')
+    ax.grid(axis='y', color='#4E5058', alpha=0.5)
+
+
+def _to_png(fig) -> bytes:
+    import matplotlib.pyplot as plt
+
+    buffer = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buffer, format='png', dpi=100, facecolor=fig.get_facecolor())
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def render_activity_chart(title: str, start: str, end: str, points: List[Tuple[str, int]]) -> bytes:
+    """Daily message counts between start and end (YYYY-MM-DD), gaps filled with zero"""
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    days = pd.date_range(start, end, freq='D')
+    series = pd.Series(
+        [count for _, count in points],
+        index=pd.to_datetime([day for day, _ in points]),
+        dtype='int64'
+    ).reindex(days, fill_value=0)
+
+    fig, ax = plt.subplots(figsize=(10, 4.5))
+    _style_axes(fig, ax, title)
+    ax.fill_between(series.index, series.values, color=ACCENT, alpha=0.25)
+    ax.plot(series.index, series.values, color=ACCENT, linewidth=2, marker='o', markersize=3)
+    ax.set_ylabel('Messages', color=FOREGROUND)
+    ax.set_ylim(bottom=0)
+    fig.autofmt_xdate()
+    return _to_png(fig)
+
+
+def render_economy_chart(title: str, names: List[str], totals: List[int]) -> bytes:
+    """Horizontal bar chart of the richest members"""
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(10, max(3, 0.5 * len(names) + 1.5)))
+    _style_axes(fig, ax, title)
+    ax.grid(axis='y', visible=False)
+    ax.grid(axis='x', color='#4E5058', alpha=0.5)
+
+    positions = range(len(names))
+    ax.barh(positions, totals, color=ACCENT)
+    ax.set_yticks(list(positions))
+    ax.set_yticklabels(names)
+    ax.invert_yaxis()
+    ax.set_xlabel('Net worth ($)', color=FOREGROUND)
+
+    for position, total in zip(positions, totals):
+        ax.text(total, position, f" ${total:,}", va='center', color=FOREGROUND, fontsize=9)
+
+    return _to_png(fig)
+
+
+class ChartRenderer:
+    """Runs chart functions in a warm process pool and caches the PNG output"""
+
+    def __init__(self, max_workers: int = 1, cache_ttl: float = 300, cache_size: int = 64):
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_warm_imports)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+
+    async def render(self, cache_key: Hashable, func, *args) -> bytes:
+        """Render a chart, reusing a cached or in-flight image for the same key"""
+        loop = asyncio.get_running_loop()
+        return await self.cache.get_or_fetch(
+            cache_key,
+            lambda: loop.run_in_executor(self.executor, func, *args)
+        )
+
+    def warm_up(self):
+        """Start the worker processes ahead of the first request"""
+        self.executor.submit(_warm_imports)
+
+    def shutdown(self):
+        """Stop the worker processes"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
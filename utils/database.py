@@ -5,12 +5,24 @@ Handles all database operations using SQLite
 
 import sqlite3
 import aiosqlite
+import json
 from datetime import datetime
+from utils.questions import new_permutation, permuted_slot
 from typing import Optional, List, Dict, Any
 
 class Database:
     def __init__(self, db_path: str = "data/database.db"):
         self.db_path = db_path
+        self.deal_fts = False  # Set when SQLite supports the FTS5 trigram tokenizer
+    
+    @staticmethod
+    async def _ensure_columns(db, table: str, columns: Dict[str, str]):
+        """Add columns that tables created by older versions are missing"""
+        async with db.execute(f"PRAGMA table_info({table})") as cursor:
+            existing = {row[1] for row in await cursor.fetchall()}
+        for name, definition in columns.items():
+            if name not in existing:
+                await db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
     
     async def connect(self):
         """Initialize database connection and tables"""
@@ -57,8 +69,10 @@ class Database:
                     completed BOOLEAN DEFAULT 0
                 )
             """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_homework_user_due ON homework (user_id, due_date)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_homework_open_due ON homework (completed, due_date)")
             
-            # Tournament table
+            # Tournament tables (AUTOINCREMENT ids are never reused after a delete)
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS tournaments (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -67,9 +81,77 @@ class Database:
                     game TEXT,
                     max_players INTEGER,
                     status TEXT,
-                    created_at TIMESTAMP
+                    created_at TIMESTAMP,
+                    description TEXT,
+                    host_id INTEGER,
+                    format TEXT DEFAULT 'single',
+                    rounds INTEGER,
+                    winner_id INTEGER
+                )
+            """)
+            await self._ensure_columns(db, 'tournaments', {
+                'description': 'TEXT',
+                'host_id': 'INTEGER',
+                'format': "TEXT DEFAULT 'single'",
+                'rounds': 'INTEGER',
+                'winner_id': 'INTEGER'
+            })
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_guild ON tournaments (guild_id, id)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_tournaments_status ON tournaments (status)")
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS tournament_players (
+                    tournament_id INTEGER,
+                    user_id INTEGER,
+                    joined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    seed INTEGER,
+                    PRIMARY KEY (tournament_id, user_id)
+                )
+            """)
+            await self._ensure_columns(db, 'tournament_players', {'seed': 'INTEGER'})
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS tournament_matches (
+                    tournament_id INTEGER,
+                    match_id INTEGER,
+                    round INTEGER,
+                    position INTEGER,
+                    player1_id INTEGER,
+                    player2_id INTEGER,
+                    winner_id INTEGER,
+                    section TEXT,
+                    next_match INTEGER,
+                    next_slot INTEGER,
+                    loser_match INTEGER,
+                    loser_slot INTEGER,
+                    PRIMARY KEY (tournament_id, match_id)
+                )
+            """)
+            # Matches point at where their winner and loser go next, so results apply without scanning
+            await self._ensure_columns(db, 'tournament_matches', {
+                'section': 'TEXT',
+                'next_match': 'INTEGER',
+                'next_slot': 'INTEGER',
+                'loser_match': 'INTEGER',
+                'loser_slot': 'INTEGER'
+            })
+            
+            # Elo per guild and game, updated after every reported match
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS ratings (
+                    guild_id INTEGER,
+                    game TEXT,
+                    user_id INTEGER,
+                    rating REAL,
+                    games INTEGER DEFAULT 0,
+                    wins INTEGER DEFAULT 0,
+                    losses INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (guild_id, game, user_id)
                 )
             """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_ratings_ladder ON ratings (guild_id, game, rating DESC)")
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_ratings_user ON ratings (guild_id, user_id)")
             
             # Server configs
             await db.execute("""
@@ -120,6 +202,229 @@ class Database:
                 )
             """)
             
+            # Message activity table (hourly buckets)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS message_activity (
+                    guild_id INTEGER,
+                    channel_id INTEGER,
+                    user_id INTEGER,
+                    hour TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, channel_id, user_id, hour)
+                )
+            """)
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_message_activity_guild_hour ON message_activity (guild_id, hour)"
+            )
+            
+            # First live-counted message per channel, where history backfill stops
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS activity_tracking (
+                    channel_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER,
+                    first_message_id INTEGER
+                )
+            """)
+            
+            # Game playtime per day, plus running all-time totals
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS game_playtime (
+                    guild_id INTEGER,
+                    user_id INTEGER,
+                    game TEXT,
+                    day DATE,
+                    seconds INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, user_id, game, day)
+                )
+            """)
+            await db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_game_playtime_guild_day ON game_playtime (guild_id, day)"
+            )
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS game_playtime_totals (
+                    guild_id INTEGER,
+                    user_id INTEGER,
+                    game TEXT,
+                    seconds INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, user_id, game)
+                )
+            """)
+            
+            # Game deal price index
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS game_deals (
+                    source TEXT,
+                    deal_id TEXT,
+                    title TEXT,
+                    store TEXT,
+                    price REAL,
+                    regular_price REAL,
+                    savings REAL,
+                    url TEXT,
+                    updated_at TIMESTAMP,
+                    PRIMARY KEY (source, deal_id)
+                )
+            """)
+            try:
+                # Trigram full-text index over titles (needs SQLite 3.34+)
+                await db.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS game_deals_fts
+                    USING fts5(title, content='game_deals', tokenize='trigram')
+                """)
+                self.deal_fts = True
+            except aiosqlite.OperationalError:
+                self.deal_fts = False
+            
+            # Trivia/quiz question bank; position numbers each category+difficulty 1..n
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS question_bank (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    pack TEXT,
+                    category TEXT,
+                    difficulty TEXT,
+                    position INTEGER,
+                    question TEXT,
+                    answer TEXT,
+                    incorrect TEXT,
+                    UNIQUE (category, difficulty, question)
+                )
+            """)
+            await db.execute(
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_question_bank_slot ON question_bank (category, difficulty, position)"
+            )
+            
+            # Per-channel shuffle cursors over the question bank
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS question_cursors (
+                    channel_id INTEGER,
+                    category TEXT,
+                    difficulty TEXT,
+                    size INTEGER,
+                    multiplier INTEGER,
+                    shift INTEGER,
+                    position INTEGER,
+                    PRIMARY KEY (channel_id, category, difficulty)
+                )
+            """)
+            
+            # Persistent translation cache keyed by normalized text hash
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS translation_cache (
+                    text_hash TEXT,
+                    source TEXT,
+                    target TEXT,
+                    translated TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (text_hash, source, target)
+                )
+            """)
+            
+            # Polls (ballots are stored per option chosen)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS polls (
+                    poll_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id INTEGER,
+                    channel_id INTEGER,
+                    message_id INTEGER,
+                    author_id INTEGER,
+                    question TEXT,
+                    options TEXT,
+                    multi INTEGER DEFAULT 0,
+                    closes_at TIMESTAMP,
+                    closed INTEGER DEFAULT 0,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS poll_votes (
+                    poll_id INTEGER,
+                    user_id INTEGER,
+                    option INTEGER,
+                    PRIMARY KEY (poll_id, user_id, option)
+                )
+            """)
+            
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_polls_open ON polls (closed, closes_at)")
+            
+            # Pomodoro sessions (the current phase survives restarts)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS pomodoro_sessions (
+                    session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id INTEGER,
+                    channel_id INTEGER,
+                    host_id INTEGER,
+                    members TEXT,
+                    work_minutes INTEGER,
+                    break_minutes INTEGER,
+                    long_break_minutes INTEGER,
+                    cycles INTEGER DEFAULT 1,
+                    cycle INTEGER DEFAULT 1,
+                    phase TEXT DEFAULT 'work',
+                    phase_ends_at TIMESTAMP,
+                    active INTEGER DEFAULT 1,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_pomodoro_active ON pomodoro_sessions (active)")
+            
+            # Flashcard decks, scheduled with SM-2
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS flashcard_decks (
+                    deck_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER,
+                    name TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE (user_id, name)
+                )
+            """)
+            
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS flashcards (
+                    card_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    deck_id INTEGER,
+                    front TEXT,
+                    back TEXT,
+                    ease REAL DEFAULT 2.5,
+                    interval INTEGER DEFAULT 0,
+                    repetitions INTEGER DEFAULT 0,
+                    due_at TEXT,
+                    UNIQUE (deck_id, front)
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_flashcards_due ON flashcards (deck_id, due_at)")
+            
+            # Voice study tracking
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS study_channels (
+                    guild_id INTEGER,
+                    channel_id INTEGER,
+                    PRIMARY KEY (guild_id, channel_id)
+                )
+            """)
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS study_time (
+                    guild_id INTEGER,
+                    user_id INTEGER,
+                    day DATE,
+                    seconds INTEGER DEFAULT 0,
+                    PRIMARY KEY (guild_id, user_id, day)
+                )
+            """)
+            await db.execute("CREATE INDEX IF NOT EXISTS idx_study_time_guild_day ON study_time (guild_id, day)")
+            
+            # History backfill checkpoints
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS history_backfill (
+                    channel_id INTEGER PRIMARY KEY,
+                    guild_id INTEGER,
+                    before_id INTEGER,
+                    messages INTEGER DEFAULT 0,
+                    status TEXT DEFAULT 'running',
+                    updated_at TIMESTAMP
+                )
+            """)
+            
             await db.commit()
     
     # Economy functions
@@ -272,20 +577,21 @@ class Database:
             await db.commit()
     
     # Homework functions
-    async def add_homework(self, user_id: int, subject: str, assignment: str, due_date: str):
-        """Add homework assignment"""
+    async def add_homework(self, user_id: int, subject: str, assignment: str, due_date: str) -> int:
+        """Add homework assignment and return its id"""
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
+            cursor = await db.execute(
                 "INSERT INTO homework (user_id, subject, assignment, due_date) VALUES (?, ?, ?, ?)",
                 (user_id, subject, assignment, due_date)
             )
             await db.commit()
+            return cursor.lastrowid
     
     async def get_homework(self, user_id: int) -> List[Dict[str, Any]]:
-        """Get user's homework"""
+        """Get user's homework, soonest due first"""
         async with aiosqlite.connect(self.db_path) as db:
             async with db.execute(
-                "SELECT id, subject, assignment, due_date, completed FROM homework WHERE user_id = ?",
+                "SELECT id, subject, assignment, due_date, completed FROM homework WHERE user_id = ? ORDER BY due_date, id",
                 (user_id,)
             ) as cursor:
                 rows = await cursor.fetchall()
@@ -300,20 +606,63 @@ class Database:
                     for row in rows
                 ]
     
-    async def complete_homework(self, homework_id: int):
-        """Mark homework as complete"""
+    async def get_homework_item(self, user_id: int, homework_id: int) -> Optional[Dict[str, Any]]:
+        """Get one of a user's homework assignments"""
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute(
-                "UPDATE homework SET completed = 1 WHERE id = ?",
-                (homework_id,)
+            async with db.execute(
+                "SELECT id, subject, assignment, due_date, completed FROM homework WHERE id = ? AND user_id = ?",
+                (homework_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+                if not row:
+                    return None
+                return {
+                    'id': row[0],
+                    'subject': row[1],
+                    'assignment': row[2],
+                    'due_date': row[3],
+                    'completed': bool(row[4])
+                }
+    
+    async def complete_homework(self, homework_id: int, user_id: Optional[int] = None) -> bool:
+        """Mark homework as complete (only the owner's, when user_id is given)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                "UPDATE homework SET completed = 1 WHERE id = ? AND (? IS NULL OR user_id = ?)",
+                (homework_id, user_id, user_id)
             )
             await db.commit()
+            return cursor.rowcount > 0
     
-    async def delete_homework(self, homework_id: int):
-        """Delete homework"""
+    async def delete_homework(self, homework_id: int, user_id: Optional[int] = None) -> bool:
+        """Delete homework (only the owner's, when user_id is given)"""
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("DELETE FROM homework WHERE id = ?", (homework_id,))
+            cursor = await db.execute(
+                "DELETE FROM homework WHERE id = ? AND (? IS NULL OR user_id = ?)",
+                (homework_id, user_id, user_id)
+            )
             await db.commit()
+            return cursor.rowcount > 0
+    
+    async def get_homework_due(self, until: str) -> List[Dict[str, Any]]:
+        """Get every unfinished assignment due on or before until (YYYY-MM-DD), grouped by user"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT user_id, id, subject, assignment, due_date FROM homework
+                   WHERE completed = 0 AND due_date <= ?
+                   ORDER BY user_id, due_date""",
+                (until,)
+            ) as cursor:
+                return [
+                    {
+                        'user_id': row[0],
+                        'id': row[1],
+                        'subject': row[2],
+                        'assignment': row[3],
+                        'due_date': row[4]
+                    }
+                    for row in await cursor.fetchall()
+                ]
     
     # Server config functions
     async def get_server_config(self, guild_id: int) -> Dict[str, Any]:
@@ -525,4 +874,964 @@ class Database:
                 'failed': total - successful,
                 'times_robbed': times_robbed
             }
+    
+    # Message activity functions
+    async def add_message_activity(self, rows: List[tuple], first_messages: Optional[List[tuple]] = None):
+        """Add message counts in one batch; rows are (guild_id, channel_id, user_id, hour, count).
 
+        first_messages are (guild_id, channel_id, message_id) of the earliest message in the batch
+        per channel, recorded only for channels with no activity stored yet.
+        """
+        if not rows:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            if first_messages:
+                await db.executemany(
+                    """INSERT OR IGNORE INTO activity_tracking (channel_id, guild_id, first_message_id)
+                       SELECT ?, ?, ?
+                       WHERE NOT EXISTS (SELECT 1 FROM message_activity WHERE guild_id = ? AND channel_id = ?)""",
+                    [
+                        (channel_id, guild_id, message_id, guild_id, channel_id)
+                        for guild_id, channel_id, message_id in first_messages
+                    ]
+                )
+            await db.executemany(
+                """INSERT INTO message_activity (guild_id, channel_id, user_id, hour, count)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(guild_id, channel_id, user_id, hour)
+                   DO UPDATE SET count = count + excluded.count""",
+                rows
+            )
+            await db.commit()
+    
+    async def get_daily_activity(self, guild_id: int, since: str, user_id: Optional[int] = None) -> List[tuple]:
+        """Get (day, count) message totals since an hour key (YYYY-MM-DD HH:00)"""
+        query = """SELECT substr(hour, 1, 10) AS day, SUM(count)
+                   FROM message_activity
+                   WHERE guild_id = ? AND hour >= ?"""
+        params = [guild_id, since]
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params.append(user_id)
+        query += " GROUP BY day ORDER BY day"
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+    
+    async def get_first_tracked_message(self, channel_id: int) -> Optional[int]:
+        """Get the id of the first message live tracking counted in a channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT first_message_id FROM activity_tracking WHERE channel_id = ?",
+                (channel_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def get_first_activity_hour(self, guild_id: int, channel_id: int) -> Optional[str]:
+        """Get the oldest tracked hour key for a channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT MIN(hour) FROM message_activity WHERE guild_id = ? AND channel_id = ?",
+                (guild_id, channel_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def get_channel_activity(self, guild_id: int, channel_id: int, limit: int = 3) -> Dict[str, Any]:
+        """Get total tracked messages and top posters for a channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT COALESCE(SUM(count), 0) FROM message_activity WHERE guild_id = ? AND channel_id = ?",
+                (guild_id, channel_id)
+            ) as cursor:
+                total = (await cursor.fetchone())[0]
+            
+            async with db.execute(
+                """SELECT user_id, SUM(count) AS total
+                   FROM message_activity
+                   WHERE guild_id = ? AND channel_id = ?
+                   GROUP BY user_id
+                   ORDER BY total DESC
+                   LIMIT ?""",
+                (guild_id, channel_id, limit)
+            ) as cursor:
+                top_users = await cursor.fetchall()
+            
+            return {'total': total, 'top_users': top_users}
+    
+    # History backfill functions
+    async def get_backfill(self, channel_id: int) -> Optional[Dict[str, Any]]:
+        """Get the backfill checkpoint for a channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT channel_id, guild_id, before_id, messages, status FROM history_backfill WHERE channel_id = ?",
+                (channel_id,)
+            ) as cursor:
+                row = await cursor.fetchone()
+                if row:
+                    return {
+                        'channel_id': row[0],
+                        'guild_id': row[1],
+                        'before_id': row[2],
+                        'messages': row[3],
+                        'status': row[4]
+                    }
+                return None
+    
+    async def get_backfills(self, guild_id: Optional[int] = None, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get backfill checkpoints, optionally filtered by guild and status"""
+        query = "SELECT channel_id, guild_id, before_id, messages, status FROM history_backfill WHERE 1 = 1"
+        params = []
+        if guild_id is not None:
+            query += " AND guild_id = ?"
+            params.append(guild_id)
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+                return [
+                    {
+                        'channel_id': row[0],
+                        'guild_id': row[1],
+                        'before_id': row[2],
+                        'messages': row[3],
+                        'status': row[4]
+                    }
+                    for row in rows
+                ]
+    
+    async def start_backfill(self, guild_id: int, channel_id: int, before_id: int, replace_hour: Optional[str] = None):
+        """Create (or resume) a backfill checkpoint for a channel.
+
+        replace_hour clears that hour's counts so the backfill can re-import it whole.
+        """
+        async with aiosqlite.connect(self.db_path) as db:
+            if replace_hour:
+                await db.execute(
+                    "DELETE FROM message_activity WHERE guild_id = ? AND channel_id = ? AND hour = ?",
+                    (guild_id, channel_id, replace_hour)
+                )
+            await db.execute(
+                """INSERT INTO history_backfill (channel_id, guild_id, before_id, status, updated_at)
+                   VALUES (?, ?, ?, 'running', ?)
+                   ON CONFLICT(channel_id) DO UPDATE SET status = 'running', updated_at = excluded.updated_at""",
+                (channel_id, guild_id, before_id, datetime.utcnow().isoformat())
+            )
+            await db.commit()
+    
+    async def save_backfill_chunk(self, channel_id: int, rows: List[tuple], before_id: int, scanned: int, status: str):
+        """Store a chunk of backfilled counts and advance the checkpoint in one transaction"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if rows:
+                await db.executemany(
+                    """INSERT INTO message_activity (guild_id, channel_id, user_id, hour, count)
+                       VALUES (?, ?, ?, ?, ?)
+                       ON CONFLICT(guild_id, channel_id, user_id, hour)
+                       DO UPDATE SET count = count + excluded.count""",
+                    rows
+                )
+            await db.execute(
+                """UPDATE history_backfill
+                   SET before_id = ?, messages = messages + ?, status = ?, updated_at = ?
+                   WHERE channel_id = ?""",
+                (before_id, scanned, status, datetime.utcnow().isoformat(), channel_id)
+            )
+            await db.commit()
+    
+    async def set_backfill_status(self, channel_id: int, status: str):
+        """Update the status of a backfill job"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "UPDATE history_backfill SET status = ?, updated_at = ? WHERE channel_id = ?",
+                (status, datetime.utcnow().isoformat(), channel_id)
+            )
+            await db.commit()
+    
+    # Game playtime functions
+    async def add_playtime(self, rows: List[tuple]):
+        """Add playtime in one batch; rows are (guild_id, user_id, game, day, seconds)"""
+        if not rows:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                """INSERT INTO game_playtime (guild_id, user_id, game, day, seconds)
+                   VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(guild_id, user_id, game, day)
+                   DO UPDATE SET seconds = seconds + excluded.seconds""",
+                rows
+            )
+            await db.executemany(
+                """INSERT INTO game_playtime_totals (guild_id, user_id, game, seconds)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(guild_id, user_id, game)
+                   DO UPDATE SET seconds = seconds + excluded.seconds""",
+                [(guild_id, user_id, game, seconds) for guild_id, user_id, game, _, seconds in rows]
+            )
+            await db.commit()
+    
+    async def get_top_playtime(self, guild_id: int, since: Optional[str] = None, limit: int = 10) -> List[tuple]:
+        """Get (user_id, seconds) of the biggest players, optionally since a day (YYYY-MM-DD)"""
+        if since is None:
+            query = """SELECT user_id, SUM(seconds) AS total
+                       FROM game_playtime_totals
+                       WHERE guild_id = ?
+                       GROUP BY user_id
+                       ORDER BY total DESC
+                       LIMIT ?"""
+            params = (guild_id, limit)
+        else:
+            query = """SELECT user_id, SUM(seconds) AS total
+                       FROM game_playtime
+                       WHERE guild_id = ? AND day >= ?
+                       GROUP BY user_id
+                       ORDER BY total DESC
+                       LIMIT ?"""
+            params = (guild_id, since, limit)
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+    
+    async def get_user_playtime(self, guild_id: int, user_id: int, since: Optional[str] = None, limit: int = 10) -> List[tuple]:
+        """Get (game, seconds) for a member's most played games, optionally since a day"""
+        if since is None:
+            query = """SELECT game, seconds
+                       FROM game_playtime_totals
+                       WHERE guild_id = ? AND user_id = ?
+                       ORDER BY seconds DESC
+                       LIMIT ?"""
+            params = (guild_id, user_id, limit)
+        else:
+            query = """SELECT game, SUM(seconds) AS total
+                       FROM game_playtime
+                       WHERE guild_id = ? AND user_id = ? AND day >= ?
+                       GROUP BY game
+                       ORDER BY total DESC
+                       LIMIT ?"""
+            params = (guild_id, user_id, since, limit)
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(query, params) as cursor:
+                return await cursor.fetchall()
+    
+    # Game deal functions
+    async def ingest_deals(self, source: str, deals: List[Dict[str, Any]]) -> int:
+        """Replace a source's deals with a fresh snapshot and rebuild the title index"""
+        refreshed_at = datetime.utcnow().isoformat()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                """INSERT INTO game_deals (source, deal_id, title, store, price, regular_price, savings, url, updated_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(source, deal_id) DO UPDATE SET
+                       title = excluded.title, store = excluded.store, price = excluded.price,
+                       regular_price = excluded.regular_price, savings = excluded.savings,
+                       url = excluded.url, updated_at = excluded.updated_at""",
+                [
+                    (source, deal['deal_id'], deal['title'], deal['store'], deal['price'],
+                     deal['regular_price'], deal['savings'], deal['url'], refreshed_at)
+                    for deal in deals
+                ]
+            )
+            # Anything the feed no longer lists has expired
+            await db.execute(
+                "DELETE FROM game_deals WHERE source = ? AND updated_at < ?",
+                (source, refreshed_at)
+            )
+            if self.deal_fts:
+                await db.execute("INSERT INTO game_deals_fts(game_deals_fts) VALUES('rebuild')")
+            await db.commit()
+        return len(deals)
+    
+    async def search_deals(self, match: str, text: str, limit: int = 5) -> List[Dict[str, Any]]:
+        """Find deals by title; match is an FTS5 trigram query, text the raw search"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if self.deal_fts and match:
+                query = """SELECT d.title, d.store, d.price, d.regular_price, d.savings, d.url
+                           FROM game_deals_fts f
+                           JOIN game_deals d ON d.rowid = f.rowid
+                           WHERE game_deals_fts MATCH ?
+                           ORDER BY bm25(game_deals_fts), d.price
+                           LIMIT ?"""
+                params = (match, limit)
+            else:
+                query = """SELECT title, store, price, regular_price, savings, url
+                           FROM game_deals
+                           WHERE title LIKE ?
+                           ORDER BY price
+                           LIMIT ?"""
+                params = (f"%{text}%", limit)
+            
+            async with db.execute(query, params) as cursor:
+                rows = await cursor.fetchall()
+                return [
+                    {
+                        'title': row[0],
+                        'store': row[1],
+                        'price': row[2],
+                        'regular_price': row[3],
+                        'savings': row[4],
+                        'url': row[5]
+                    }
+                    for row in rows
+                ]
+    
+    async def get_deal_index_info(self) -> Dict[str, Any]:
+        """Get the number of indexed deals and when they were last refreshed"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT COUNT(*), MAX(updated_at) FROM game_deals") as cursor:
+                row = await cursor.fetchone()
+                return {
+                    'count': row[0],
+                    'updated_at': datetime.fromisoformat(row[1]) if row[1] else None
+                }
+    
+    # Question bank functions
+    async def import_questions(self, pack: str, questions: List[Dict[str, Any]]) -> int:
+        """Bulk-add normalized questions, skipping ones already in the bank"""
+        async with aiosqlite.connect(self.db_path) as db:
+            before = db.total_changes
+            await db.executemany(
+                """INSERT OR IGNORE INTO question_bank (pack, category, difficulty, position, question, answer, incorrect)
+                   SELECT ?, ?, ?, COALESCE(MAX(position), 0) + 1, ?, ?, ?
+                   FROM question_bank WHERE category = ? AND difficulty = ?""",
+                [
+                    (pack, q['category'], q['difficulty'], q['question'], q['answer'],
+                     json.dumps(q['incorrect']), q['category'], q['difficulty'])
+                    for q in questions
+                ]
+            )
+            added = db.total_changes - before
+            await db.commit()
+        return added
+    
+    async def get_question_categories(self) -> Dict[str, int]:
+        """Get each category in the question bank with its question count"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT category, COUNT(*) FROM question_bank GROUP BY category ORDER BY category"
+            ) as cursor:
+                return {row[0]: row[1] for row in await cursor.fetchall()}
+    
+    async def next_question(self, channel_id: int, category: str, difficulty: str) -> Optional[Dict[str, Any]]:
+        """Draw the channel's next question, cycling through the bank without repeats"""
+        async with aiosqlite.connect(self.db_path) as db:
+            # Serialize cursor advances so concurrent draws never share a slot
+            await db.execute("BEGIN IMMEDIATE")
+            
+            async with db.execute(
+                "SELECT COUNT(*) FROM question_bank WHERE category = ? AND difficulty = ?",
+                (category, difficulty)
+            ) as cursor:
+                size = (await cursor.fetchone())[0]
+            if not size:
+                await db.rollback()
+                return None
+            
+            async with db.execute(
+                """SELECT size, multiplier, shift, position FROM question_cursors
+                   WHERE channel_id = ? AND category = ? AND difficulty = ?""",
+                (channel_id, category, difficulty)
+            ) as cursor:
+                row = await cursor.fetchone()
+            
+            # Reshuffle when the cycle is used up or the bank has grown
+            if row is None or row[0] != size or row[3] >= size:
+                multiplier, shift = new_permutation(size)
+                position = 0
+            else:
+                _, multiplier, shift, position = row
+            
+            slot = permuted_slot(position, size, multiplier, shift)
+            await db.execute(
+                """INSERT INTO question_cursors (channel_id, category, difficulty, size, multiplier, shift, position)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(channel_id, category, difficulty) DO UPDATE SET
+                       size = excluded.size, multiplier = excluded.multiplier,
+                       shift = excluded.shift, position = excluded.position""",
+                (channel_id, category, difficulty, size, multiplier, shift, position + 1)
+            )
+            
+            async with db.execute(
+                """SELECT question, answer, incorrect FROM question_bank
+                   WHERE category = ? AND difficulty = ? AND position = ?""",
+                (category, difficulty, slot + 1)
+            ) as cursor:
+                row = await cursor.fetchone()
+            await db.commit()
+            
+            if not row:
+                return None
+            return {
+                'category': category,
+                'difficulty': difficulty,
+                'question': row[0],
+                'answer': row[1],
+                'incorrect': json.loads(row[2] or '[]')
+            }
+    
+    # Translation cache functions
+    async def get_translation(self, text_hash: str, source: str, target: str) -> Optional[str]:
+        """Get a cached translation"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT translated FROM translation_cache WHERE text_hash = ? AND source = ? AND target = ?",
+                (text_hash, source, target)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def save_translations(self, rows: List[tuple]):
+        """Store (text_hash, source, target, translated) rows"""
+        if not rows:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                """INSERT INTO translation_cache (text_hash, source, target, translated)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(text_hash, source, target) DO UPDATE SET translated = excluded.translated""",
+                rows
+            )
+            await db.commit()
+    
+    # Poll functions
+    async def create_poll(self, guild_id: int, channel_id: int, author_id: int, question: str, options: List[str], multi: bool, closes_at: Optional[datetime]) -> int:
+        """Create a poll and return its id"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                """INSERT INTO polls (guild_id, channel_id, author_id, question, options, multi, closes_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (guild_id, channel_id, author_id, question, json.dumps(options), int(multi), closes_at.isoformat() if closes_at else None)
+            )
+            await db.commit()
+            return cursor.lastrowid
+    
+    async def set_poll_message(self, poll_id: int, message_id: int):
+        """Attach the posted message to a poll"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE polls SET message_id = ? WHERE poll_id = ?", (message_id, poll_id))
+            await db.commit()
+    
+    async def get_open_polls(self) -> List[Dict[str, Any]]:
+        """Get open polls with their tallies, rebuilt from the stored ballots"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT poll_id, channel_id, message_id, author_id, question, options, multi, closes_at
+                   FROM polls WHERE closed = 0 AND message_id IS NOT NULL"""
+            ) as cursor:
+                polls = [
+                    {
+                        'poll_id': row[0],
+                        'channel_id': row[1],
+                        'message_id': row[2],
+                        'author_id': row[3],
+                        'question': row[4],
+                        'options': json.loads(row[5]),
+                        'multi': bool(row[6]),
+                        'closes_at': datetime.fromisoformat(row[7]) if row[7] else None
+                    }
+                    for row in await cursor.fetchall()
+                ]
+            
+            for poll in polls:
+                tallies = [0] * len(poll['options'])
+                async with db.execute(
+                    "SELECT option, COUNT(*) FROM poll_votes WHERE poll_id = ? GROUP BY option",
+                    (poll['poll_id'],)
+                ) as cursor:
+                    for option, votes in await cursor.fetchall():
+                        if option < len(tallies):
+                            tallies[option] = votes
+                async with db.execute(
+                    "SELECT COUNT(DISTINCT user_id) FROM poll_votes WHERE poll_id = ?",
+                    (poll['poll_id'],)
+                ) as cursor:
+                    poll['voters'] = (await cursor.fetchone())[0]
+                poll['tallies'] = tallies
+            return polls
+    
+    async def get_poll_ballot(self, poll_id: int, user_id: int) -> List[int]:
+        """Get the options a user has voted for"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                "SELECT option FROM poll_votes WHERE poll_id = ? AND user_id = ?",
+                (poll_id, user_id)
+            ) as cursor:
+                return [row[0] for row in await cursor.fetchall()]
+    
+    async def save_poll_ballots(self, ballots: List[tuple]):
+        """Replace the stored ballots for (poll_id, user_id, options) in one transaction"""
+        if not ballots:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                "DELETE FROM poll_votes WHERE poll_id = ? AND user_id = ?",
+                [(poll_id, user_id) for poll_id, user_id, _ in ballots]
+            )
+            await db.executemany(
+                "INSERT INTO poll_votes (poll_id, user_id, option) VALUES (?, ?, ?)",
+                [(poll_id, user_id, option) for poll_id, user_id, options in ballots for option in options]
+            )
+            await db.commit()
+    
+    async def close_poll(self, poll_id: int):
+        """Mark a poll as closed"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE polls SET closed = 1 WHERE poll_id = ?", (poll_id,))
+            await db.commit()
+    
+    # Pomodoro functions
+    async def create_pomodoro(self, session: Dict[str, Any]) -> int:
+        """Store a new Pomodoro session and return its id"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                """INSERT INTO pomodoro_sessions
+                   (guild_id, channel_id, host_id, members, work_minutes, break_minutes, long_break_minutes,
+                    cycles, cycle, phase, phase_ends_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    session['guild_id'], session['channel_id'], session['host_id'], json.dumps(session['members']),
+                    session['work_minutes'], session['break_minutes'], session['long_break_minutes'],
+                    session['cycles'], session['cycle'], session['phase'], session['phase_ends_at'].isoformat()
+                )
+            )
+            await db.commit()
+            return cursor.lastrowid
+    
+    async def save_pomodoro(self, session: Dict[str, Any]):
+        """Persist a session's members and current phase"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                """UPDATE pomodoro_sessions SET members = ?, cycle = ?, phase = ?, phase_ends_at = ?
+                   WHERE session_id = ?""",
+                (json.dumps(session['members']), session['cycle'], session['phase'], session['phase_ends_at'].isoformat(), session['session_id'])
+            )
+            await db.commit()
+    
+    async def end_pomodoro(self, session_id: int):
+        """Mark a Pomodoro session as finished"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE pomodoro_sessions SET active = 0 WHERE session_id = ?", (session_id,))
+            await db.commit()
+    
+    async def get_active_pomodoros(self) -> List[Dict[str, Any]]:
+        """Get every running Pomodoro session"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT session_id, guild_id, channel_id, host_id, members, work_minutes, break_minutes,
+                          long_break_minutes, cycles, cycle, phase, phase_ends_at
+                   FROM pomodoro_sessions WHERE active = 1"""
+            ) as cursor:
+                return [
+                    {
+                        'session_id': row[0],
+                        'guild_id': row[1],
+                        'channel_id': row[2],
+                        'host_id': row[3],
+                        'members': json.loads(row[4]),
+                        'work_minutes': row[5],
+                        'break_minutes': row[6],
+                        'long_break_minutes': row[7],
+                        'cycles': row[8],
+                        'cycle': row[9],
+                        'phase': row[10],
+                        'phase_ends_at': datetime.fromisoformat(row[11])
+                    }
+                    for row in await cursor.fetchall()
+                ]
+    
+    # Flashcard functions
+    async def get_deck(self, user_id: int, name: str, create: bool = False) -> Optional[int]:
+        """Get a user's deck id by name, optionally creating the deck"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if create:
+                await db.execute(
+                    "INSERT OR IGNORE INTO flashcard_decks (user_id, name) VALUES (?, ?)",
+                    (user_id, name)
+                )
+                await db.commit()
+            async with db.execute(
+                "SELECT deck_id FROM flashcard_decks WHERE user_id = ? AND name = ?",
+                (user_id, name)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def get_decks(self, user_id: int, now: str) -> List[Dict[str, Any]]:
+        """Get a user's decks with total and due card counts"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT d.name,
+                          (SELECT COUNT(*) FROM flashcards f WHERE f.deck_id = d.deck_id),
+                          (SELECT COUNT(*) FROM flashcards f WHERE f.deck_id = d.deck_id AND f.due_at <= ?)
+                   FROM flashcard_decks d WHERE d.user_id = ? ORDER BY d.name""",
+                (now, user_id)
+            ) as cursor:
+                return [{'name': row[0], 'cards': row[1], 'due': row[2]} for row in await cursor.fetchall()]
+    
+    async def delete_deck(self, deck_id: int):
+        """Delete a deck and its cards"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("DELETE FROM flashcards WHERE deck_id = ?", (deck_id,))
+            await db.execute("DELETE FROM flashcard_decks WHERE deck_id = ?", (deck_id,))
+            await db.commit()
+    
+    async def add_flashcards(self, deck_id: int, cards: List[tuple], due_at: str) -> int:
+        """Add (front, back) cards in one transaction, skipping fronts already in the deck"""
+        async with aiosqlite.connect(self.db_path) as db:
+            before = db.total_changes
+            await db.executemany(
+                "INSERT OR IGNORE INTO flashcards (deck_id, front, back, due_at) VALUES (?, ?, ?, ?)",
+                [(deck_id, front, back, due_at) for front, back in cards]
+            )
+            await db.commit()
+            return db.total_changes - before
+    
+    async def get_due_flashcards(self, deck_id: int, now: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Get the most overdue cards of a deck (a range scan on the due index)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT card_id, front, back, ease, interval, repetitions FROM flashcards
+                   WHERE deck_id = ? AND due_at <= ? ORDER BY due_at LIMIT ?""",
+                (deck_id, now, limit)
+            ) as cursor:
+                return [
+                    {
+                        'card_id': row[0],
+                        'front': row[1],
+                        'back': row[2],
+                        'ease': row[3],
+                        'interval': row[4],
+                        'repetitions': row[5]
+                    }
+                    for row in await cursor.fetchall()
+                ]
+    
+    async def get_next_flashcard_due(self, deck_id: int) -> Optional[str]:
+        """When the deck's next card becomes due"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT MIN(due_at) FROM flashcards WHERE deck_id = ?", (deck_id,)) as cursor:
+                row = await cursor.fetchone()
+                return row[0] if row else None
+    
+    async def schedule_flashcard(self, card_id: int, ease: float, interval: int, repetitions: int, due_at: str):
+        """Store a card's new SM-2 state after a review"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "UPDATE flashcards SET ease = ?, interval = ?, repetitions = ?, due_at = ? WHERE card_id = ?",
+                (ease, interval, repetitions, due_at, card_id)
+            )
+            await db.commit()
+    
+    # Study time functions
+    async def get_study_channels(self) -> List[tuple]:
+        """Get every (guild_id, channel_id) marked as a study channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT guild_id, channel_id FROM study_channels") as cursor:
+                return await cursor.fetchall()
+    
+    async def set_study_channel(self, guild_id: int, channel_id: int, enabled: bool):
+        """Mark or unmark a voice channel as a study channel"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if enabled:
+                await db.execute(
+                    "INSERT OR IGNORE INTO study_channels (guild_id, channel_id) VALUES (?, ?)",
+                    (guild_id, channel_id)
+                )
+            else:
+                await db.execute(
+                    "DELETE FROM study_channels WHERE guild_id = ? AND channel_id = ?",
+                    (guild_id, channel_id)
+                )
+            await db.commit()
+    
+    async def add_study_time(self, rows: List[tuple]):
+        """Add study time in one batch; rows are (guild_id, user_id, day, seconds)"""
+        if not rows:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                """INSERT INTO study_time (guild_id, user_id, day, seconds)
+                   VALUES (?, ?, ?, ?)
+                   ON CONFLICT(guild_id, user_id, day)
+                   DO UPDATE SET seconds = seconds + excluded.seconds""",
+                rows
+            )
+            await db.commit()
+    
+    async def get_study_totals(self, guild_id: int, user_id: int, today: str, week_start: str) -> Dict[str, int]:
+        """Get a member's study seconds for today, this week and all time in one pass"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT COALESCE(SUM(CASE WHEN day >= ? THEN seconds END), 0),
+                          COALESCE(SUM(CASE WHEN day >= ? THEN seconds END), 0),
+                          COALESCE(SUM(seconds), 0),
+                          COUNT(*)
+                   FROM study_time WHERE guild_id = ? AND user_id = ?""",
+                (today, week_start, guild_id, user_id)
+            ) as cursor:
+                row = await cursor.fetchone()
+                return {'today': row[0], 'week': row[1], 'total': row[2], 'days': row[3]}
+    
+    async def get_study_leaderboard(self, guild_id: int, since: str, limit: int = 10) -> List[tuple]:
+        """Get (user_id, seconds) of the members who studied most since a day (YYYY-MM-DD)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT user_id, SUM(seconds) AS total
+                   FROM study_time
+                   WHERE guild_id = ? AND day >= ?
+                   GROUP BY user_id
+                   ORDER BY total DESC
+                   LIMIT ?""",
+                (guild_id, since, limit)
+            ) as cursor:
+                return await cursor.fetchall()
+    
+    # Tournament functions
+    async def create_tournament(
+        self, guild_id: int, name: str, game: str, max_players: int, description: str, host_id: int, format: str = 'single'
+    ) -> int:
+        """Create a tournament in registration and return its id"""
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.execute(
+                """INSERT INTO tournaments (guild_id, name, game, max_players, status, created_at, description, host_id, format)
+                   VALUES (?, ?, ?, ?, 'registration', ?, ?, ?, ?)""",
+                (guild_id, name, game, max_players, datetime.utcnow().isoformat(), description, host_id, format)
+            )
+            await db.commit()
+            return cursor.lastrowid
+    
+    async def _load_tournaments(self, db, where: str, params: tuple) -> List[Dict[str, Any]]:
+        """Tournaments matching where, with players and matches fetched in bulk"""
+        async with db.execute(
+            f"""SELECT id, guild_id, name, game, max_players, status, created_at, description, host_id,
+                       format, rounds, winner_id
+                FROM tournaments WHERE {where}""",
+            params
+        ) as cursor:
+            tournaments = {
+                row[0]: {
+                    'id': row[0],
+                    'guild_id': row[1],
+                    'name': row[2],
+                    'game': row[3],
+                    'max_players': row[4],
+                    'status': row[5],
+                    'created_at': datetime.fromisoformat(row[6]) if row[6] else datetime.utcnow(),
+                    'description': row[7] or "No description provided",
+                    'host': row[8],
+                    'format': row[9] or 'single',
+                    'rounds': row[10],
+                    'winner': row[11],
+                    'players': [],
+                    'matches': []
+                }
+                for row in await cursor.fetchall()
+            }
+        if not tournaments:
+            return []
+        
+        ids = list(tournaments)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ", ".join("?" * len(chunk))
+            async with db.execute(
+                f"""SELECT tournament_id, user_id FROM tournament_players WHERE tournament_id IN ({marks})
+                    ORDER BY seed IS NULL, seed, joined_at, rowid""",
+                chunk
+            ) as cursor:
+                for tournament_id, user_id in await cursor.fetchall():
+                    tournaments[tournament_id]['players'].append(user_id)
+            async with db.execute(
+                f"""SELECT tournament_id, match_id, round, position, player1_id, player2_id, winner_id,
+                           section, next_match, next_slot, loser_match, loser_slot
+                    FROM tournament_matches WHERE tournament_id IN ({marks}) ORDER BY match_id""",
+                chunk
+            ) as cursor:
+                for row in await cursor.fetchall():
+                    tournaments[row[0]]['matches'].append({
+                        'match_id': row[1],
+                        'round': row[2],
+                        'position': row[3],
+                        'player1': row[4],
+                        'player2': row[5],
+                        'winner': row[6],
+                        'section': row[7],
+                        'next_match': row[8],
+                        'next_slot': row[9],
+                        'loser_match': row[10],
+                        'loser_slot': row[11]
+                    })
+        return list(tournaments.values())
+    
+    async def get_tournament(self, tournament_id: int) -> Optional[Dict[str, Any]]:
+        """Get a tournament with its players and matches"""
+        async with aiosqlite.connect(self.db_path) as db:
+            tournaments = await self._load_tournaments(db, "id = ?", (tournament_id,))
+            return tournaments[0] if tournaments else None
+    
+    async def get_active_tournaments(self) -> List[Dict[str, Any]]:
+        """Get every tournament that hasn't finished, for loading at startup"""
+        async with aiosqlite.connect(self.db_path) as db:
+            return await self._load_tournaments(db, "status IN ('registration', 'active')", ())
+    
+    async def get_tournaments(self, guild_id: int, before_id: Optional[int] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get one page of a guild's tournaments, newest first (keyset pagination on the guild index)"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT t.id, t.name, t.game, t.max_players, t.status, t.format,
+                          (SELECT COUNT(*) FROM tournament_players p WHERE p.tournament_id = t.id)
+                   FROM tournaments t
+                   WHERE t.guild_id = ? AND t.id < ?
+                   ORDER BY t.id DESC LIMIT ?""",
+                (guild_id, before_id if before_id is not None else 2 ** 63 - 1, limit)
+            ) as cursor:
+                return [
+                    {
+                        'id': row[0], 'name': row[1], 'game': row[2], 'max_players': row[3], 'status': row[4],
+                        'format': row[5] or 'single', 'player_count': row[6]
+                    }
+                    for row in await cursor.fetchall()
+                ]
+    
+    async def count_tournaments(self, guild_id: int) -> int:
+        """Count a guild's tournaments"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("SELECT COUNT(*) FROM tournaments WHERE guild_id = ?", (guild_id,)) as cursor:
+                return (await cursor.fetchone())[0]
+    
+    async def add_tournament_player(self, tournament_id: int, user_id: int):
+        """Register a player"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "INSERT OR IGNORE INTO tournament_players (tournament_id, user_id) VALUES (?, ?)",
+                (tournament_id, user_id)
+            )
+            await db.commit()
+    
+    async def remove_tournament_player(self, tournament_id: int, user_id: int):
+        """Unregister a player"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute(
+                "DELETE FROM tournament_players WHERE tournament_id = ? AND user_id = ?",
+                (tournament_id, user_id)
+            )
+            await db.commit()
+    
+    async def start_tournament(self, tournament_id: int, seeds: List[int], rounds: Optional[int], matches: List[Dict[str, Any]]):
+        """Record the seeding and the initial bracket, and open play"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE tournaments SET status = 'active', rounds = ? WHERE id = ?", (rounds, tournament_id))
+            await db.executemany(
+                "UPDATE tournament_players SET seed = ? WHERE tournament_id = ? AND user_id = ?",
+                [(seed, tournament_id, user_id) for seed, user_id in enumerate(seeds, 1)]
+            )
+            await self._upsert_tournament_matches(db, tournament_id, matches)
+            await db.commit()
+    
+    async def save_tournament_matches(
+        self, tournament_id: int, status: str, matches: List[Dict[str, Any]], winner_id: Optional[int] = None
+    ):
+        """Set a tournament's status (and champion) and upsert the changed matches in one transaction"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("UPDATE tournaments SET status = ?, winner_id = ? WHERE id = ?", (status, winner_id, tournament_id))
+            await self._upsert_tournament_matches(db, tournament_id, matches)
+            await db.commit()
+    
+    @staticmethod
+    async def _upsert_tournament_matches(db, tournament_id: int, matches: List[Dict[str, Any]]):
+        await db.executemany(
+            """INSERT INTO tournament_matches (tournament_id, match_id, round, position, player1_id, player2_id, winner_id,
+                                               section, next_match, next_slot, loser_match, loser_slot)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+               ON CONFLICT(tournament_id, match_id) DO UPDATE SET
+                   player1_id = excluded.player1_id,
+                   player2_id = excluded.player2_id,
+                   winner_id = excluded.winner_id""",
+            [
+                (
+                    tournament_id, match['match_id'], match['round'], match['position'],
+                    match['player1'], match['player2'], match['winner'],
+                    match['section'], match['next_match'], match['next_slot'], match['loser_match'], match['loser_slot']
+                )
+                for match in matches
+            ]
+        )
+    
+    async def delete_tournament(self, tournament_id: int):
+        """Delete a tournament with its players and matches"""
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.execute("DELETE FROM tournament_matches WHERE tournament_id = ?", (tournament_id,))
+            await db.execute("DELETE FROM tournament_players WHERE tournament_id = ?", (tournament_id,))
+            await db.execute("DELETE FROM tournaments WHERE id = ?", (tournament_id,))
+            await db.commit()
+    
+    # Rating functions
+    async def get_ratings(self, guild_id: int, game: str, user_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Get {user_id: rating row} for the players that have one"""
+        ratings = {}
+        async with aiosqlite.connect(self.db_path) as db:
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                marks = ", ".join("?" * len(chunk))
+                async with db.execute(
+                    f"""SELECT user_id, rating, games, wins, losses FROM ratings
+                        WHERE guild_id = ? AND game = ? AND user_id IN ({marks})""",
+                    (guild_id, game, *chunk)
+                ) as cursor:
+                    for row in await cursor.fetchall():
+                        ratings[row[0]] = {'rating': row[1], 'games': row[2], 'wins': row[3], 'losses': row[4]}
+        return ratings
+    
+    async def record_rated_match(self, guild_id: int, game: str, winner_id: int, winner_rating: float, loser_id: int, loser_rating: float):
+        """Store both players' new ratings and count the game"""
+        now = datetime.utcnow().isoformat()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany(
+                """INSERT INTO ratings (guild_id, game, user_id, rating, games, wins, losses, updated_at)
+                   VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+                   ON CONFLICT(guild_id, game, user_id) DO UPDATE SET
+                       rating = excluded.rating,
+                       games = games + 1,
+                       wins = wins + excluded.wins,
+                       losses = losses + excluded.losses,
+                       updated_at = excluded.updated_at""",
+                [
+                    (guild_id, game, winner_id, winner_rating, 1, 0, now),
+                    (guild_id, game, loser_id, loser_rating, 0, 1, now)
+                ]
+            )
+            await db.commit()
+    
+    async def get_user_ratings(self, guild_id: int, user_id: int) -> List[Dict[str, Any]]:
+        """Get a member's rating in every game they've played, each with its rank"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT r.game, r.rating, r.games, r.wins, r.losses,
+                          (SELECT COUNT(*) FROM ratings o
+                           WHERE o.guild_id = r.guild_id AND o.game = r.game AND o.rating > r.rating) + 1
+                   FROM ratings r
+                   WHERE r.guild_id = ? AND r.user_id = ?
+                   ORDER BY r.games DESC""",
+                (guild_id, user_id)
+            ) as cursor:
+                return [
+                    {'game': row[0], 'rating': row[1], 'games': row[2], 'wins': row[3], 'losses': row[4], 'rank': row[5]}
+                    for row in await cursor.fetchall()
+                ]
+    
+    async def get_rating_leaderboard(self, guild_id: int, game: str, limit: int = 10) -> List[tuple]:
+        """Get (user_id, rating, wins, losses) of the highest rated players in a game"""
+        async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute(
+                """SELECT user_id, rating, wins, losses FROM ratings
+                   WHERE guild_id = ? AND game = ?
+                   ORDER BY rating DESC
+                   LIMIT ?""",
+                (guild_id, game, limit)
+            ) as cursor:
+                return await cursor.fetchall()
@@ -0,0 +1,116 @@
+"""
+Game deal feeds for MegaBot
+Pluggable price sources that feed the local deal index
+"""
+
+import asyncio
+import json
+import logging
+from typing import Any, Dict, List
+
+from config import Config
+
+logger = logging.getLogger('MegaBot.Deals')
+
+
+def normalize_deal(raw: Dict[str, Any], store: str = None) -> Dict[str, Any]:
+    """Fill in the fields every deal row needs"""
+    price = float(raw['price'])
+    regular_price = float(raw.get('regular_price') or price)
+    savings = raw.get('savings')
+    if savings is None:
+        savings = (1 - price / regular_price) * 100 if regular_price else 0
+    return {
+        'deal_id': str(raw.get('deal_id') or f"{raw.get('store', store)}:{raw['title']}"),
+        'title': raw['title'],
+        'store': raw.get('store') or store or 'Unknown',
+        'price': price,
+        'regular_price': regular_price,
+        'savings': round(float(savings), 1),
+        'url': raw.get('url', '')
+    }
+
+
+class DealSource:
+    """Base class for price feeds; fetch() returns normalized deal dicts"""
+
+    name = 'base'
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class JSONFileDealSource(DealSource):
+    """Reads deals from a local JSON file (a list of deal objects)"""
+
+    name = 'file'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read(self) -> List[Dict[str, Any]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        raw_deals = await asyncio.to_thread(self._read)
+        return [normalize_deal(deal) for deal in raw_deals]
+
+
+class CheapSharkDealSource(DealSource):
+    """Current deals across PC stores from the CheapShark API"""
+
+    name = 'cheapshark'
+    BASE_URL = 'https://www.cheapshark.com/api/1.0'
+
+    def __init__(self, bot, pages: int = 5):
+        self.bot = bot
+        self.pages = pages
+        self.stores = {}  # {store_id: store_name}
+
+    async def _load_stores(self):
+        data = await self.bot.http_client.get_json(f"{self.BASE_URL}/stores")
+        if data:
+            self.stores = {store['storeID']: store['storeName'] for store in data}
+
+    async def fetch(self) -> List[Dict[str, Any]]:
+        if not self.stores:
+            await self._load_stores()
+
+        deals = []
+        for page in range(self.pages):
+            params = {'pageNumber': page, 'pageSize': 60, 'sortBy': 'Deal Rating'}
+            data = await self.bot.http_client.get_json(f"{self.BASE_URL}/deals", params=params, stale=False)
+            if data is None:
+                break
+
+            for deal in data:
+                deals.append(normalize_deal({
+                    'deal_id': deal['dealID'],
+                    'title': deal['title'],
+                    'store': self.stores.get(deal['storeID'], f"Store {deal['storeID']}"),
+                    'price': deal['salePrice'],
+                    'regular_price': deal['normalPrice'],
+                    'savings': deal.get('savings'),
+                    'url': f"https://www.cheapshark.com/redirect?dealID={deal['dealID']}"
+                }))
+
+            if len(data) < 60:
+                break
+        return deals
+
+
+def create_deal_source(bot) -> DealSource:
+    """Build the configured deal source (DEAL_FEED_PATH overrides DEAL_SOURCE)"""
+    if Config.DEAL_FEED_PATH:
+        return JSONFileDealSource(Config.DEAL_FEED_PATH)
+    if Config.DEAL_SOURCE == 'cheapshark':
+        return CheapSharkDealSource(bot, pages=Config.DEAL_PAGES)
+    raise ValueError(f"Unknown deal source: {Config.DEAL_SOURCE}")
+
+
+def trigram_query(text: str) -> str:
+    """FTS5 MATCH expression OR-ing every trigram of text, for typo-tolerant search"""
+    cleaned = ' '.join(''.join(c if c.isalnum() else ' ' for c in text.lower()).split())
+    trigrams = {cleaned[i:i + 3] for i in range(len(cleaned) - 2)}
+    return ' OR '.join('"' + gram.replace('"', '""') + '"' for gram in sorted(trigrams))
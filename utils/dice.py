@@ -0,0 +1,327 @@
+"""
+Dice utilities for MegaBot
+Parses dice notation, rolls large pools with NumPy and computes exact outcome distributions
+"""
+
+import re
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+MAX_TERMS = 10
+MAX_DICE = 100_000  # Across all terms of one expression
+MAX_SIDES = 10_000
+MAX_EXPLOSIONS = 20  # Rerolls chained per exploding die
+MAX_SHOWN = 20  # Individual dice listed per term
+MAX_STATS_SUPPORT = 200_000  # Distinct totals an exact distribution may span
+MAX_KEEP_OUTCOMES = 200_000  # sides ** count enumerated for keep/drop distributions
+MAX_NUMBER_DIGITS = 9  # Digits per number; int() refuses very long strings anyway
+
+_TERM = re.compile(
+    r'([+-])'
+    r'(?:(\d*)d(\d+|%)(!)?(?:(kh|kl|dh|dl|k)(\d*))?'
+    r'|(\d+))'
+)
+
+_rng = np.random.default_rng()
+
+
+class DiceError(ValueError):
+    """Invalid or too expensive dice expression"""
+
+
+def _number(digits: str) -> int:
+    if len(digits) > MAX_NUMBER_DIGITS:
+        raise DiceError(f"Numbers are limited to {MAX_NUMBER_DIGITS} digits")
+    return int(digits)
+
+
+class DiceTerm:
+    """One signed term: NdM with optional explode and keep, or a constant"""
+
+    def __init__(
+        self,
+        sign: int,
+        count: int = 0,
+        sides: int = 0,
+        explode: bool = False,
+        keep: Optional[Tuple[str, int]] = None,
+        constant: int = 0
+    ):
+        self.sign = sign
+        self.count = count
+        self.sides = sides
+        self.explode = explode
+        self.keep = keep  # ('high' | 'low', how many)
+        self.constant = constant
+
+    @property
+    def is_dice(self) -> bool:
+        return self.count > 0
+
+    def __str__(self) -> str:
+        sign = '-' if self.sign < 0 else '+'
+        if not self.is_dice:
+            return f"{sign}{self.constant}"
+        text = f"{sign}{self.count}d{self.sides}"
+        if self.explode:
+            text += '!'
+        if self.keep:
+            text += f"k{self.keep[0][0]}{self.keep[1]}"
+        return text
+
+
+def parse_dice(expression: str) -> List[DiceTerm]:
+    """Parse e.g. '2d20kh1+1d4+3', '4d6dl1', '10d6!' or 'd%-2'"""
+    text = expression.lower().replace(' ', '')
+    if not text:
+        raise DiceError("Empty dice expression")
+    if text[0] not in '+-':
+        text = '+' + text
+
+    terms = []
+    position = 0
+    while position < len(text):
+        match = _TERM.match(text, position)
+        if not match:
+            raise DiceError(f"Can't read `{text[position:].lstrip('+')}`")
+        position = match.end()
+        sign = -1 if match.group(1) == '-' else 1
+
+        if match.group(7) is not None:
+            terms.append(DiceTerm(sign, constant=_number(match.group(7))))
+            continue
+
+        count = _number(match.group(2) or '1')
+        sides = 100 if match.group(3) == '%' else _number(match.group(3))
+        explode = bool(match.group(4))
+        if count < 1:
+            raise DiceError("Roll at least one die")
+        if sides < 2 or sides > MAX_SIDES:
+            raise DiceError(f"Dice need 2-{MAX_SIDES:,} sides")
+
+        keep = None
+        if match.group(5):
+            amount = _number(match.group(6) or '1')
+            if amount < 1 or amount > count:
+                raise DiceError(f"Can't keep or drop {amount} of {count} dice")
+            kind = match.group(5)
+            if kind in ('kh', 'k'):
+                keep = ('high', amount)
+            elif kind == 'kl':
+                keep = ('low', amount)
+            elif kind == 'dl':
+                keep = ('high', count - amount)
+            else:
+                keep = ('low', count - amount)
+            if keep[1] == 0:
+                raise DiceError("Can't drop every die")
+
+        terms.append(DiceTerm(sign, count, sides, explode, keep))
+
+    if len(terms) > MAX_TERMS:
+        raise DiceError(f"Use at most {MAX_TERMS} terms")
+    if sum(term.count for term in terms) > MAX_DICE:
+        raise DiceError(f"Roll at most {MAX_DICE:,} dice at once")
+    return terms
+
+
+class TermRoll:
+    """Outcome of one term; rolls/kept are only kept for small pools"""
+
+    def __init__(self, term: DiceTerm, total: int, rolls: Optional[List[int]] = None, kept: Optional[List[bool]] = None):
+        self.term = term
+        self.total = total
+        self.rolls = rolls
+        self.kept = kept
+
+    def describe(self) -> str:
+        if not self.term.is_dice:
+            return str(self.term.constant)
+        if self.rolls is None:
+            return f"{self.term.count:,} dice"
+        shown = [str(roll) if keep else f"~~{roll}~~" for roll, keep in zip(self.rolls, self.kept)]
+        return ", ".join(shown)
+
+
+def _roll_term(term: DiceTerm) -> TermRoll:
+    values = _rng.integers(1, term.sides + 1, size=term.count)
+
+    if term.explode:
+        # Each max roll adds another die to the same result, vectorized per wave
+        exploding = values == term.sides
+        for _ in range(MAX_EXPLOSIONS):
+            waves = int(exploding.sum())
+            if not waves:
+                break
+            extra = _rng.integers(1, term.sides + 1, size=waves)
+            values[exploding] += extra
+            exploding[exploding] = extra == term.sides
+
+    kept_mask = np.ones(term.count, dtype=bool)
+    if term.keep:
+        order = np.argsort(values, kind='stable')
+        how, amount = term.keep
+        dropped = order[:term.count - amount] if how == 'high' else order[amount:]
+        kept_mask[dropped] = False
+
+    total = int(values[kept_mask].sum())
+    if term.count <= MAX_SHOWN:
+        return TermRoll(term, total, values.tolist(), kept_mask.tolist())
+    return TermRoll(term, total)
+
+
+def roll_dice(terms: List[DiceTerm]) -> Tuple[int, List[TermRoll]]:
+    """Roll every term and return (grand total, per-term results)"""
+    results = []
+    total = 0
+    for term in terms:
+        if term.is_dice:
+            result = _roll_term(term)
+        else:
+            result = TermRoll(term, term.constant)
+        results.append(result)
+        total += term.sign * result.total
+    return total, results
+
+
+# Distributions are (lowest total, probabilities for lowest, lowest + 1, ...)
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if min(len(a), len(b)) < 64:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    n = 1 << (size - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:size]
+    out = np.clip(out, 0, None)
+    return out / out.sum()
+
+
+def _die_pmf(sides: int, explode: bool) -> Tuple[int, np.ndarray]:
+    if not explode:
+        return 1, np.full(sides, 1 / sides)
+
+    # Exploding die truncated at MAX_EXPLOSIONS rerolls (the tail mass is negligible)
+    support = sides * (MAX_EXPLOSIONS + 1)
+    probs = np.zeros(support)
+    chain = 1.0
+    for depth in range(MAX_EXPLOSIONS + 1):
+        base = depth * sides
+        probs[base:base + sides - 1] += chain / sides
+        chain /= sides
+    probs[-1] += chain
+    return 1, probs / probs.sum()
+
+
+def _sum_pmf(low: int, probs: np.ndarray, count: int) -> Tuple[int, np.ndarray]:
+    """Distribution of the sum of count independent copies, by repeated squaring"""
+    result_low, result = 0, np.array([1.0])
+    while count:
+        if count & 1:
+            result_low, result = result_low + low, _convolve(result, probs)
+        count >>= 1
+        if count:
+            low, probs = low * 2, _convolve(probs, probs)
+    return result_low, result
+
+
+def _keep_pmf(term: DiceTerm) -> Tuple[int, np.ndarray]:
+    """Exact keep/drop distribution by enumerating every outcome of the pool"""
+    how, amount = term.keep
+    if amount == 1:
+        # Highest/lowest single die: P(max <= x) = (x / sides) ** count
+        cdf = (np.arange(0, term.sides + 1) / term.sides) ** term.count
+        if how == 'low':
+            cdf = 1 - ((term.sides - np.arange(0, term.sides + 1)) / term.sides) ** term.count
+        return 1, np.diff(cdf)
+
+    if term.sides ** term.count > MAX_KEEP_OUTCOMES:
+        raise DiceError("That keep/drop pool is too large for exact stats")
+
+    faces = np.arange(1, term.sides + 1)
+    grids = np.meshgrid(*([faces] * term.count), indexing='ij')
+    outcomes = np.sort(np.stack([grid.ravel() for grid in grids], axis=1), axis=1)
+    kept = outcomes[:, -amount:] if how == 'high' else outcomes[:, :amount]
+    totals = kept.sum(axis=1)
+    low = int(totals.min())
+    counts = np.bincount(totals - low)
+    return low, counts / counts.sum()
+
+
+def distribution(terms: List[DiceTerm]) -> Tuple[int, np.ndarray]:
+    """Exact probability of every possible total"""
+    support = 1
+    for term in terms:
+        if term.is_dice:
+            if term.explode and term.keep:
+                raise DiceError("Exact stats don't support exploding dice with keep/drop")
+            per_die = term.sides * (MAX_EXPLOSIONS + 1) if term.explode else term.sides
+            support += term.count * (per_die - 1)
+    if support > MAX_STATS_SUPPORT:
+        raise DiceError("Too many possible totals for exact stats")
+
+    low, probs = 0, np.array([1.0])
+    for term in terms:
+        if not term.is_dice:
+            term_low, term_probs = term.constant, np.array([1.0])
+        elif term.keep:
+            term_low, term_probs = _keep_pmf(term)
+        else:
+            die_low, die_probs = _die_pmf(term.sides, term.explode)
+            term_low, term_probs = _sum_pmf(die_low, die_probs, term.count)
+
+        if term.sign < 0:
+            term_low, term_probs = -(term_low + len(term_probs) - 1), term_probs[::-1]
+        low, probs = low + term_low, _convolve(probs, term_probs)
+    return low, probs
+
+
+def total_range(terms: List[DiceTerm]) -> Tuple[int, int]:
+    """Lowest and highest total the expression can roll, with explosions capped like the roller"""
+    low = high = 0
+    for term in terms:
+        if term.is_dice:
+            dice = term.keep[1] if term.keep else term.count
+            term_low = dice
+            term_high = dice * term.sides * ((MAX_EXPLOSIONS + 1) if term.explode else 1)
+        else:
+            term_low = term_high = term.constant
+        if term.sign < 0:
+            term_low, term_high = -term_high, -term_low
+        low, high = low + term_low, high + term_high
+    return low, high
+
+
+def summarize(low: int, probs: np.ndarray, rolled: int, likely: float = 0.99) -> dict:
+    """Mean, spread, mode, the central range holding likely of the rolls and where a rolled total falls"""
+    values = np.arange(low, low + len(probs))
+    mean = float(np.dot(values, probs))
+    variance = float(np.dot((values - mean) ** 2, probs))
+    cdf = np.cumsum(probs)
+    tail = (1 - likely) / 2
+    index = min(max(rolled - low, 0), len(probs))
+    return {
+        'mean': mean,
+        'std': variance ** 0.5,
+        'likely_min': int(values[min(int(np.searchsorted(cdf, tail)), len(values) - 1)]),
+        'likely_max': int(values[min(int(np.searchsorted(cdf, 1 - tail)), len(values) - 1)]),
+        'mode': int(values[int(np.argmax(probs))]),
+        'at_least': float(probs[index:].sum()),
+        'at_most': float(probs[:index + 1].sum())
+    }
+
+
+def histogram(low: int, probs: np.ndarray, buckets: int = 10, width: int = 16) -> str:
+    """Text bar chart of the distribution, grouped into at most buckets rows"""
+    nonzero = np.nonzero(probs > 1e-12)[0]
+    start, stop = int(nonzero[0]), int(nonzero[-1]) + 1
+    step = -(-(stop - start) // buckets)
+    edges = list(range(start, stop, step)) + [stop]
+    masses = [float(probs[a:b].sum()) for a, b in zip(edges[:-1], edges[1:])]
+    peak = max(masses) or 1
+
+    lines = []
+    for (a, b), mass in zip(zip(edges[:-1], edges[1:]), masses):
+        label = f"{low + a}" if b - a == 1 else f"{low + a}-{low + b - 1}"
+        lines.append(f"{label:>11} {'█' * max(1, round(width * mass / peak)) if mass else '':<{width}} {mass:6.1%}")
+    return "\n".join(lines)
@@ -0,0 +1,208 @@
+"""
+Game session utilities for MegaBot
+Routes chat answers to per-channel trivia/quiz games with one dict lookup per message
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import discord
+
+logger = logging.getLogger('MegaBot.Games')
+
+LETTERS = ['A', 'B', 'C', 'D']
+OPTION_EMOJIS = ['🅰️', '🅱️', '©️', '🅳']
+DIFFICULTY_POINTS = {'easy': 1, 'medium': 2, 'hard': 3}
+
+
+class Round:
+    """One question; multiple choice when options are given, free answer otherwise"""
+
+    def __init__(self, title: str, question: str, answer: str, options: Optional[List[str]] = None, points: int = 1):
+        self.title = title
+        self.question = question
+        self.answer = answer
+        self.options = options
+        self.letters = LETTERS[:len(options)] if options else []
+        self.points = points
+
+    def judge(self, content: str) -> Optional[bool]:
+        """True/False for an answer attempt, None when the message isn't one"""
+        text = content.strip()
+        if self.options:
+            letter = text.upper()
+            if letter not in self.letters:
+                return None
+            return self.options[self.letters.index(letter)] == self.answer
+        # Free answer: any other message may be chat or a command, so only a match counts
+        return True if text.casefold() == self.answer.strip().casefold() else None
+
+    @property
+    def solution(self) -> str:
+        if self.options:
+            return f"{self.letters[self.options.index(self.answer)]}: {self.answer}"
+        return self.answer
+
+    def embed(self, number: int, total: int, round_time: int) -> discord.Embed:
+        description = f"**{self.question}**"
+        if self.options:
+            description += "\n\n" + "\n".join(f"{OPTION_EMOJIS[i]} {option}" for i, option in enumerate(self.options))
+            how = f"Type {', '.join(self.letters[:-1])} or {self.letters[-1]}"
+        else:
+            how = "Type your answer in chat"
+
+        embed = discord.Embed(title=self.title, description=description, color=discord.Color.blue())
+        if total > 1:
+            embed.title += f" • Round {number}/{total}"
+        embed.set_footer(text=f"You have {round_time} seconds! {how}")
+        return embed
+
+
+class GameSession:
+    """A run of rounds in one channel; anyone (or only players, if given) can answer"""
+
+    def __init__(
+        self,
+        channel: discord.abc.Messageable,
+        host_id: int,
+        draw: Callable[[], Awaitable[Optional[Round]]],
+        rounds: int = 1,
+        round_time: int = 30,
+        players: Optional[set] = None
+    ):
+        self.channel = channel
+        self.host_id = host_id
+        self.draw = draw
+        self.rounds = rounds
+        self.round_time = round_time
+        self.players = players
+        self.scores = Counter()  # {user_id: points}
+        self.streaks = Counter()  # {user_id: rounds won in a row}
+        self.best_streaks = Counter()
+        self.round = None
+        self._attempted = set()  # Players who used their multiple-choice guess this round
+        self._winner = None  # Future resolved with the first correct answer
+        self.task = None
+
+    def handle(self, message: discord.Message) -> bool:
+        """Judge a chat message against the open round; True if it was an answer"""
+        if self.round is None or self._winner.done():
+            return False
+        author_id = message.author.id
+        if self.players is not None and author_id not in self.players:
+            return False
+        if self.round.options and author_id in self._attempted:
+            return False
+
+        verdict = self.round.judge(message.content)
+        if verdict is None:
+            return False
+
+        self._attempted.add(author_id)
+        if verdict:
+            self._winner.set_result(message.author)
+        else:
+            self.streaks[author_id] = 0
+        return True
+
+    def _award(self, winner: discord.abc.User) -> int:
+        # Winning extends your streak and breaks everyone else's
+        for user_id in list(self.streaks):
+            if user_id != winner.id:
+                self.streaks[user_id] = 0
+        self.streaks[winner.id] += 1
+        streak = self.streaks[winner.id]
+        self.best_streaks[winner.id] = max(self.best_streaks[winner.id], streak)
+
+        points = self.round.points + min(streak - 1, 3)
+        self.scores[winner.id] += points
+        return points
+
+    async def run(self):
+        for number in range(1, self.rounds + 1):
+            self.round = await self.draw()
+            if self.round is None:
+                await self.channel.send("❌ No more questions available!")
+                break
+
+            self._attempted = set()
+            self._winner = asyncio.get_running_loop().create_future()
+            await self.channel.send(embed=self.round.embed(number, self.rounds, self.round_time))
+
+            try:
+                winner = await asyncio.wait_for(self._winner, self.round_time)
+            except asyncio.TimeoutError:
+                self.streaks.clear()
+                embed = discord.Embed(
+                    title="⏰ Time's Up!",
+                    description=f"The correct answer was **{self.round.solution}**",
+                    color=discord.Color.orange()
+                )
+            else:
+                points = self._award(winner)
+                streak = self.streaks[winner.id]
+                embed = discord.Embed(
+                    title="✅ Correct!",
+                    description=f"{winner.mention} got it: **{self.round.solution}** (+{points} pts)",
+                    color=discord.Color.green()
+                )
+                if streak > 1:
+                    embed.set_footer(text=f"🔥 {streak} in a row!")
+            self.round = None
+            await self.channel.send(embed=embed)
+
+        if self.rounds > 1 and self.scores:
+            await self.channel.send(embed=self.scoreboard())
+
+    def scoreboard(self) -> discord.Embed:
+        lines = []
+        for rank, (user_id, points) in enumerate(self.scores.most_common(10), start=1):
+            line = f"**{rank}.** <@{user_id}> — {points} pts"
+            if self.best_streaks[user_id] > 1:
+                line += f" (best streak {self.best_streaks[user_id]})"
+            lines.append(line)
+        return discord.Embed(title="🏆 Final Scores", description="\n".join(lines), color=discord.Color.gold())
+
+
+class GameSessionManager:
+    """Active game sessions keyed by channel id, fed from the bot's on_message"""
+
+    def __init__(self):
+        self.sessions = {}  # {channel_id: GameSession}
+
+    def is_active(self, channel_id: int) -> bool:
+        return channel_id in self.sessions
+
+    def start(self, channel_id: int, session: GameSession) -> bool:
+        """Run a session in the background; False if the channel already has one"""
+        if channel_id in self.sessions:
+            return False
+        self.sessions[channel_id] = session
+        session.task = asyncio.create_task(session.run())
+        session.task.add_done_callback(lambda task: self._finished(channel_id, task))
+        return True
+
+    def _finished(self, channel_id: int, task: asyncio.Task):
+        self.sessions.pop(channel_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Game in channel {channel_id} crashed: {task.exception()}")
+
+    def stop(self, channel_id: int) -> Optional[GameSession]:
+        session = self.sessions.get(channel_id)
+        if session is not None:
+            session.task.cancel()
+        return session
+
+    def stop_all(self):
+        for session in list(self.sessions.values()):
+            session.task.cancel()
+
+    def dispatch(self, message: discord.Message) -> bool:
+        """Route a message to its channel's game, if any"""
+        session = self.sessions.get(message.channel.id)
+        return session is not None and session.handle(message)
+
+    def stats(self) -> Dict[str, int]:
+        return {'active_games': len(self.sessions)}
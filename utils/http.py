@@ -0,0 +1,265 @@
+"""
+HTTP utilities for MegaBot
+Provides the bot-wide pooled aiohttp session and the resilient client cogs call through
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+from config import Config
+from utils.cache import TTLCache
+
+logger = logging.getLogger('MegaBot.HTTP')
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """Create a keep-alive session with pooled connections and DNS caching"""
+    connector = aiohttp.TCPConnector(
+        limit=Config.HTTP_POOL_SIZE,
+        limit_per_host=Config.HTTP_POOL_PER_HOST,
+        ttl_dns_cache=Config.HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=30
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=Config.HTTP_TIMEOUT,
+        connect=Config.HTTP_CONNECT_TIMEOUT
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={'User-Agent': 'MegaBot (Discord Bot)'}
+    )
+
+
+class HostUnavailable(Exception):
+    """Raised when a host is failing and there is no cached or fallback response"""
+
+
+_NO_FALLBACK = object()
+
+
+class _RetryableStatus(Exception):
+    """Server-side error status (5xx/429) that counts against the host"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets a single probe through after a cooldown"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def allow(self) -> bool:
+        """Whether a request may go out now"""
+        if self.state == 'closed':
+            return True
+        if self.state == 'open':
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = 'half_open'
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self):
+        self.state = 'closed'
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == 'half_open' or self.failures >= self.failure_threshold:
+            self.state = 'open'
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def release_probe(self):
+        """Free the half-open probe slot when a request ends without a verdict"""
+        self._probing = False
+
+
+class _HostState:
+    """Breaker, concurrency slots and counters for one host"""
+
+    def __init__(self, concurrency: int, failure_threshold: int, reset_timeout: float):
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.slots = asyncio.Semaphore(concurrency)
+        self.latencies = deque(maxlen=200)  # seconds, successful attempts only
+        self.requests = 0
+        self.errors = 0
+        self.short_circuited = 0
+        self.rejected = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.degraded = 0
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            'state': self.breaker.state,
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': round(self.errors / self.requests, 3) if self.requests else 0.0,
+            'short_circuited': self.short_circuited,
+            'rejected': self.rejected,
+            'hedged': self.hedged,
+            'hedge_wins': self.hedge_wins,
+            'degraded': self.degraded,
+            'p50_ms': round(p50 * 1000) if p50 is not None else None,
+            'p95_ms': round(p95 * 1000) if p95 is not None else None
+        }
+
+
+class ResilientHTTP:
+    """JSON client over the shared session with per-host circuit breakers,
+    bounded concurrency, optional hedged GETs and last-good fallbacks"""
+
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self.hosts = {}  # {hostname: _HostState}
+        self.last_good = TTLCache(maxsize=512, ttl=Config.HTTP_STALE_TTL)
+
+    def _host(self, host: str) -> _HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = _HostState(Config.HTTP_HOST_CONCURRENCY, Config.HTTP_BREAKER_THRESHOLD, Config.HTTP_BREAKER_RESET)
+            self.hosts[host] = state
+        return state
+
+    async def get_json(self, url: str, **kwargs) -> Any:
+        return await self.request('GET', url, **kwargs)
+
+    async def post_json(self, url: str, **kwargs) -> Any:
+        return await self.request('POST', url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        *,
+        hedge: bool = False,
+        fallback: Any = _NO_FALLBACK,
+        stale: bool = True,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> Any:
+        """Return the decoded JSON body of a 200 response, or None for other client-side statuses.
+
+        When the host is failing, serve the last good response for the same request
+        (if stale), else fallback, else raise HostUnavailable.
+        """
+        host = urlsplit(url).hostname or url
+        state = self._host(host)
+        key = (method, url, json.dumps(kwargs, sort_keys=True, default=str)) if stale else None
+
+        # Bulkhead: don't queue behind a host that is already saturated
+        try:
+            await asyncio.wait_for(state.slots.acquire(), Config.HTTP_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            state.rejected += 1
+            return self._degrade(state, key, fallback, f"{host} is saturated")
+
+        try:
+            if not state.breaker.allow():
+                state.short_circuited += 1
+                return self._degrade(state, key, fallback, f"circuit open for {host}")
+
+            state.requests += 1
+            request_timeout = aiohttp.ClientTimeout(total=timeout or Config.HTTP_TIMEOUT)
+            try:
+                if hedge and method == 'GET':
+                    data = await self._hedged(state, method, url, request_timeout, kwargs)
+                else:
+                    data = await self._attempt(state, method, url, request_timeout, kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError, _RetryableStatus) as e:
+                state.errors += 1
+                state.breaker.record_failure()
+                return self._degrade(state, key, fallback, f"{host}: {e!r}")
+            except BaseException:
+                state.breaker.release_probe()
+                raise
+
+            state.breaker.record_success()
+            if key is not None and data is not None:
+                self.last_good.set(key, data)
+            return data
+        finally:
+            state.slots.release()
+
+    async def _attempt(self, state: _HostState, method: str, url: str, timeout, kwargs) -> Any:
+        started = time.monotonic()
+        async with self.session.request(method, url, timeout=timeout, **kwargs) as resp:
+            if resp.status >= 500 or resp.status == 429:
+                raise _RetryableStatus(f"HTTP {resp.status}")
+            data = await resp.json(content_type=None) if resp.status == 200 else None
+        state.latencies.append(time.monotonic() - started)
+        return data
+
+    async def _hedged(self, state: _HostState, method: str, url: str, timeout, kwargs) -> Any:
+        """Send a second copy once the first is slower than the host's p95, keep whichever wins"""
+        delay = state.percentile(0.95) if len(state.latencies) >= 20 else None
+        delay = max(delay or 0, Config.HTTP_HEDGE_DELAY)
+
+        first = asyncio.ensure_future(self._attempt(state, method, url, timeout, kwargs))
+        attempts = [first]
+        extra_slot = False
+        try:
+            done, _ = await asyncio.wait(attempts, timeout=delay)
+            if done or state.slots.locked():
+                return await first
+
+            # A free slot means acquire() returns without waiting
+            await state.slots.acquire()
+            extra_slot = True
+            state.hedged += 1
+            attempts.append(asyncio.ensure_future(self._attempt(state, method, url, timeout, kwargs)))
+
+            pending = set(attempts)
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is not first:
+                            state.hedge_wins += 1
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in attempts:
+                attempt.cancel()
+            if extra_slot:
+                state.slots.release()
+
+    def _degrade(self, state: _HostState, key, fallback: Any, reason: str) -> Any:
+        state.degraded += 1
+        if key is not None:
+            cached = self.last_good.get(key, _NO_FALLBACK)
+            if cached is not _NO_FALLBACK:
+                return cached
+        if fallback is not _NO_FALLBACK:
+            return fallback
+        logger.warning(f"Request failed fast: {reason}")
+        raise HostUnavailable(reason)
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-host latency, error and breaker metrics"""
+        return {host: state.stats() for host, state in self.hosts.items()}
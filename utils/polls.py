@@ -0,0 +1,238 @@
+"""
+Poll utilities for MegaBot
+In-memory tallies and button views for polls whose ballots live in the database
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, FrozenSet, List, Optional
+
+import discord
+
+logger = logging.getLogger('MegaBot.Polls')
+
+NUMBER_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣', '7️⃣', '8️⃣', '9️⃣', '🔟']
+
+
+class PollState:
+    """Live counts for one poll: a tally per option and a voter count, never per-voter data"""
+
+    def __init__(
+        self,
+        poll_id: int,
+        channel_id: int,
+        author_id: int,
+        question: str,
+        options: List[str],
+        multi: bool = False,
+        closes_at: Optional[datetime] = None,
+        message_id: Optional[int] = None,
+        tallies: Optional[List[int]] = None,
+        voters: int = 0
+    ):
+        self.poll_id = poll_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.question = question
+        self.options = options
+        self.multi = multi
+        self.closes_at = closes_at
+        self.message_id = message_id
+        self.tallies = tallies or [0] * len(options)
+        self.voters = voters
+        self.closed = False
+
+    def apply(self, ballot: FrozenSet[int], option: int) -> FrozenSet[int]:
+        """Toggle option on a voter's ballot, update the tallies and return the new ballot"""
+        if option in ballot:
+            new_ballot = ballot - {option}
+        elif self.multi:
+            new_ballot = ballot | {option}
+        else:
+            new_ballot = frozenset({option})
+
+        for removed in ballot - new_ballot:
+            self.tallies[removed] -= 1
+        for added in new_ballot - ballot:
+            self.tallies[added] += 1
+        self.voters += bool(new_ballot) - bool(ballot)
+        return new_ballot
+
+    def embed(self) -> discord.Embed:
+        total = sum(self.tallies)
+        lines = []
+        for index, (option, votes) in enumerate(zip(self.options, self.tallies)):
+            share = votes / total if total else 0
+            bar = '█' * round(share * 12) + '░' * (12 - round(share * 12))
+            lines.append(f"{NUMBER_EMOJIS[index]} **{option}**\n`{bar}` {votes:,} ({share:.0%})")
+
+        embed = discord.Embed(
+            title=f"📊 {self.question}" + (" (Closed)" if self.closed else ""),
+            description="\n\n".join(lines),
+            color=discord.Color.dark_grey() if self.closed else discord.Color.blue()
+        )
+        details = [f"By <@{self.author_id}>", f"{self.voters:,} voter{'s' if self.voters != 1 else ''}"]
+        details.append("Multiple choice" if self.multi else "Single choice")
+        if self.closes_at and not self.closed:
+            details.append(f"Closes <t:{int(self.closes_at.replace(tzinfo=timezone.utc).timestamp())}:R>")
+        embed.add_field(name="Details", value=" • ".join(details), inline=False)
+        embed.set_footer(text=f"Poll #{self.poll_id} • Click an option again to remove your vote")
+        return embed
+
+
+class PollView(discord.ui.View):
+    """Persistent vote buttons; custom ids survive restarts as poll:<id>:<option>"""
+
+    def __init__(
+        self,
+        poll: PollState,
+        on_vote: Callable[[discord.Interaction, PollState, int], Awaitable[None]],
+        on_close: Callable[[discord.Interaction, PollState], Awaitable[None]]
+    ):
+        super().__init__(timeout=None)
+        self.poll = poll
+        self.on_vote = on_vote
+        self.on_close = on_close
+
+        for index, option in enumerate(poll.options):
+            button = discord.ui.Button(
+                label=option[:80],
+                emoji=NUMBER_EMOJIS[index],
+                style=discord.ButtonStyle.secondary,
+                custom_id=f"poll:{poll.poll_id}:{index}",
+                row=index // 5
+            )
+            button.callback = self._vote_callback(index)
+            self.add_item(button)
+
+        close = discord.ui.Button(
+            label="Close Poll",
+            emoji="🔒",
+            style=discord.ButtonStyle.danger,
+            custom_id=f"poll:{poll.poll_id}:close",
+            row=2
+        )
+        close.callback = self._close_callback
+        self.add_item(close)
+
+    def _vote_callback(self, index: int):
+        async def callback(interaction: discord.Interaction):
+            await self.on_vote(interaction, self.poll, index)
+        return callback
+
+    async def _close_callback(self, interaction: discord.Interaction):
+        await self.on_close(interaction, self.poll)
+
+
+class PollManager:
+    """Open polls plus the ballots changed since the last flush.
+
+    Ballots live in the database; memory only holds tallies and a short write-behind buffer,
+    so a vote costs one indexed lookup and results edits are throttled per poll.
+    """
+
+    def __init__(self, db, render: Callable[[PollState], Awaitable[None]], refresh_interval: float = 5.0):
+        self.db = db
+        self.render = render
+        self.refresh_interval = refresh_interval
+        self.polls = {}  # {poll_id: PollState}
+        self._pending = {}  # {(poll_id, user_id): ballot} not yet written
+        self._flushing = {}  # Ballots being written right now, still authoritative for reads
+        self._flush_lock = asyncio.Lock()
+        self._last_render = {}  # {poll_id: monotonic time of the last edit}
+        self._refreshes = {}  # {poll_id: Task waiting to edit}
+        self.votes = 0
+        self.flushed = 0
+        self.renders = 0
+
+    def add(self, poll: PollState):
+        self.polls[poll.poll_id] = poll
+
+    async def _ballot(self, poll_id: int, user_id: int) -> FrozenSet[int]:
+        key = (poll_id, user_id)
+        ballot = self._pending.get(key, self._flushing.get(key))
+        if ballot is not None:
+            return ballot
+        stored = frozenset(await self.db.get_poll_ballot(poll_id, user_id))
+        # Another click may have landed while we were reading
+        ballot = self._pending.get(key, self._flushing.get(key))
+        return stored if ballot is None else ballot
+
+    async def vote(self, poll: PollState, user_id: int, option: int) -> Optional[FrozenSet[int]]:
+        """Toggle a user's vote and return their new ballot, or None if the poll has closed"""
+        ballot = await self._ballot(poll.poll_id, user_id)
+        if poll.closed:
+            return None
+        ballot = poll.apply(ballot, option)
+        self._pending[(poll.poll_id, user_id)] = ballot
+        self.votes += 1
+        self.request_refresh(poll)
+        return ballot
+
+    async def flush(self):
+        """Write every changed ballot in one transaction"""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            self._flushing, self._pending = self._pending, {}
+            try:
+                await self.db.save_poll_ballots([
+                    (poll_id, user_id, sorted(ballot)) for (poll_id, user_id), ballot in self._flushing.items()
+                ])
+                self.flushed += len(self._flushing)
+            except Exception as e:
+                logger.error(f"Failed to save poll votes: {e}")
+                # Keep them for the next flush, behind anything newer
+                self._pending = {**self._flushing, **self._pending}
+            finally:
+                self._flushing = {}
+
+    def request_refresh(self, poll: PollState):
+        """Schedule a results edit, at most one per refresh_interval per poll"""
+        if poll.poll_id in self._refreshes:
+            return
+        wait = self._last_render.get(poll.poll_id, 0) + self.refresh_interval - time.monotonic()
+        self._refreshes[poll.poll_id] = asyncio.ensure_future(self._refresh(poll, max(wait, 0)))
+
+    async def _refresh(self, poll: PollState, wait: float):
+        try:
+            await asyncio.sleep(wait)
+        finally:
+            self._refreshes.pop(poll.poll_id, None)
+        self._last_render[poll.poll_id] = time.monotonic()
+        self.renders += 1
+        try:
+            await self.render(poll)
+        except Exception as e:
+            logger.warning(f"Failed to refresh poll {poll.poll_id}: {e}")
+
+    def due(self, now: datetime) -> List[PollState]:
+        return [poll for poll in self.polls.values() if poll.closes_at and poll.closes_at <= now]
+
+    async def close(self, poll: PollState):
+        """Stop accepting votes, persist everything and show the final results"""
+        if poll.closed:
+            return
+        poll.closed = True
+        self.polls.pop(poll.poll_id, None)
+        refresh = self._refreshes.pop(poll.poll_id, None)
+        if refresh is not None:
+            refresh.cancel()
+        self._last_render.pop(poll.poll_id, None)
+        await self.flush()
+        await self.db.close_poll(poll.poll_id)
+        try:
+            await self.render(poll)
+        except Exception as e:
+            logger.warning(f"Failed to show final results for poll {poll.poll_id}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'open_polls': len(self.polls),
+            'votes': self.votes,
+            'pending_ballots': len(self._pending),
+            'flushed_ballots': self.flushed,
+            'renders': self.renders
+        }
@@ -0,0 +1,250 @@
+"""
+Content prefetching for MegaBot
+Keeps small buffers of ready-to-send items so commands never wait on third-party APIs
+"""
+
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import OrderedDict, deque
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+logger = logging.getLogger('MegaBot.Prefetch')
+
+
+class ContentSource:
+    """Base class for prefetchable content; fetch() returns a batch of items for a category"""
+
+    name = 'base'
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def key(self, item: Dict[str, Any]) -> Hashable:
+        """Identity used to drop duplicates"""
+        return item.get('id') or json.dumps(item, sort_keys=True)
+
+
+class JokeSource(ContentSource):
+    """Ten jokes per request from the Official Joke API"""
+
+    name = 'jokes'
+    BASE_URL = 'https://official-joke-api.appspot.com'
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        url = f"{self.BASE_URL}/random_ten" if category == 'general' else f"{self.BASE_URL}/jokes/{category}/ten"
+        data = await self.bot.http_client.get_json(url, hedge=True)
+        if not data:
+            return []
+        return [{'id': joke['id'], 'setup': joke['setup'], 'punchline': joke['punchline']} for joke in data]
+
+
+class MemeSource(ContentSource):
+    """Image posts from a subreddit's hot listing, paging further on each refill"""
+
+    name = 'memes'
+
+    def __init__(self, bot, page_size: int = 50):
+        self.bot = bot
+        self.page_size = page_size
+        self._after = {}  # {subreddit: listing cursor}
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        params = {'limit': self.page_size}
+        if self._after.get(category):
+            params['after'] = self._after[category]
+
+        # Listings page on, so an old page is no substitute when reddit is down
+        url = f"https://www.reddit.com/r/{category}/hot.json"
+        data = await self.bot.http_client.get_json(url, params=params, hedge=True, stale=False)
+        if not data:
+            return []
+
+        # Wrap around to the top of the listing once we run off the end
+        self._after[category] = data['data'].get('after')
+
+        memes = []
+        for child in data['data']['children']:
+            post = child['data']
+            if post.get('over_18') or post.get('stickied') or post.get('post_hint') != 'image':
+                continue
+            memes.append({
+                'id': post['id'],
+                'title': post['title'],
+                'url': post['url'],
+                'ups': post['ups'],
+                'subreddit': post['subreddit']
+            })
+        random.shuffle(memes)
+        return memes
+
+
+class TriviaSource(ContentSource):
+    """Batches of multiple-choice questions from OpenTDB; categories are 'category_id:difficulty'"""
+
+    name = 'trivia'
+
+    def __init__(self, bot, batch_size: int = 10):
+        self.bot = bot
+        self.batch_size = batch_size
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        category_id, difficulty = category.split(':')
+        params = {
+            'amount': self.batch_size,
+            'category': category_id,
+            'difficulty': difficulty,
+            'type': 'multiple'
+        }
+        # No hedging: OpenTDB allows one request per IP every few seconds
+        data = await self.bot.http_client.get_json("https://opentdb.com/api.php", params=params, stale=False)
+        if not data or data['response_code'] != 0:
+            return []
+        return data['results']
+
+    def key(self, item: Dict[str, Any]) -> Hashable:
+        return item['question']
+
+
+class FixtureSource(ContentSource):
+    """Serves items from a local dict or JSON file, for tests and offline runs"""
+
+    def __init__(self, name: str, items: Dict[str, List[Dict[str, Any]]]):
+        self.name = name
+        self.items = items
+
+    @classmethod
+    def from_file(cls, name: str, path: str) -> 'FixtureSource':
+        """Load the section called name from a {source: {category: [items]}} JSON file"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(name, json.load(f).get(name, {}))
+
+    async def fetch(self, category: str) -> List[Dict[str, Any]]:
+        items = list(self.items.get(category) or self.items.get('default', []))
+        random.shuffle(items)
+        return items
+
+
+class Prefetcher:
+    """Per-category queues of ready items, refilled in the background below a low watermark"""
+
+    def __init__(
+        self,
+        source: ContentSource,
+        capacity: int = 10,
+        low_watermark: int = 3,
+        history: int = 200,
+        retry_after: float = 30
+    ):
+        self.source = source
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self.history = history  # How many served keys to remember per category for dedup
+        self.retry_after = retry_after  # Cooldown after a failed or empty refill
+        self._queues = {}  # {category: deque(items)}
+        self._seen = {}  # {category: OrderedDict(key -> None)}
+        self._refills = {}  # {category: Task}
+        self._retry_at = {}  # {category: monotonic time}
+        self.served = 0
+        self.empty = 0
+        self.refill_errors = 0
+
+    def pop(self, category: str) -> Optional[Dict[str, Any]]:
+        """Take a ready item without waiting, scheduling a refill when running low"""
+        queue = self._queues.get(category)
+        item = queue.popleft() if queue else None
+        if item is None:
+            self.empty += 1
+        else:
+            self.served += 1
+
+        if len(self._queues.get(category, ())) < self.low_watermark:
+            self._schedule_refill(category)
+        return item
+
+    async def get(self, category: str, timeout: float = 5) -> Optional[Dict[str, Any]]:
+        """Pop an item, waiting up to timeout for a refill when the buffer is cold"""
+        item = self.pop(category)
+        if item is not None:
+            return item
+
+        refill = self._refills.get(category)
+        if refill is None:
+            return None
+        try:
+            await asyncio.wait_for(asyncio.shield(refill), timeout)
+        except Exception:
+            return None
+
+        queue = self._queues.get(category)
+        if not queue:
+            return None
+        self.served += 1
+        self.empty -= 1
+        return queue.popleft()
+
+    def warm(self, categories: Iterable[str]):
+        """Start filling buffers ahead of the first request"""
+        for category in categories:
+            self._schedule_refill(category)
+
+    def _schedule_refill(self, category: str):
+        if category in self._refills:
+            return
+        if time.monotonic() < self._retry_at.get(category, 0):
+            return
+        task = asyncio.ensure_future(self._refill(category))
+        self._refills[category] = task
+        task.add_done_callback(lambda done: self._refills.pop(category, None))
+
+    async def _refill(self, category: str):
+        queue = self._queues.setdefault(category, deque())
+        seen = self._seen.setdefault(category, OrderedDict())
+        queued = {self.source.key(item) for item in queue}
+
+        try:
+            items = await self.source.fetch(category)
+        except Exception as e:
+            self.refill_errors += 1
+            self._retry_at[category] = time.monotonic() + self.retry_after
+            logger.warning(f"Prefetch of {self.source.name}/{category} failed: {e}")
+            return
+
+        added = 0
+        for item in items:
+            if len(queue) >= self.capacity:
+                break
+            key = self.source.key(item)
+            if key in seen or key in queued:
+                continue
+            queue.append(item)
+            queued.add(key)
+            seen[key] = None
+            added += 1
+
+        while len(seen) > self.history:
+            seen.popitem(last=False)
+
+        if not added:
+            self._retry_at[category] = time.monotonic() + self.retry_after
+
+    def close(self):
+        """Cancel outstanding refills"""
+        for task in list(self._refills.values()):
+            task.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Buffer levels and hit counts for monitoring"""
+        requests = self.served + self.empty
+        return {
+            'buffered': {category: len(queue) for category, queue in self._queues.items()},
+            'served': self.served,
+            'empty': self.empty,
+            'refill_errors': self.refill_errors,
+            'hit_rate': round(self.served / requests, 3) if requests else 0.0
+        }
@@ -0,0 +1,105 @@
+"""
+Presence utilities for MegaBot
+Tracks who is playing what from presence updates
+"""
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+import discord
+
+
+def playing_games(member: discord.Member) -> Set[str]:
+    """Names of the games a member is currently playing"""
+    games = set()
+    for activity in member.activities:
+        if isinstance(activity, discord.Game):
+            games.add(activity.name)
+        elif isinstance(activity, discord.Activity) and activity.type == discord.ActivityType.playing:
+            games.add(activity.name)
+    return {game for game in games if game}
+
+
+class NowPlayingIndex:
+    """Per-guild game -> member set index, kept current from presence diffs"""
+
+    def __init__(self):
+        self._players = {}  # {guild_id: {game_key: set(member_ids)}}
+        self._names = {}  # {guild_id: {game_key: display_name}}
+
+    @staticmethod
+    def _key(game: str) -> str:
+        return game.casefold()
+
+    def seed_guild(self, guild: discord.Guild):
+        """Rebuild a guild's index from the member cache (startup only)"""
+        self._players[guild.id] = {}
+        self._names[guild.id] = {}
+        for member in guild.members:
+            if member.bot:
+                continue
+            for game in playing_games(member):
+                self.add(guild.id, member.id, game)
+
+    def drop_guild(self, guild_id: int):
+        self._players.pop(guild_id, None)
+        self._names.pop(guild_id, None)
+
+    def add(self, guild_id: int, member_id: int, game: str):
+        key = self._key(game)
+        self._players.setdefault(guild_id, {}).setdefault(key, set()).add(member_id)
+        self._names.setdefault(guild_id, {}).setdefault(key, game)
+
+    def remove(self, guild_id: int, member_id: int, game: str):
+        key = self._key(game)
+        players = self._players.get(guild_id, {}).get(key)
+        if players is None:
+            return
+        players.discard(member_id)
+        if not players:
+            del self._players[guild_id][key]
+            self._names[guild_id].pop(key, None)
+
+    def update(self, guild_id: int, member_id: int, before: Set[str], after: Set[str]):
+        """Apply the difference between two presence snapshots"""
+        for game in before - after:
+            self.remove(guild_id, member_id, game)
+        for game in after - before:
+            self.add(guild_id, member_id, game)
+
+    def top(self, guild_id: int, limit: int = 10) -> List[Tuple[str, Set[int]]]:
+        """Most played games right now as (name, member_ids)"""
+        players = self._players.get(guild_id, {})
+        names = self._names.get(guild_id, {})
+        top_keys = heapq.nlargest(limit, players, key=lambda key: len(players[key]))
+        return [(names[key], players[key]) for key in top_keys]
+
+    def players(self, guild_id: int, game: str) -> Optional[Tuple[str, Set[int]]]:
+        """(name, member_ids) for a game, matched case-insensitively"""
+        key = self._key(game)
+        players = self._players.get(guild_id, {}).get(key)
+        if players is None:
+            return None
+        return self._names[guild_id][key], players
+
+    def search(self, guild_id: int, query: str, limit: int = 25) -> List[str]:
+        """Game names containing query, most played first"""
+        query = self._key(query)
+        players = self._players.get(guild_id, {})
+        names = self._names.get(guild_id, {})
+        matches = [key for key in players if query in key]
+        matches.sort(key=lambda key: len(players[key]), reverse=True)
+        return [names[key] for key in matches[:limit]]
+
+    def player_count(self, guild_id: int) -> int:
+        """Number of distinct members playing anything"""
+        members = set()
+        for players in self._players.get(guild_id, {}).values():
+            members |= players
+        return len(members)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'guilds': len(self._players),
+            'games': sum(len(games) for games in self._players.values())
+        }
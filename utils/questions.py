@@ -0,0 +1,75 @@
+"""
+Question bank utilities for MegaBot
+Parses importable question packs and shuffles them without repeats
+"""
+
+import csv
+import html
+import io
+import json
+import math
+import random
+from typing import Any, Dict, List, Tuple
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+
+
+def normalize_question(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one question and bring it to the bank's shape"""
+    question = html.unescape(str(raw.get('question') or '')).strip()
+    answer = html.unescape(str(raw.get('answer') or raw.get('correct_answer') or '')).strip()
+    if not question or not answer:
+        raise ValueError("every question needs 'question' and 'answer'")
+
+    difficulty = str(raw.get('difficulty') or 'medium').strip().lower()
+    if difficulty not in DIFFICULTIES:
+        raise ValueError(f"unknown difficulty '{difficulty}'")
+
+    incorrect = raw.get('incorrect') or raw.get('incorrect_answers') or []
+    if isinstance(incorrect, str):
+        incorrect = incorrect.split('|')
+    incorrect = [html.unescape(str(option)).strip() for option in incorrect if str(option).strip()]
+
+    return {
+        'category': str(raw.get('category') or 'general').strip().lower(),
+        'difficulty': difficulty,
+        'question': question,
+        'answer': answer,
+        'incorrect': incorrect[:3]
+    }
+
+
+def parse_question_pack(filename: str, data: bytes) -> List[Dict[str, Any]]:
+    """Parse a JSON (list or OpenTDB-style {"results": [...]}) or CSV question pack"""
+    text = data.decode('utf-8-sig')
+
+    if filename.lower().endswith('.csv'):
+        # Columns: category, difficulty, question, answer, incorrect (options separated by |)
+        rows = list(csv.DictReader(io.StringIO(text)))
+    else:
+        rows = json.loads(text)
+        if isinstance(rows, dict):
+            rows = rows.get('results') or rows.get('questions') or []
+
+    questions = []
+    for number, row in enumerate(rows, start=1):
+        try:
+            questions.append(normalize_question(row))
+        except (ValueError, AttributeError) as e:
+            raise ValueError(f"Question {number}: {e}")
+    return questions
+
+
+def new_permutation(size: int) -> Tuple[int, int]:
+    """Random (multiplier, shift) for the affine shuffle of range(size)"""
+    if size <= 1:
+        return 1, 0
+    while True:
+        multiplier = random.randrange(1, size)
+        if math.gcd(multiplier, size) == 1:
+            return multiplier, random.randrange(size)
+
+
+def permuted_slot(position: int, size: int, multiplier: int, shift: int) -> int:
+    """The slot drawn at a cursor position; every slot appears once per cycle of size draws"""
+    return (multiplier * position + shift) % size
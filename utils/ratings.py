@@ -0,0 +1,38 @@
+"""
+Rating utilities for MegaBot
+Elo ratings updated one match at a time, and seeding players by rating
+"""
+
+import random
+from typing import Dict, List, Tuple
+
+from config import Config
+
+
+def normalize_game(game: str) -> str:
+    """Ratings are kept per game; "Valorant" and " valorant " are the same ladder"""
+    return ' '.join(game.split()).lower()
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    """Chance of beating the opponent according to Elo"""
+    return 1 / (1 + 10 ** ((opponent - rating) / 400))
+
+
+def k_factor(games: int) -> float:
+    """New players move twice as fast until their rating has settled"""
+    return Config.RATING_K_FACTOR * (2 if games < Config.RATING_PROVISIONAL_GAMES else 1)
+
+
+def elo_update(winner: float, loser: float, winner_games: int, loser_games: int) -> Tuple[float, float]:
+    """New (winner, loser) ratings after one game; only these two players change"""
+    surprise = 1 - expected_score(winner, loser)
+    return winner + k_factor(winner_games) * surprise, loser - k_factor(loser_games) * surprise
+
+
+def seed_players(players: List[int], ratings: Dict[int, float]) -> List[int]:
+    """Best rating first; unrated players start at the default and equal ratings are drawn at random"""
+    seeded = list(players)
+    random.shuffle(seeded)
+    seeded.sort(key=lambda player: ratings.get(player, Config.RATING_DEFAULT), reverse=True)
+    return seeded
@@ -0,0 +1,66 @@
+"""
+Session tracking utilities for MegaBot
+Accumulates timed sessions in memory and hands back per-day totals in batches
+"""
+
+from collections import Counter
+from datetime import datetime, time, timedelta
+from typing import Hashable, List, Optional, Tuple
+
+
+class SessionTracker:
+    """Open/close timed sessions keyed by tuples and bucket their durations per UTC day"""
+
+    def __init__(self):
+        self._open = {}  # {key: started_at}
+        self._pending = Counter()  # {(*key, day): seconds}
+
+    def open(self, key: Tuple[Hashable, ...], now: Optional[datetime] = None):
+        """Start a session unless one is already running for key"""
+        if key not in self._open:
+            self._open[key] = now or datetime.utcnow()
+
+    def close(self, key: Tuple[Hashable, ...], now: Optional[datetime] = None):
+        """End a session and add its duration to the pending totals"""
+        started_at = self._open.pop(key, None)
+        if started_at is not None:
+            self._accrue(key, started_at, now or datetime.utcnow())
+
+    def is_open(self, key: Tuple[Hashable, ...]) -> bool:
+        return key in self._open
+
+    def _accrue(self, key: Tuple[Hashable, ...], start: datetime, end: datetime):
+        # Split at midnight so every second lands on the day it happened
+        while start < end:
+            next_midnight = datetime.combine(start.date() + timedelta(days=1), time.min)
+            chunk_end = min(end, next_midnight)
+            self._pending[(*key, start.date().isoformat())] += (chunk_end - start).total_seconds()
+            start = chunk_end
+
+    def drain(self, now: Optional[datetime] = None) -> List[tuple]:
+        """Return (*key, day, seconds) rows, checkpointing sessions that are still open"""
+        now = now or datetime.utcnow()
+        for key, started_at in self._open.items():
+            self._accrue(key, started_at, now)
+            self._open[key] = now
+
+        # Whole seconds are written; today's fraction stays pending until it adds up
+        today = now.date().isoformat()
+        rows, pending = [], Counter()
+        for bucket, seconds in self._pending.items():
+            whole = int(seconds) if bucket[-1] == today else int(round(seconds))
+            if whole >= 1:
+                rows.append((*bucket, whole))
+            if bucket[-1] == today and seconds - whole > 0:
+                pending[bucket] = seconds - whole
+        self._pending = pending
+        return rows
+
+    def restore(self, rows: List[tuple]):
+        """Put drained rows back after a failed write"""
+        for *bucket, seconds in rows:
+            self._pending[tuple(bucket)] += seconds
+
+    @property
+    def open_sessions(self) -> int:
+        return len(self._open)
@@ -0,0 +1,173 @@
+"""
+Spaced repetition utilities for MegaBot
+SM-2 scheduling, flashcard deck parsing and the button-driven review view
+"""
+
+import csv
+import io
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import discord
+
+MAX_DECK_IMPORT = 50_000  # Cards per CSV file
+MAX_FIELD_LENGTH = 1000  # Characters per card side (embed field limit is 1024)
+RELEARN_DELAY = timedelta(minutes=10)  # When a failed card comes back
+
+# Button label -> SM-2 quality (0-5); below 3 counts as a lapse
+GRADES = {'Again': 1, 'Hard': 3, 'Good': 4, 'Easy': 5}
+GRADE_STYLES = {
+    'Again': discord.ButtonStyle.danger,
+    'Hard': discord.ButtonStyle.secondary,
+    'Good': discord.ButtonStyle.primary,
+    'Easy': discord.ButtonStyle.success
+}
+
+
+def sm2(ease: float, interval: int, repetitions: int, quality: int) -> Tuple[float, int, int]:
+    """Next (ease, interval in days, repetitions) after answering with quality 0-5"""
+    ease = max(1.3, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    if quality < 3:
+        return ease, 0, 0
+    if repetitions == 0:
+        interval = 1
+    elif repetitions == 1:
+        interval = 6
+    else:
+        interval = max(interval + 1, round(interval * ease))
+    return ease, interval, repetitions + 1
+
+
+def next_due(now: datetime, interval: int) -> datetime:
+    """When a card with this interval is due again; lapsed cards return within the session"""
+    return now + (RELEARN_DELAY if interval == 0 else timedelta(days=interval))
+
+
+def format_due(when: datetime) -> str:
+    """Due dates are stored as sortable ISO text so the (deck_id, due_at) index can range scan"""
+    return when.isoformat(timespec='seconds')
+
+
+def parse_deck_csv(data: bytes) -> List[Tuple[str, str]]:
+    """Parse 'front,back' rows; a 'front,back' header row is optional"""
+    text = data.decode('utf-8-sig')
+    cards = []
+    for number, row in enumerate(csv.reader(io.StringIO(text)), start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if number == 1 and [cell.strip().lower() for cell in row[:2]] == ['front', 'back']:
+            continue
+        if len(row) < 2 or not row[0].strip() or not row[1].strip():
+            raise ValueError(f"Row {number}: every card needs a front and a back")
+        front, back = row[0].strip(), row[1].strip()
+        if len(front) > MAX_FIELD_LENGTH or len(back) > MAX_FIELD_LENGTH:
+            raise ValueError(f"Row {number}: card sides are limited to {MAX_FIELD_LENGTH} characters")
+        cards.append((front, back))
+        if len(cards) > MAX_DECK_IMPORT:
+            raise ValueError(f"Decks are limited to {MAX_DECK_IMPORT:,} cards per import")
+    if not cards:
+        raise ValueError("No cards found")
+    return cards
+
+
+class ReviewView(discord.ui.View):
+    """Shows due cards one at a time: reveal, then grade with Again/Hard/Good/Easy"""
+
+    def __init__(
+        self,
+        user_id: int,
+        deck: str,
+        cards: List[Dict],
+        on_grade: Callable[[Dict, int], Awaitable[None]],
+        refill: Callable[[], Awaitable[List[Dict]]],
+        timeout: float = 300
+    ):
+        super().__init__(timeout=timeout)
+        self.user_id = user_id
+        self.deck = deck
+        self.queue = list(cards)
+        self.on_grade = on_grade
+        self.refill = refill
+        self.reviewed = 0
+        self.lapses = 0
+        self.message = None
+        self._show_front()
+
+    @property
+    def card(self) -> Optional[Dict]:
+        return self.queue[0] if self.queue else None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message("❌ This isn't your review session!", ephemeral=True)
+            return False
+        return True
+
+    def _show_front(self):
+        self.clear_items()
+        reveal = discord.ui.Button(label="Show Answer", emoji="🔄", style=discord.ButtonStyle.primary)
+        reveal.callback = self._reveal
+        self.add_item(reveal)
+
+    def _show_grades(self):
+        self.clear_items()
+        for label, quality in GRADES.items():
+            button = discord.ui.Button(label=label, style=GRADE_STYLES[label])
+            button.callback = self._grade_callback(quality)
+            self.add_item(button)
+
+    def embed(self, revealed: bool = False) -> discord.Embed:
+        card = self.card
+        embed = discord.Embed(
+            title=f"📇 {self.deck}" + (" (Flipped)" if revealed else ""),
+            color=discord.Color.green() if revealed else discord.Color.blue()
+        )
+        embed.add_field(name="Question", value=card['front'], inline=False)
+        if revealed:
+            embed.add_field(name="Answer", value=card['back'], inline=False)
+        embed.set_footer(text=f"Reviewed {self.reviewed} • {len(self.queue)} left in this batch")
+        return embed
+
+    def summary(self) -> discord.Embed:
+        embed = discord.Embed(
+            title="✅ Review Complete!" if self.reviewed else "📇 Nothing to review",
+            description=f"You reviewed **{self.reviewed}** card{'s' if self.reviewed != 1 else ''} from **{self.deck}**.",
+            color=discord.Color.gold()
+        )
+        if self.lapses:
+            embed.add_field(name="🔁 To relearn", value=f"{self.lapses} card{'s' if self.lapses != 1 else ''} will come back shortly")
+        return embed
+
+    async def _reveal(self, interaction: discord.Interaction):
+        self._show_grades()
+        await interaction.response.edit_message(embed=self.embed(revealed=True), view=self)
+
+    def _grade_callback(self, quality: int):
+        async def callback(interaction: discord.Interaction):
+            await self._grade(interaction, quality)
+        return callback
+
+    async def _grade(self, interaction: discord.Interaction, quality: int):
+        card = self.queue.pop(0)
+        await self.on_grade(card, quality)
+        self.reviewed += 1
+        if quality < 3:
+            self.lapses += 1
+
+        if not self.queue:
+            self.queue = await self.refill()
+
+        if not self.queue:
+            self.stop()
+            await interaction.response.edit_message(embed=self.summary(), view=None)
+            return
+
+        self._show_front()
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    async def on_timeout(self):
+        if self.message is not None:
+            try:
+                await self.message.edit(embed=self.summary(), view=None)
+            except discord.HTTPException:
+                pass
@@ -0,0 +1,116 @@
+"""
+Timer utilities for MegaBot
+A single background task that fires scheduled callbacks from a heap of deadlines
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger('MegaBot.Timers')
+
+
+def to_timestamp(when: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime (the bot stores utcnow() everywhere)"""
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return when.timestamp()
+
+
+class TimerService:
+    """Keyed one-shot timers; rescheduling or cancelling a key replaces its deadline.
+
+    Cancelled entries stay in the heap and are skipped when they surface, so both
+    schedule() and cancel() are O(log n) / O(1) and idle timers cost no coroutines.
+    """
+
+    def __init__(self):
+        self._heap = []  # [(deadline, seq, key)]
+        self._timers = {}  # {key: (deadline, seq, callback)}
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task = None
+        self._running = set()  # Callbacks in flight, kept referenced until done
+        self.fired = 0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for task in self._running:
+            task.cancel()
+
+    def schedule(self, key: Hashable, when: datetime, callback: Callable[[], Awaitable[None]]):
+        """Run callback at when (naive UTC); replaces any timer already under key"""
+        deadline = to_timestamp(when)
+        seq = next(self._seq)
+        self._timers[key] = (deadline, seq, callback)
+        heapq.heappush(self._heap, (deadline, seq, key))
+        if self._heap[0][1] == seq:
+            self._wake.set()  # New earliest deadline
+
+    def cancel(self, key: Hashable) -> bool:
+        return self._timers.pop(key, None) is not None
+
+    def deadline(self, key: Hashable) -> Optional[datetime]:
+        timer = self._timers.get(key)
+        if timer is None:
+            return None
+        return datetime.fromtimestamp(timer[0], timezone.utc).replace(tzinfo=None)
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def _discard_stale(self):
+        while self._heap:
+            _, seq, key = self._heap[0]
+            timer = self._timers.get(key)
+            if timer is not None and timer[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    async def _run(self):
+        while True:
+            self._discard_stale()
+            self._wake.clear()
+            if not self._heap:
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self._heap)
+            _, _, callback = self._timers.pop(key)
+            self.fired += 1
+            # Callbacks run on their own so a slow one never delays the next deadline
+            task = asyncio.create_task(self._fire(key, callback))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    @staticmethod
+    async def _fire(key: Hashable, callback: Callable[[], Awaitable[None]]):
+        try:
+            await callback()
+        except Exception as e:
+            logger.error(f"Timer {key!r} failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'scheduled_timers': len(self._timers),
+            'heap_entries': len(self._heap),
+            'fired_timers': self.fired
+        }
@@ -0,0 +1,203 @@
+"""
+Translation utilities for MegaBot
+Cached, batched translation over pluggable backends
+"""
+
+import asyncio
+import hashlib
+import logging
+import unicodedata
+from typing import Any, Dict, List, Tuple
+
+from config import Config
+from utils.cache import TTLCache
+
+logger = logging.getLogger('MegaBot.Translation')
+
+
+class TranslationError(Exception):
+    """The backend could not translate the request"""
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form for cache keys: NFC with collapsed whitespace"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+class TranslationBackend:
+    """Base class for translators; translate_batch() keeps the order of texts"""
+
+    name = 'base'
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        raise NotImplementedError
+
+
+class LibreTranslateBackend(TranslationBackend):
+    """LibreTranslate's /translate endpoint (public or self-hosted), many texts per call"""
+
+    name = 'libretranslate'
+
+    def __init__(self, bot, url: str, api_key: str = ''):
+        self.bot = bot
+        self.url = url
+        self.api_key = api_key
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        payload = {'q': texts, 'source': source, 'target': target, 'format': 'text'}
+        if self.api_key:
+            payload['api_key'] = self.api_key
+
+        # Results are cached by the service, so no stale fallback here
+        result = await self.bot.http_client.post_json(self.url, json=payload, stale=False)
+        if not result or 'translatedText' not in result:
+            raise TranslationError("Translation failed. Check language code!")
+
+        translated = result['translatedText']
+        if isinstance(translated, str):
+            translated = [translated]
+        if len(translated) != len(texts):
+            raise TranslationError("Translation backend returned the wrong number of texts")
+        return translated
+
+
+class StubBackend(TranslationBackend):
+    """Tags text with the target language instead of translating; for tests and offline runs"""
+
+    name = 'stub'
+
+    async def translate_batch(self, texts: List[str], source: str, target: str) -> List[str]:
+        return [f"[{target}] {text}" for text in texts]
+
+
+def create_translation_backend(bot) -> TranslationBackend:
+    """Build the configured backend"""
+    if Config.TRANSLATE_BACKEND == 'stub':
+        return StubBackend()
+    if Config.TRANSLATE_BACKEND == 'libretranslate':
+        return LibreTranslateBackend(bot, Config.TRANSLATE_URL, Config.TRANSLATE_API_KEY)
+    raise ValueError(f"Unknown translation backend: {Config.TRANSLATE_BACKEND}")
+
+
+class TranslationService:
+    """Memory LRU -> database cache -> batched backend calls, coalescing duplicate requests"""
+
+    def __init__(self, backend: TranslationBackend, db, cache_size: int = 2000, batch_window: float = 0.05, batch_size: int = 20):
+        self.backend = backend
+        self.db = db
+        self.cache = TTLCache(maxsize=cache_size, ttl=86400)
+        self.batch_window = batch_window
+        self.batch_size = batch_size
+        self._inflight = {}  # {(hash, source, target): Future}
+        self._pending = {}  # {(source, target): [(key, text)]}
+        self._flushers = {}  # {(source, target): Task waiting out the batch window}
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    async def translate(self, text: str, source: str, target: str) -> str:
+        text = normalize_text(text)
+        key = (text_hash(text), source, target)
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.memory_hits += 1
+            return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        asyncio.ensure_future(self._resolve(key, text, future))
+        return await asyncio.shield(future)
+
+    async def _resolve(self, key: Tuple[str, str, str], text: str, future: asyncio.Future):
+        try:
+            stored = await self.db.get_translation(*key)
+        except Exception as e:
+            logger.warning(f"Translation cache lookup failed: {e}")
+            stored = None
+
+        if stored is not None:
+            self.db_hits += 1
+            self._finish(key, future, stored)
+            return
+
+        group = key[1:]
+        batch = self._pending.setdefault(group, [])
+        batch.append((key, text))
+        if len(batch) >= self.batch_size:
+            self._flush_now(group)
+        elif group not in self._flushers:
+            self._flushers[group] = asyncio.ensure_future(self._flush_later(group))
+
+    def _finish(self, key: Tuple[str, str, str], future: asyncio.Future, translated: str = None, error: Exception = None):
+        self._inflight.pop(key, None)
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            self.cache.set(key, translated)
+            future.set_result(translated)
+
+    async def _flush_later(self, group: Tuple[str, str]):
+        await asyncio.sleep(self.batch_window)
+        self._flushers.pop(group, None)
+        await self._send(group, self._pending.pop(group, []))
+
+    def _flush_now(self, group: Tuple[str, str]):
+        flusher = self._flushers.pop(group, None)
+        if flusher is not None:
+            flusher.cancel()
+        asyncio.ensure_future(self._send(group, self._pending.pop(group, [])))
+
+    async def _send(self, group: Tuple[str, str], batch: List[Tuple[Tuple[str, str, str], str]]):
+        """One backend call for everything queued for this language pair"""
+        if not batch:
+            return
+        source, target = group
+        self.batches += 1
+        self.batched_texts += len(batch)
+
+        try:
+            translations = await self.backend.translate_batch([text for _, text in batch], source, target)
+        except Exception as e:
+            error = e if isinstance(e, TranslationError) else TranslationError(str(e))
+            for key, _ in batch:
+                future = self._inflight.get(key)
+                if future is not None:
+                    self._finish(key, future, error=error)
+            return
+
+        for (key, _), translated in zip(batch, translations):
+            future = self._inflight.get(key)
+            if future is not None:
+                self._finish(key, future, translated)
+
+        try:
+            await self.db.save_translations([(*key, translated) for (key, _), translated in zip(batch, translations)])
+        except Exception as e:
+            logger.warning(f"Failed to persist translations: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Cache and batching metrics for monitoring"""
+        return {
+            'backend': self.backend.name,
+            'cached': len(self.cache),
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'coalesced': self.coalesced,
+            'translated': self.batched_texts,
+            'batches': self.batches,
+            'avg_batch_size': round(self.batched_texts / self.batches, 2) if self.batches else 0.0
+        }